@@ -5,6 +5,7 @@
 使用飞书官方 lark-oapi SDK
 """
 
+import atexit
 import json
 import logging
 import os
@@ -16,6 +17,7 @@ from lark_oapi.api.im.v1 import *
 from config.config import Config
 from utils.keyword_matcher import KeywordMatcher
 from utils.email_sender import EmailSender
+from utils.event_dedup import EventDeduplicator
 
 # 确保 logs 目录存在
 os.makedirs('logs', exist_ok=True)
@@ -35,6 +37,13 @@ logger = logging.getLogger(__name__)
 config = Config()
 keyword_matcher = KeywordMatcher(config)
 email_sender = EmailSender(config)
+event_deduplicator = EventDeduplicator(
+    config.EVENT_DEDUP_FILE,
+    ttl=config.EVENT_DEDUP_TTL_SECONDS,
+    max_entries=config.EVENT_DEDUP_MAX_ENTRIES
+)
+# 进程退出时（Ctrl+C、gunicorn 停止 worker）写入尚未落盘的去重记录，重启后仍能识别重复投递
+atexit.register(event_deduplicator.close)
 
 # 初始化飞书客户端
 client = lark.Client.builder() \
@@ -52,6 +61,13 @@ def handle_message(data: P2ImMessageReceiveV1):
     try:
         # 获取消息内容
         message = data.event.message
+
+        # 飞书未及时收到响应时会重新推送事件，已处理过的直接丢弃
+        event_id = data.header.event_id if data.header else None
+        if event_deduplicator.is_duplicate(event_id, message.message_id):
+            logger.info(f"忽略重复投递的消息事件 - event_id: {event_id}, message_id: {message.message_id}")
+            return
+
         message_type = message.message_type
 
         # 只处理文本消息
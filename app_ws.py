@@ -20,16 +20,21 @@ from lark_oapi.api.application.v6.model.p2_application_bot_menu_v6 import P2Appl
 from lark_oapi.ws import Client as WSClient
 from lark_oapi.event.callback.model.p2_card_action_trigger import P2CardActionTrigger
 from apscheduler.schedulers.background import BackgroundScheduler
-from config.config import Config
 from utils.keyword_matcher import KeywordMatcher
 from utils.email_sender import EmailSender
+from utils.daily_report import DailyReport
 from utils.daily_report_parser import DailyReportParser
-from utils.daily_report_storage import DailyReportStorage
+from utils.message_text import extract_text_from_post
 from utils.report_table_generator import ReportTableGenerator
 from utils.reminder_sender import ReminderSender
-from utils.vacation_manager import VacationManager
+from utils.report_roster import ReportRoster, normalize_name
 from utils.command_router import get_command_router
 from utils.command_handler import CommandHandler
+from utils.services import (
+    get_config, get_event_deduplicator, get_lark_client, get_report_storage, get_vacation_manager,
+    get_workday_calendar
+)
+from utils.durable_file import update_json
 
 # 确保 logs 目录存在
 os.makedirs('logs', exist_ok=True)
@@ -50,18 +55,32 @@ logger = logging.getLogger(__name__)
 logging.getLogger('Lark').setLevel(logging.CRITICAL)  # 只显示严重错误
 
 # 初始化配置和工具类
-config = Config()
+config = get_config()
 keyword_matcher = KeywordMatcher(config)
 email_sender = EmailSender(config)
 
 # 初始化日报相关工具类
 report_parser = DailyReportParser()
-report_storage = DailyReportStorage(config.DAILY_REPORT_STORAGE_FILE)
+# 存储使用进程内共享实例，命令处理和提醒读到的都是同一份数据
+report_storage = get_report_storage()
+vacation_manager = get_vacation_manager()
+workday_calendar = get_workday_calendar()
+event_deduplicator = get_event_deduplicator()
 table_generator = ReportTableGenerator()
-reminder_sender = ReminderSender(config.APP_ID, config.APP_SECRET, config.DAILY_REPORT_REQUIRED_USERS)
-vacation_manager = VacationManager(config.VACATION_STORAGE_FILE)
+reminder_sender = ReminderSender(
+    config.APP_ID, config.APP_SECRET, config.DAILY_REPORT_REQUIRED_USERS,
+    report_storage=report_storage, vacation_mgr=vacation_manager,
+    workday_calendar=workday_calendar
+)
+report_roster = ReportRoster(
+    vacation_manager, 'config/user_names.json', config.DAILY_REPORT_REQUIRED_USERS
+)
 command_router = get_command_router()
-command_handler = CommandHandler(config.APP_ID, config.APP_SECRET)
+command_handler = CommandHandler(
+    config.APP_ID, config.APP_SECRET,
+    vacation_mgr=vacation_manager,
+    report_storage=report_storage
+)
 
 # 初始化定时任务调度器
 scheduler = BackgroundScheduler()
@@ -69,6 +88,8 @@ scheduler = BackgroundScheduler()
 # 用户级别的容错期管理
 # 结构：{sender_name: {'timer': Timer对象, 'message_id': str, 'submit_time': datetime}}
 user_timers = {}
+# 反向索引：{message_id: sender_name}，撤回时直接定位计时器
+user_timer_by_message = {}
 
 # WebSocket连接管理
 ws_client = None
@@ -96,7 +117,7 @@ def parse_date_from_command(text: str) -> str:
     - "汇总1.14日报" -> 2026-01-14
     - "汇总1月14日报" -> 2026-01-14
     - "汇总2026-01-14日报" -> 2026-01-14
-    - "汇总日报" -> 智能判断（如果今天有日报用今天，否则用昨天）
+    - "汇总日报" -> 智能判断（如果今天有日报用今天，否则用上一个工作日）
     
     Args:
         text: 命令文本
@@ -144,17 +165,16 @@ def parse_date_from_command(text: str) -> str:
         # 今天有日报，使用今天
         return today
     else:
-        # 今天没有日报，使用昨天
-        yesterday = datetime.now() - timedelta(days=1)
-        yesterday_date = yesterday.strftime('%Y-%m-%d')
-        yesterday_count = report_storage.get_report_count(yesterday_date)
+        # 今天没有日报，使用上一个工作日（周一汇总时取上周五，节后取节前最后一个工作日）
+        prev_date = workday_calendar.prev_workday(today)
+        prev_count = report_storage.get_report_count(prev_date) if prev_date else 0
         
-        if yesterday_count > 0:
-            logger.info(f"💡 今天无日报，自动使用昨天的日期: {yesterday_date} ({yesterday_count}份)")
-            return yesterday_date
+        if prev_count > 0:
+            logger.info(f"💡 今天无日报，自动使用上一个工作日: {prev_date} ({prev_count}份)")
+            return prev_date
         else:
             # 都没有，还是返回今天
-            logger.info(f"⚠️  今天和昨天都没有日报，使用今天日期: {today}")
+            logger.info(f"⚠️  今天和上一个工作日都没有日报，使用今天日期: {today}")
             return today
 
 
@@ -191,11 +211,7 @@ def get_user_name(sender_data, chat_id: str) -> str:
 
             logger.info(f"正在从群成员列表API获取用户信息...")
 
-            # 创建客户端
-            client = lark.Client.builder() \
-                .app_id(config.APP_ID) \
-                .app_secret(config.APP_SECRET) \
-                .build()
+            client = get_lark_client()
 
             # 构建请求
             request = GetChatMembersRequest.builder() \
@@ -263,16 +279,12 @@ def save_user_to_config(user_id: str, name: str):
             "映射": {}
         }
 
-        if os.path.exists(user_names_file):
-            with open(user_names_file, 'r', encoding='utf-8') as f:
-                existing_data = json.load(f)
+        def add_user(data):
+            # 如果这个user_id还不在映射中，添加
+            data.setdefault('映射', {}).setdefault(user_id, name)
 
-        # 如果这个user_id还不在映射中，添加
-        if user_id not in existing_data.get('映射', {}):
-            existing_data.setdefault('映射', {})[user_id] = name
-
-            with open(user_names_file, 'w', encoding='utf-8') as f:
-                json.dump(existing_data, f, ensure_ascii=False, indent=2)
+        # 在文件锁内读取最新内容再写入，避免覆盖其他进程的修改
+        update_json(user_names_file, add_user, existing_data)
 
     except Exception as e:
         logger.warning(f"保存用户映射到配置文件失败: {str(e)}")
@@ -280,10 +292,7 @@ def save_user_to_config(user_id: str, name: str):
 
 def send_text_message(chat_id: str, text: str, receive_id_type: str = "chat_id"):
     """发送文本消息到群聊"""
-    client = lark.Client.builder() \
-        .app_id(config.APP_ID) \
-        .app_secret(config.APP_SECRET) \
-        .build()
+    client = get_lark_client()
 
     request = CreateMessageRequest.builder() \
         .receive_id_type(receive_id_type) \
@@ -301,10 +310,7 @@ def send_text_message(chat_id: str, text: str, receive_id_type: str = "chat_id")
 
 def send_interactive_card(chat_id: str, card: dict, receive_id_type: str = "chat_id"):
     """发送交互式卡片消息"""
-    client = lark.Client.builder() \
-        .app_id(config.APP_ID) \
-        .app_secret(config.APP_SECRET) \
-        .build()
+    client = get_lark_client()
 
     request = CreateMessageRequest.builder() \
         .receive_id_type(receive_id_type) \
@@ -422,7 +428,7 @@ def build_set_vacation_form_card() -> dict:
                 "required": True,
                 "placeholder": {
                     "tag": "plain_text",
-                    "content": "请输入姓名（如：张三）"
+                    "content": "请输入姓名（如：张三，多人用逗号分隔）"
                 }
             },
             {
@@ -468,7 +474,7 @@ def build_cancel_vacation_form_card() -> dict:
                 "required": True,
                 "placeholder": {
                     "tag": "plain_text",
-                    "content": "请输入姓名（如：张三）"
+                    "content": "请输入姓名（如：张三，多人用逗号分隔）"
                 }
             },
             {
@@ -597,92 +603,6 @@ def handle_bot_menu_event(data: P2ApplicationBotMenuV6):
         logger.error(f"处理机器人菜单事件失败: {e}", exc_info=True)
 
 
-def extract_text_from_post(content_json: dict) -> str:
-    """
-    从 post 类型消息中提取纯文本内容
-
-    Args:
-        content_json: post 消息的 content JSON 对象
-
-    Returns:
-        str: 提取的纯文本
-    """
-    try:
-        text_parts = []
-
-        # post 消息可能有两种结构：
-        # 1. 直接格式: {"title": "", "content": [[...]]}
-        # 2. 多语言格式: {"zh_cn": {"title": "", "content": [[...]]}}
-
-        # 先尝试多语言格式
-        lang_content = content_json.get('zh_cn') or content_json.get('en_us')
-
-        # 如果没有多语言格式，使用直接格式
-        if not lang_content:
-            lang_content = content_json
-
-        # 获取标题
-        title = lang_content.get('title', '')
-        if title and title.strip():
-            text_parts.append(title.strip())
-
-        # 获取内容块
-        content_blocks = lang_content.get('content', [])
-
-        # 遍历每个段落
-        for paragraph in content_blocks:
-            # 跳过空段落或None
-            if not paragraph:
-                # 空段落也要保留（作为段落分隔）
-                text_parts.append('')
-                continue
-
-            paragraph_text = []
-
-            # 遍历段落中的每个元素
-            for element in paragraph:
-                if not isinstance(element, dict):
-                    continue
-
-                tag = element.get('tag', '')
-
-                if tag == 'text':
-                    # 纯文本
-                    text = element.get('text', '')
-                    if text:
-                        paragraph_text.append(text)
-                elif tag == 'a':
-                    # 链接
-                    text = element.get('text', '')
-                    if text:
-                        paragraph_text.append(text)
-                elif tag == 'at':
-                    # @某人
-                    text = element.get('text', '')
-                    if text:
-                        paragraph_text.append(text)
-
-            # 合并段落文本
-            if paragraph_text:
-                combined_text = ''.join(paragraph_text)
-                # 只添加非空的段落文本
-                if combined_text.strip():
-                    text_parts.append(combined_text)
-
-        # 用换行符连接所有部分
-        result = '\n'.join(text_parts)
-        
-        # 清理多余的空行（超过2个连续换行符的情况）
-        while '\n\n\n' in result:
-            result = result.replace('\n\n\n', '\n\n')
-        
-        return result.strip()
-
-    except Exception as e:
-        logger.error(f"提取 post 消息文本失败: {str(e)}", exc_info=True)
-        return ""
-
-
 def handle_message_recalled(data):
     """处理消息撤回事件"""
     global user_timers
@@ -698,11 +618,7 @@ def handle_message_recalled(data):
         logger.info(f"📢 收到消息撤回事件 - message_id: {message_id}")
 
         # 查找是哪个用户撤回的
-        sender_name = None
-        for name, info in user_timers.items():
-            if info.get('message_id') == message_id:
-                sender_name = name
-                break
+        sender_name = user_timer_by_message.get(message_id)
 
         # 从存储中删除对应的日报
         success = report_storage.remove_report_by_message_id(message_id)
@@ -716,11 +632,10 @@ def handle_message_recalled(data):
                 if timer and timer.is_alive():
                     timer.cancel()
                     logger.info(f"⏱️  已取消 {sender_name} 的容错期计时器")
-                del user_timers[sender_name]
+                pop_user_timer(sender_name)
 
             # 检查撤回后的状态
-            current_count = report_storage.get_report_count()
-            expected_count = config.DAILY_REPORT_EXPECTED_COUNT
+            current_count, expected_count, _ = get_report_progress()
 
             logger.info(f"📝 撤回后人数变为 {current_count}/{expected_count}")
             logger.info(f"💡 用户可以重新发送正确的日报")
@@ -736,6 +651,13 @@ def handle_message(data: P2ImMessageReceiveV1):
     try:
         # 获取消息内容
         message = data.event.message
+
+        # 重复投递的事件直接丢弃，避免重复入库、重置容错期计时和重复发送邮件
+        event_id = data.header.event_id if data.header else None
+        if event_deduplicator.is_duplicate(event_id, message.message_id):
+            logger.info(f"忽略重复投递的消息事件 - event_id: {event_id}, message_id: {message.message_id}")
+            return
+
         message_type = message.message_type
 
         # 获取群聊信息（提前获取，用于过滤）
@@ -857,30 +779,9 @@ def handle_message(data: P2ImMessageReceiveV1):
                     success = vacation_manager.set_vacation(vacation_user)
                     if success:
                         logger.info(f"✅ 已设置 {vacation_user} 休假")
-                        
-                        # 自动为该用户生成休假日报
-                        today = datetime.now().strftime('%Y-%m-%d')
-                        vacation_report = {
-                            'sender': vacation_user,
-                            'tracking_issues': '-',
-                            'work_content': '休假',
-                            'blocks': '-',
-                            'next_plan': '-',
-                            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                            'date': today,
-                            'message_id': f"vacation_{vacation_user}_{today}"
-                        }
-                        
-                        # 检查是否已有日报（通过查找发送者）
-                        existing_reports = report_storage.get_all_reports(today)
-                        has_report = any(r.get('sender') == vacation_user for r in existing_reports)
-                        
-                        if not has_report:
-                            report_storage.add_report(vacation_report)
-                            current_count = report_storage.get_report_count()
-                            logger.info(f"📝 已自动添加休假日报 - {vacation_user}，当前共 {current_count} 份日报")
-                        else:
-                            logger.info(f"💡 {vacation_user} 今天已有日报记录，跳过添加休假日报")
+                        # 休假人员不再计入应提交人数，其余人都已提交时可以直接汇总
+                        if config.DAILY_REPORT_AUTO_SEND_ON_COMPLETE and not report_storage.is_sent():
+                            check_and_send_if_all_ready()
                     return
             else:
                 logger.warning("⚠️  无法解析休假命令格式，请使用: 姓名#休假")
@@ -928,7 +829,7 @@ def handle_message(data: P2ImMessageReceiveV1):
                 report_data = report_parser.parse(text, sender_name)
                 if report_data:
                     # 添加 message_id 用于撤回时定位
-                    report_data['message_id'] = message.message_id
+                    report_data.message_id = message.message_id
 
                     # 存储日报
                     report_storage.add_report(report_data)
@@ -942,17 +843,17 @@ def handle_message(data: P2ImMessageReceiveV1):
                     
                     # 启动延迟发送机制（给每个用户独立的10分钟容错期）
                     elif config.DAILY_REPORT_AUTO_SEND_ON_COMPLETE:
-                        expected_count = config.DAILY_REPORT_EXPECTED_COUNT
+                        submitted_count, expected_count, _ = get_report_progress()
                         
                         # 检查今天的日报是否已经发送过
                         if report_storage.is_sent():
                             logger.info(f"ℹ️  今日日报汇总已发送，不再自动发送（当前 {current_count} 份）")
                         else:
                             # 为该用户启动独立的10分钟容错期
-                            logger.info(f"📝 进度：{current_count}/{expected_count} 份日报")
+                            logger.info(f"📝 进度：{submitted_count}/{expected_count} 份日报")
                             schedule_user_timer(sender_name, message.message_id)
                             
-                            if current_count >= expected_count:
+                            if submitted_count >= expected_count:
                                 logger.info(f"✅ 已达到预期人数，等待所有用户容错期结束后自动发送")
 
         # 2. 检查关键字匹配
@@ -1013,11 +914,7 @@ def get_chat_members(chat_id: str, force_update: bool = False):
 
         logger.info(f"正在获取群组 {chat_id} 的成员列表...")
 
-        # 创建客户端
-        client = lark.Client.builder() \
-            .app_id(config.APP_ID) \
-            .app_secret(config.APP_SECRET) \
-            .build()
+        client = get_lark_client()
 
         # 构建请求
         request = GetChatMembersRequest.builder() \
@@ -1057,36 +954,31 @@ def get_chat_members(chat_id: str, force_update: bool = False):
             "映射": {}
         }
 
-        if os.path.exists(user_names_file):
-            try:
-                with open(user_names_file, 'r', encoding='utf-8') as f:
-                    existing_data = json.load(f)
-            except:
-                pass
+        def merge_members(data):
+            # 合并配置
+            existing_mapping = data.get('映射', {})
 
-        # 合并配置
-        existing_mapping = existing_data.get('映射', {})
+            if force_update:
+                # 强制更新模式：覆盖所有值
+                existing_mapping.update(user_mapping)
+            else:
+                # 保护模式：只添加新用户，保留已有配置
+                for user_id, name in user_mapping.items():
+                    if user_id not in existing_mapping:
+                        existing_mapping[user_id] = name
+
+            data['映射'] = existing_mapping
 
+        # 在文件锁内读取最新配置、合并并保存
+        existing_data = update_json(user_names_file, merge_members, existing_data)
+        existing_mapping = existing_data['映射']
         if force_update:
-            # 强制更新模式：覆盖所有值
-            existing_mapping.update(user_mapping)
             logger.info(f"💡 强制更新模式：已更新所有用户姓名")
-        else:
-            # 保护模式：只添加新用户，保留已有配置
-            for user_id, name in user_mapping.items():
-                if user_id not in existing_mapping:
-                    existing_mapping[user_id] = name
-
-        existing_data['映射'] = existing_mapping
 
         # 同时更新全局内存映射
         user_names_map.clear()
         user_names_map.update(existing_mapping)
 
-        # 保存配置到文件
-        with open(user_names_file, 'w', encoding='utf-8') as f:
-            json.dump(existing_data, f, ensure_ascii=False, indent=2)
-
         logger.info("=" * 60)
         logger.info(f"✅ 群成员信息已保存到 {user_names_file}")
         logger.info(f"共 {len(existing_mapping)} 个用户")
@@ -1099,7 +991,7 @@ def get_chat_members(chat_id: str, force_update: bool = False):
         logger.error(f"获取群成员列表异常: {str(e)}", exc_info=True)
 
 
-def send_single_report(report_data: dict):
+def send_single_report(report_data: DailyReport):
     """实时发送单个日报邮件"""
     try:
         # 生成HTML表格（只包含这一份日报）
@@ -1133,6 +1025,52 @@ def send_single_report(report_data: dict):
         logger.error(f"发送单个日报失败: {str(e)}", exc_info=True)
 
 
+def get_report_progress(date: str = None):
+    """
+    获取日报提交进度
+
+    应提交人员为名单（日报白名单或 DAILY_REPORT_REQUIRED_USERS）减去当天休假的人；
+    没有配置名单时为 DAILY_REPORT_EXPECTED_COUNT 减去当天休假且未提交日报的人数。
+
+    Args:
+        date: 日期 (YYYY-MM-DD)，默认为今天
+
+    Returns:
+        tuple: (已提交人数, 应提交人数, 未提交人员列表)
+    """
+    expected_users = report_roster.get_expected_users(date)
+    # 发送者姓名可能带“（领导）”标记，按名单的规则去除后再比较
+    submitted = {normalize_name(report.sender) for report in report_storage.get_all_reports(date)}
+    if not expected_users:
+        # 没有名单：固定人数减去当天休假且没有提交日报的人
+        on_vacation = [name for name in vacation_manager.get_vacation_users(date)
+                       if normalize_name(name) not in submitted]
+        expected_count = max(config.DAILY_REPORT_EXPECTED_COUNT - len(on_vacation), 0)
+        return report_storage.get_report_count(date), expected_count, []
+
+    missing = [name for name in expected_users if name not in submitted]
+    return len(expected_users) - len(missing), len(expected_users), missing
+
+
+def with_vacation_rows(reports: list, date: str) -> list:
+    """在汇总表中为当天休假且没有日报的人补一行“休假”（只用于展示，不写入存储）"""
+    submitted = {normalize_name(report.sender) for report in reports}
+    rows = list(reports)
+    for name in vacation_manager.get_vacation_users(date):
+        if normalize_name(name) not in submitted:
+            rows.append(DailyReport(sender=name, tracking_issues='-', work_content='休假',
+                                    blocks='-', next_plan='-', date=date))
+    return rows
+
+
+def send_scheduled_report_summary():
+    """定时汇总任务：非工作日没有日报时跳过，不发送空汇总"""
+    if not workday_calendar.is_workday() and report_storage.get_report_count() == 0:
+        logger.info("今天不是工作日且没有日报，跳过定时汇总")
+        return
+    send_daily_report_summary()
+
+
 def send_daily_report_summary(target_date: str = None):
     """定时汇总并发送日报邮件
     
@@ -1149,9 +1087,10 @@ def send_daily_report_summary(target_date: str = None):
         
         # 获取指定日期的日报
         reports = report_storage.get_all_reports(target_date)
-        report_count = len(reports)
+        logger.info(f"当前收集到 {len(reports)} 份日报（日期: {target_date}）")
 
-        logger.info(f"当前收集到 {report_count} 份日报（日期: {target_date}）")
+        reports = with_vacation_rows(reports, target_date)
+        report_count = len(reports)
 
         # 生成HTML表格（使用新的日期格式）
         display_date = datetime.strptime(target_date, '%Y-%m-%d').strftime('%Y/%m/%d')
@@ -1176,8 +1115,10 @@ def send_daily_report_summary(target_date: str = None):
 
         if success:
             logger.info(f"✅ 日报汇总邮件发送成功 - 收件人: {recipients}")
-            # 标记为已发送，避免自动/手动重复发送
+            # 先把已汇总的日报落盘，再标记为已发送，避免自动/手动重复发送
+            report_storage.flush()
             report_storage.mark_as_sent(target_date)
+            report_storage.flush()
             # 清空已发送的日报
             # report_storage.clear_reports()  # 可选：如果希望发送后清空
         else:
@@ -1202,13 +1143,13 @@ def check_and_send_if_all_ready():
             logger.info("ℹ️  今日日报汇总已发送，跳过")
             return
         
-        # 获取当前日报数量
-        current_count = report_storage.get_report_count()
-        expected_count = config.DAILY_REPORT_EXPECTED_COUNT
-        
+        # 应提交人数 = 名单 - 今天休假的人
+        current_count, expected_count, missing = get_report_progress()
+
         # 检查是否达到预期人数
         if current_count < expected_count:
-            logger.info(f"📝 当前 {current_count}/{expected_count} 份日报，未达到预期人数，不发送")
+            waiting = f"，未提交: {', '.join(missing)}" if missing else ''
+            logger.info(f"📝 当前 {current_count}/{expected_count} 份日报，未达到预期人数，不发送{waiting}")
             return
         
         # 检查是否所有用户都已超过10分钟容错期
@@ -1226,7 +1167,7 @@ def check_and_send_if_all_ready():
 
         for name in expired_names:
             # 不依赖 cancel：到期后可能正在执行回调
-            user_timers.pop(name, None)
+            pop_user_timer(name)
 
         # 仍在容错期内的用户数（基于 submit_time 判定）
         active_timers = 0
@@ -1250,11 +1191,20 @@ def check_and_send_if_all_ready():
         
         # 清空用户计时器
         user_timers.clear()
+        user_timer_by_message.clear()
         
     except Exception as e:
         logger.error(f"检查发送失败: {str(e)}", exc_info=True)
 
 
+def pop_user_timer(sender_name: str):
+    """移除用户的容错期记录，同时维护 message_id 反向索引"""
+    info = user_timers.pop(sender_name, None)
+    if info and user_timer_by_message.get(info.get('message_id')) == sender_name:
+        del user_timer_by_message[info['message_id']]
+    return info
+
+
 def schedule_user_timer(sender_name: str, message_id: str):
     """为特定用户安排10分钟容错期计时器"""
     global user_timers
@@ -1275,7 +1225,7 @@ def schedule_user_timer(sender_name: str, message_id: str):
             # 关键修复：回调触发时先移除本人的容错记录。
             # 否则在极端情况下（回调略早于600秒），check 会认为“还有1人容错期内”而直接 return，
             # 且之后没有新的回调触发检查，导致永远不自动发送。
-            user_timers.pop(sender_name, None)
+            pop_user_timer(sender_name)
 
             logger.info(f"📋 当前容错期状态: {len(user_timers)} 个用户在容错队列中")
             for uname, uinfo in user_timers.items():
@@ -1291,11 +1241,13 @@ def schedule_user_timer(sender_name: str, message_id: str):
         timer.start()
         
         # 记录用户计时器信息
+        pop_user_timer(sender_name)
         user_timers[sender_name] = {
             'timer': timer,
             'message_id': message_id,
             'submit_time': submit_time
         }
+        user_timer_by_message[message_id] = sender_name
         
         send_time = (submit_time + timedelta(minutes=10)).strftime('%H:%M:%S')
         logger.info(f"⏱️  已为 {sender_name} 启动10分钟容错期，将在 {send_time} 结束")
@@ -1311,6 +1263,10 @@ def check_and_send_reminder():
             logger.warning("未配置 DAILY_REPORT_CHAT_ID，无法发送提醒")
             return
 
+        if not workday_calendar.is_workday():
+            logger.info("今天不是工作日，跳过日报提醒")
+            return
+
         # 获取当前已收集的日报
         reports = report_storage.get_all_reports()
 
@@ -1325,6 +1281,27 @@ def check_and_send_reminder():
         logger.error(f"日报提醒任务失败: {str(e)}", exc_info=True)
 
 
+def archive_report_history():
+    """把超过保留期的日报移入归档"""
+    try:
+        archived = report_storage.archive_reports(config.DAILY_REPORT_RETENTION_DAYS)
+        logger.info(f"日报归档任务完成，归档 {archived} 天")
+
+    except Exception as e:
+        logger.error(f"日报归档任务失败: {str(e)}", exc_info=True)
+
+
+def prefetch_next_year_holidays():
+    """年底预取次年节假日数据（失败时由日历按指数退避推迟下次尝试）"""
+    try:
+        next_year = datetime.now().year + 1
+        if workday_calendar.prefetch_year(next_year):
+            logger.info(f"📅 {next_year}年节假日数据已就绪")
+
+    except Exception as e:
+        logger.error(f"预取节假日数据失败: {str(e)}", exc_info=True)
+
+
 # ============================================================
 # 注意：已移除基于"无消息超时"的健康监控
 # ============================================================
@@ -1344,6 +1321,10 @@ def signal_handler(signum, frame):
     """处理退出信号"""
     logger.info("\n收到退出信号，正在关闭...")
     shutdown_event.set()
+
+    # 等待正在进行的写盘完成，写入尚未落盘的日报和事件去重记录后再退出
+    report_storage.close()
+    event_deduplicator.close()
     
     # 关闭定时任务调度器
     if config.DAILY_REPORT_ENABLED and scheduler.running:
@@ -1398,7 +1379,7 @@ if __name__ == '__main__':
 
                 # 添加定时任务
                 scheduler.add_job(
-                    send_daily_report_summary,
+                    send_scheduled_report_summary,
                     'cron',
                     hour=hour,
                     minute=minute,
@@ -1439,6 +1420,56 @@ if __name__ == '__main__':
             except Exception as e:
                 logger.error(f"启动日报提醒定时任务失败: {str(e)}")
 
+        # 启动日报归档任务
+        if config.DAILY_REPORT_RETENTION_DAYS > 0:
+            logger.info(f"🗄️  日报归档已启用")
+            logger.info(f"   - 在线保留: 最近 {config.DAILY_REPORT_RETENTION_DAYS} 天")
+            logger.info(f"   - 归档时间: 每天 {config.DAILY_REPORT_ARCHIVE_TIME}")
+
+            try:
+                archive_hour, archive_minute = map(int, config.DAILY_REPORT_ARCHIVE_TIME.split(':'))
+
+                if not scheduler.running:
+                    scheduler.start()
+
+                scheduler.add_job(
+                    archive_report_history,
+                    'cron',
+                    hour=archive_hour,
+                    minute=archive_minute,
+                    id='daily_report_archive'
+                )
+
+                logger.info(f"   - 归档定时任务已启动")
+
+            except Exception as e:
+                logger.error(f"启动日报归档定时任务失败: {str(e)}")
+
+        # 启动次年节假日预取任务（11-12 月每天一次）
+        if config.HOLIDAY_PREFETCH_ENABLED:
+            logger.info(f"📅 节假日预取已启用")
+            logger.info(f"   - 预取时间: 每年 11-12 月每天 {config.HOLIDAY_PREFETCH_TIME}")
+
+            try:
+                prefetch_hour, prefetch_minute = map(int, config.HOLIDAY_PREFETCH_TIME.split(':'))
+
+                if not scheduler.running:
+                    scheduler.start()
+
+                scheduler.add_job(
+                    prefetch_next_year_holidays,
+                    'cron',
+                    month='11-12',
+                    hour=prefetch_hour,
+                    minute=prefetch_minute,
+                    id='holiday_prefetch'
+                )
+
+                logger.info(f"   - 预取定时任务已启动")
+
+            except Exception as e:
+                logger.error(f"启动节假日预取定时任务失败: {str(e)}")
+
     logger.info("=" * 60)
 
     # 创建事件处理器
@@ -1512,6 +1543,10 @@ if __name__ == '__main__':
     finally:
         # 设置退出标志
         shutdown_event.set()
+
+        # 等待正在进行的写盘完成，写入尚未落盘的日报和事件去重记录
+        report_storage.close()
+        event_deduplicator.close()
         
         # 关闭定时任务调度器
         if config.DAILY_REPORT_ENABLED and scheduler.running:
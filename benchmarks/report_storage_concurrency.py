@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日报存储并发读取基准测试
+后台线程持续写入日报（每次变更同步写盘），同时测量读取延迟，
+对比旧方式（读取时持有写入锁）和快照读取
+
+用法: python benchmarks/report_storage_concurrency.py [--days 120] [--reads 2000]
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from threading import Event, Thread
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.daily_report_storage import DailyReportStorage  # noqa: E402
+
+
+def build_storage(path: str, days: int) -> DailyReportStorage:
+    """预置若干天的历史数据，让每次写盘有一定耗时"""
+    storage = DailyReportStorage(path)
+    for day in range(days):
+        date = f"2025-{day // 28 + 1:02d}-{day % 28 + 1:02d}"
+        for i in range(10):
+            storage.add_report({
+                'sender': f'用户{i}',
+                'message_id': f'om_{day}_{i}',
+                'work_content': '整理需求、修复问题、编写文档' * 5,
+            }, date)
+    return storage
+
+
+def writer_loop(storage: DailyReportStorage, stop: Event, counter: list):
+    i = 0
+    while not stop.is_set():
+        storage.add_report({'sender': f'写入者{i % 20}', 'work_content': '并发写入'}, '2026-02-26')
+        i += 1
+    counter.append(i)
+
+
+def measure(storage: DailyReportStorage, reads: int, locked: bool) -> list:
+    latencies = []
+    for _ in range(reads):
+        start = time.perf_counter()
+        if locked:
+            # 旧实现：读取与写盘共用同一把锁
+            with storage.lock:
+                storage.get_all_reports('2026-02-26')
+        else:
+            storage.get_all_reports('2026-02-26')
+        latencies.append((time.perf_counter() - start) * 1000)
+        # 模拟真实读取频率，让读取分散在多次写盘之间
+        time.sleep(0.001)
+    return latencies
+
+
+def run(mode: str, days: int, reads: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = build_storage(os.path.join(tmp, 'daily_reports.json'), days)
+
+        stop = Event()
+        writes = []
+        writer = Thread(target=writer_loop, args=(storage, stop, writes), daemon=True)
+        writer.start()
+        try:
+            latencies = measure(storage, reads, locked=(mode == 'locked'))
+        finally:
+            stop.set()
+            writer.join()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{mode:>8}: 读取 {reads} 次, 并发写入 {writes[0]} 次 | "
+          f"p50 {statistics.median(latencies):.3f} ms, p99 {p99:.3f} ms, max {latencies[-1]:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='日报存储并发读取基准测试')
+    parser.add_argument('--days', type=int, default=120, help='预置的历史天数')
+    parser.add_argument('--reads', type=int, default=2000, help='读取次数')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    for mode in ('locked', 'snapshot'):
+        run(mode, args.days, args.reads)
+
+
+if __name__ == '__main__':
+    main()
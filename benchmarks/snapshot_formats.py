@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据快照格式基准测试
+生成多年的模拟日报历史，比较 json / compact / msgpack 三种格式的文件大小和读写耗时
+
+用法: python benchmarks/snapshot_formats.py [--years 3] [--people 15] [--rounds 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.durable_file import (  # noqa: E402
+    FORMAT_MSGPACK, SNAPSHOT_FORMATS, atomic_write_data, msgpack, read_data
+)
+
+
+def build_history(years: int, people: int) -> dict:
+    """按工作日生成 {date: {'reports': [...], 'sent': True}}"""
+    history = {}
+    day = date.today() - timedelta(days=365 * years)
+    while day <= date.today():
+        if day.weekday() < 5:
+            date_str = day.strftime('%Y-%m-%d')
+            history[date_str] = {
+                'reports': [
+                    {
+                        'sender': f'同事{i:02d}',
+                        'message_id': f'om_{date_str}_{i}',
+                        'tracking_issues': f'TSTAS-{400 + i}、TSTAS-{300 + i}',
+                        'work_content': '1、整理需求文档并评审\n2、修复线上问题\n3、编写单元测试',
+                        'blocks': '无',
+                        'next_plan': f'TSTAS-{500 + i}',
+                        'timestamp': f'{date_str} 18:{i:02d}:00',
+                        'date': date_str,
+                    }
+                    for i in range(people)
+                ],
+                'sent': True,
+            }
+        day += timedelta(days=1)
+    return history
+
+
+def bench(fmt: str, history: dict, rounds: int, directory: str):
+    path = os.path.join(directory, f'history.{fmt}')
+
+    save_times = []
+    for i in range(rounds):
+        # 每轮改动一处，避免内容相同时跳过写盘
+        history[next(iter(history))]['sent'] = bool(i % 2)
+        start = time.perf_counter()
+        atomic_write_data(path, history, fmt, backup=False)
+        save_times.append(time.perf_counter() - start)
+
+    load_times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        read_data(path)
+        load_times.append(time.perf_counter() - start)
+
+    size_kb = os.path.getsize(path) / 1024
+    print(f"{fmt:>8}: 大小 {size_kb:9.1f} KB | 保存 {min(save_times) * 1000:8.1f} ms | "
+          f"加载 {min(load_times) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数据快照格式基准测试')
+    parser.add_argument('--years', type=int, default=3, help='模拟历史年数')
+    parser.add_argument('--people', type=int, default=15, help='每天提交日报人数')
+    parser.add_argument('--rounds', type=int, default=5, help='每种格式重复次数（取最快一次）')
+    args = parser.parse_args()
+
+    history = build_history(args.years, args.people)
+    total = sum(len(v['reports']) for v in history.values())
+    print(f"模拟历史: {len(history)} 个工作日，{total} 条日报")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in SNAPSHOT_FORMATS:
+            if fmt == FORMAT_MSGPACK and msgpack is None:
+                print(f"{fmt:>8}: 未安装 msgpack，跳过")
+                continue
+            bench(fmt, history, args.rounds, tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -64,6 +64,18 @@ class Config:
             if email.strip()
         ]
         self.DAILY_REPORT_STORAGE_FILE = os.getenv('DAILY_REPORT_STORAGE_FILE', 'data/daily_reports.json')
+        self.DAILY_REPORT_STORAGE_JOURNAL = os.getenv('DAILY_REPORT_STORAGE_JOURNAL', 'False').lower() == 'true'  # 日志模式（追加写）
+        self.DAILY_REPORT_JOURNAL_COMPACT_THRESHOLD = int(os.getenv('DAILY_REPORT_JOURNAL_COMPACT_THRESHOLD', '200'))  # 日志压缩阈值
+        self.DAILY_REPORT_STORAGE_BACKEND = os.getenv('DAILY_REPORT_STORAGE_BACKEND', 'json').lower()  # json / sharded / sqlite
+        self.DAILY_REPORT_SQLITE_FILE = os.getenv('DAILY_REPORT_SQLITE_FILE', 'data/daily_reports.db')
+        self.DAILY_REPORT_SHARD_DIR = os.getenv('DAILY_REPORT_SHARD_DIR', 'data/reports')  # 按月分片目录
+        self.DAILY_REPORT_SHARD_CACHE_SIZE = int(os.getenv('DAILY_REPORT_SHARD_CACHE_SIZE', '6'))  # 常驻内存的历史月份数
+        self.DAILY_REPORT_FLUSH_INTERVAL = float(os.getenv('DAILY_REPORT_FLUSH_INTERVAL', '0'))  # 延迟落盘间隔（秒），0 为同步写盘
+        self.DAILY_REPORT_FLUSH_MAX_PENDING = int(os.getenv('DAILY_REPORT_FLUSH_MAX_PENDING', '20'))  # 累计变更数达到后立即落盘
+        self.DAILY_REPORT_RETENTION_DAYS = int(os.getenv('DAILY_REPORT_RETENTION_DAYS', '0'))  # 在线保留天数，0 表示不归档
+        self.DAILY_REPORT_ARCHIVE_DIR = os.getenv('DAILY_REPORT_ARCHIVE_DIR', 'data/archive')  # 历史归档目录
+        self.DAILY_REPORT_ARCHIVE_TIME = os.getenv('DAILY_REPORT_ARCHIVE_TIME', '03:30')  # 每天执行归档的时间
+        self.DATA_SNAPSHOT_FORMAT = os.getenv('DATA_SNAPSHOT_FORMAT', 'json').lower()  # 日报/休假数据文件格式：json / compact / msgpack
         
         # 日报提醒配置
         self.DAILY_REPORT_REMINDER_ENABLED = os.getenv('DAILY_REPORT_REMINDER_ENABLED', 'True').lower() == 'true'
@@ -92,6 +104,14 @@ class Config:
         self.HOLIDAY_API_URL = os.getenv('HOLIDAY_API_URL', 'http://timor.tech/api/holiday/year/{year}')
         self.HOLIDAY_CACHE_FILE = os.getenv('HOLIDAY_CACHE_FILE', 'data/holidays_cache.json')
         self.HOLIDAY_CONFIG_FILE = os.getenv('HOLIDAY_CONFIG_FILE', 'config/holidays.json')
+        # 缓存的节假日数据超过有效期后在后台用条件请求重新验证，0 表示不重新验证
+        self.HOLIDAY_CACHE_TTL_DAYS = float(os.getenv('HOLIDAY_CACHE_TTL_DAYS', '7'))
+        # 节假日API连续失败达到次数后熔断，熔断期间（以及某年获取失败后）直接使用本地配置或周末规则
+        self.HOLIDAY_API_FAILURE_THRESHOLD = int(os.getenv('HOLIDAY_API_FAILURE_THRESHOLD', '3'))
+        self.HOLIDAY_API_COOLDOWN_SECONDS = float(os.getenv('HOLIDAY_API_COOLDOWN_SECONDS', '300'))
+        # 每年 11-12 月每天定时预取次年节假日数据，元旦后第一次判断工作日时直接命中缓存
+        self.HOLIDAY_PREFETCH_ENABLED = os.getenv('HOLIDAY_PREFETCH_ENABLED', 'True').lower() == 'true'
+        self.HOLIDAY_PREFETCH_TIME = os.getenv('HOLIDAY_PREFETCH_TIME', '03:30')  # 预取时间
 
         # 命令功能配置
         self.COMMAND_ENABLED = os.getenv('COMMAND_ENABLED', 'True').lower() == 'true'
@@ -100,6 +120,11 @@ class Config:
             user_id.strip() for user_id in admin_users.split(',') if user_id.strip()
         ]
 
+        # 事件去重配置（飞书可能重复投递同一事件）
+        self.EVENT_DEDUP_FILE = os.getenv('EVENT_DEDUP_FILE', 'data/processed_events.json')  # 已处理事件记录，为空则只在内存去重
+        self.EVENT_DEDUP_TTL_SECONDS = int(os.getenv('EVENT_DEDUP_TTL_SECONDS', '86400'))  # 事件ID保留时长
+        self.EVENT_DEDUP_MAX_ENTRIES = int(os.getenv('EVENT_DEDUP_MAX_ENTRIES', '5000'))  # 最多保留的事件ID数量
+
     def _load_keywords(self):
         """
         加载关键字配置
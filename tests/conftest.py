@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试公共配置
+"""
+
+import pytest
+
+from utils.services import reset_services
+
+
+@pytest.fixture(autouse=True)
+def isolated_services():
+    """每个测试使用独立的共享服务实例，避免测试间互相污染"""
+    reset_services()
+    yield
+    reset_services()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+熔断器测试
+"""
+
+from unittest.mock import patch
+
+from utils.circuit_breaker import STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, CircuitBreaker
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker('test', failure_threshold=2, cooldown=60)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.allow() is True
+
+        breaker.record_failure()
+        assert breaker.state == STATE_OPEN
+        assert breaker.allow() is False
+
+    def test_half_open_allows_single_probe(self):
+        breaker = CircuitBreaker('test', failure_threshold=1, cooldown=60)
+
+        with patch('utils.circuit_breaker.time.time', return_value=1000):
+            breaker.record_failure()
+        with patch('utils.circuit_breaker.time.time', return_value=1061):
+            assert breaker.state == STATE_HALF_OPEN
+            assert breaker.allow() is True
+            assert breaker.allow() is False
+
+            # 试探失败重新熔断
+            breaker.record_failure()
+            assert breaker.state == STATE_OPEN
+
+        with patch('utils.circuit_breaker.time.time', return_value=1122):
+            assert breaker.allow() is True
+            breaker.record_success()
+            assert breaker.state == STATE_CLOSED
+            assert breaker.allow() is True
@@ -7,6 +7,8 @@
 from unittest.mock import patch
 
 from utils.command_handler import CommandHandler
+from utils.daily_report import DailyReport
+from utils.vacation_manager import VacationManager
 
 
 class TestCommandHandler:
@@ -24,7 +26,7 @@ class TestCommandHandler:
 
     def test_handle_summary_today(self):
         self.handler.report_storage.get_all_reports = lambda date: [
-            {'sender': '张三', 'work_content': '完成了XXX'}
+            DailyReport(sender='张三', work_content='完成了XXX')
         ]
         result = self.handler.handle_summary([], {})
         assert '日报汇总' in result
@@ -37,14 +39,24 @@ class TestCommandHandler:
         assert '2026-02-26' in result
 
     def test_handle_my_report(self):
-        self.handler.report_storage.get_all_reports = lambda date: [
-            {'sender': '测试用户', 'work_content': '今日完成X', 'timestamp': '2026-02-26 10:00:00'}
-        ]
+        self.handler.report_storage.get_report_by_sender = lambda sender, date: DailyReport(
+            sender=sender, work_content='今日完成X', timestamp='2026-02-26 10:00:00'
+        )
         context = {'user_id': 'test_user', 'user_name': '测试用户'}
         result = self.handler.handle_my_report([], context)
         assert '日报' in result
         assert '今日完成X' in result
 
+    def test_handle_my_history(self):
+        self.handler.report_storage.get_user_history = lambda sender, limit: [
+            DailyReport(sender=sender, date='2026-02-26', work_content='完成Y'),
+            DailyReport(sender=sender, date='2026-02-25', work_content='完成X'),
+        ][:limit]
+        self.handler.report_storage.get_sender_dates = lambda sender: ['2026-02-25', '2026-02-26']
+        result = self.handler.handle_command('my_history', ['1'], {'user_name': '测试用户'})
+        assert '共提交 2 天' in result
+        assert '2026-02-26' in result and '完成X' not in result
+
     def test_handle_set_vacation(self):
         result = self.handler.handle_set_vacation(['张三', '2026-02-26'], {})
         assert '成功' in result or '设置' in result
@@ -59,3 +71,32 @@ class TestCommandHandler:
         result = self.handler.handle_query_vacation(['2026-02-26'], {})
         assert '调休' in result
         assert '张三' in result
+
+    def test_handle_set_vacation_range_and_weekly(self, tmp_path):
+        self.handler.vacation_mgr = VacationManager(str(tmp_path / 'vacations.json'))
+        result = self.handler.handle_command('set_vacation', ['张三', '2026-03-01~2026-03-07'], {})
+        assert '2026-03-01 ~ 2026-03-07' in result
+        assert self.handler.vacation_mgr.is_on_vacation('张三', '2026-03-04') is True
+
+        result = self.handler.handle_command('set_vacation', ['李四', '每周五'], {})
+        assert '每周五' in result
+        assert self.handler.vacation_mgr.cancel_vacation('李四', weekdays=[4]) is True
+        assert self.handler.vacation_mgr.cancel_vacation('张三', '2026-03-01', end_date='2026-03-07') is True
+
+    def test_handle_query_vacation_invalid_date(self, tmp_path):
+        self.handler.vacation_mgr = VacationManager(str(tmp_path / 'vacations.json'))
+        assert '日期格式错误' in self.handler.handle_command('query_vacation', ['2026-13-45'], {})
+        assert '设置调休失败' in self.handler.handle_command('set_vacation', ['张三', '2026-13-45'], {})
+
+    def test_handle_batch_vacation(self, tmp_path):
+        self.handler.vacation_mgr = VacationManager(str(tmp_path / 'vacations.json'))
+        self.handler.vacation_mgr.set_vacation('王五', '2026-03-02')
+        result = self.handler.handle_command('set_vacation', ['张三,李四，王五', '2026-03-02'], {})
+        assert '张三、李四、王五' in result
+        assert '已设置过: 王五' in result
+        assert self.handler.vacation_mgr.get_vacation_users('2026-03-02') == ['王五', '张三', '李四']
+
+        result = self.handler.handle_command('cancel_vacation', ['张三、李四、赵六', '2026-03-02'], {})
+        assert '张三、李四' in result
+        assert '未设置调休: 赵六' in result
+        assert self.handler.vacation_mgr.get_vacation_users('2026-03-02') == ['王五']
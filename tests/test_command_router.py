@@ -36,6 +36,22 @@ class TestCommandRouter:
         assert '张三' in cmd['args']
         assert '2026-02-26' in cmd['args']
 
+    def test_parse_command_my_history(self):
+        assert self.router.parse_command('/我的历史')['args'] == []
+        cmd = self.router.parse_command('/我的历史 5')
+        assert cmd['command'] == 'my_history'
+        assert cmd['args'] == ['5']
+
+    def test_parse_command_vacation_range(self):
+        cmd = self.router.parse_command('/设置调休 张三 2026-03-01~2026-03-07 每周一、三')
+        assert cmd['args'] == ['张三', '2026-03-01~2026-03-07', '每周一、三']
+        assert self.router.parse_command('/取消调休 张三 每周五')['args'] == ['张三', '每周五']
+
     def test_not_a_command(self):
         assert self.router.is_command('今天的日报') is False
         assert self.router.parse_command('普通消息') is None
+
+    def test_parse_command_batch_vacation(self):
+        cmd = self.router.parse_command('/设置调休 张三,李四, 王五 2026-03-02')
+        assert cmd['args'] == ['张三,李四, 王五', '2026-03-02']
+        assert self.router.parse_command('/取消调休 张三、李四')['args'] == ['张三、李四']
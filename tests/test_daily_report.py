@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日报记录测试
+"""
+
+import json
+
+from utils.daily_report import DailyReport
+from utils.daily_report_storage import DailyReportStorage
+from utils.durable_file import json_default
+from utils.report_table_generator import ReportTableGenerator
+
+
+class TestDailyReport:
+    def test_round_trip_keeps_unknown_fields(self):
+        data = {'sender': '张三', 'work_content': 'A', 'date': '2026-02-26', 'source': 'backfill'}
+        report = DailyReport.from_dict(data)
+
+        assert report.sender == '张三'
+        assert report.extra == {'source': 'backfill'}
+        assert report.to_dict() == data
+        assert report == data
+        assert json.loads(json.dumps(report, default=json_default)) == data
+
+    def test_legacy_keys_normalized(self):
+        report = DailyReport.from_dict({'name': '李四', 'content': '旧内容', 'time': '2025-01-01 10:00:00'})
+
+        assert report.sender == '李四'
+        assert report.work_content == '旧内容'
+        assert report.timestamp == '2025-01-01 10:00:00'
+        assert report.extra is None
+        assert report.to_dict() == {'sender': '李四', 'work_content': '旧内容', 'timestamp': '2025-01-01 10:00:00'}
+
+    def test_dict_style_access(self):
+        report = DailyReport(sender='张三')
+        report['message_id'] = 'om_1'
+        report['source'] = 'manual'
+
+        assert report['sender'] == '张三'
+        assert report.get('name') == '张三'
+        assert report.get('blocks', '无') == '无'
+        assert 'message_id' in report and 'blocks' not in report
+        assert report['source'] == 'manual'
+
+    def test_storage_normalizes_legacy_file_on_load(self, tmp_path):
+        storage_file = tmp_path / 'daily_reports.json'
+        storage_file.write_text(json.dumps({
+            '2025-10-21': {'reports': [{'name': '王五', 'content': '旧格式'}], 'sent': False}
+        }, ensure_ascii=False), encoding='utf-8')
+
+        storage = DailyReportStorage(str(storage_file))
+        report = storage.get_report_by_sender('王五', '2025-10-21')
+        assert isinstance(report, DailyReport)
+        assert report.work_content == '旧格式'
+
+        storage.add_report({'sender': '赵六', 'work_content': '新内容'}, '2025-10-21')
+        saved = json.loads(storage_file.read_text(encoding='utf-8'))
+        assert saved['2025-10-21']['reports'][0] == {'sender': '王五', 'work_content': '旧格式'}
+
+    def test_table_renders_empty_and_missing_fields_as_before(self):
+        # 空字符串原样输出，字段缺失才显示“无”（与改用 DailyReport 之前按字典读取一致）
+        html = ReportTableGenerator().generate_html_table(
+            [DailyReport(sender='张三', tracking_issues='', work_content='完成了XXX')], '2026-03-02')
+        row = html[html.index('<td', html.index('张三')):]
+        cells = [cell.split('>', 1)[1].split('</td>', 1)[0].strip()
+                 for cell in row.split('<td')[1:5]]
+        assert cells == ['', '完成了XXX', '无', '无']
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日报存储测试
+"""
+
+import json
+import os
+from threading import Thread
+
+from utils.daily_report_storage import DailyReportStorage
+
+
+class TestDailyReportStorage:
+    def test_add_and_dedup_by_sender(self, tmp_path):
+        storage = DailyReportStorage(str(tmp_path / 'daily_reports.json'))
+        storage.add_report({'sender': '张三', 'work_content': 'A'}, '2026-02-26')
+        storage.add_report({'sender': '张三', 'work_content': 'B'}, '2026-02-26')
+
+        reports = storage.get_all_reports('2026-02-26')
+        assert len(reports) == 1
+        assert reports[0]['work_content'] == 'B'
+
+    def test_remove_report_by_message_id(self, tmp_path):
+        storage = DailyReportStorage(str(tmp_path / 'daily_reports.json'))
+        storage.add_report({'sender': '张三', 'message_id': 'om_1'}, '2026-02-26')
+
+        assert storage.remove_report_by_message_id('om_1') is True
+        assert storage.remove_report_by_message_id('om_1') is False
+        assert storage.get_report_count('2026-02-26') == 0
+
+
+class TestDailyReportStorageJournal:
+    def test_mutations_append_to_journal(self, tmp_path):
+        storage_file = str(tmp_path / 'daily_reports.json')
+        storage = DailyReportStorage(storage_file, journal=True, compact_threshold=100)
+
+        storage.add_report({'sender': '张三', 'message_id': 'om_1'}, '2026-02-26')
+        storage.mark_as_sent('2026-02-26')
+
+        # 快照不被重写，变更只追加到日志
+        assert not os.path.exists(storage_file)
+        with open(storage.journal_file, 'r', encoding='utf-8') as f:
+            ops = [json.loads(line) for line in f]
+        assert [op['op'] for op in ops] == ['add', 'sent']
+
+    def test_restart_replays_snapshot_and_journal(self, tmp_path):
+        storage_file = str(tmp_path / 'daily_reports.json')
+        storage = DailyReportStorage(storage_file, journal=True, compact_threshold=100)
+        storage.add_report({'sender': '张三', 'message_id': 'om_1'}, '2026-02-26')
+        storage.add_report({'sender': '李四', 'message_id': 'om_2'}, '2026-02-26')
+        storage.remove_report_by_message_id('om_1')
+        storage.mark_as_sent('2026-02-26')
+
+        reloaded = DailyReportStorage(storage_file, journal=True, compact_threshold=100)
+        reports = reloaded.get_all_reports('2026-02-26')
+        assert [r['sender'] for r in reports] == ['李四']
+        assert reloaded.is_sent('2026-02-26') is True
+        # 重放后日志已合并进快照
+        assert os.path.exists(storage_file)
+        assert not os.path.exists(reloaded.journal_file)
+
+    def test_compaction_merges_journal_into_snapshot(self, tmp_path):
+        storage_file = str(tmp_path / 'daily_reports.json')
+        storage = DailyReportStorage(storage_file, journal=True, compact_threshold=100)
+        for i in range(5):
+            storage.add_report({'sender': f'用户{i}'}, '2026-02-26')
+
+        assert storage.compact() is True
+        with open(storage_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        assert len(data['2026-02-26']['reports']) == 5
+        assert not os.path.exists(storage.journal_file)
+
+    def test_skips_torn_journal_line(self, tmp_path):
+        storage_file = str(tmp_path / 'daily_reports.json')
+        storage = DailyReportStorage(storage_file, journal=True, compact_threshold=100)
+        storage.add_report({'sender': '张三'}, '2026-02-26')
+        with open(storage.journal_file, 'a', encoding='utf-8') as f:
+            f.write('{"op":"add","date":"2026-')
+
+        reloaded = DailyReportStorage(storage_file, journal=True, compact_threshold=100)
+        assert reloaded.get_report_count('2026-02-26') == 1
+
+
+class TestDailyReportStorageMessageIndex:
+    def test_index_follows_add_replace_and_remove(self, tmp_path):
+        storage = DailyReportStorage(str(tmp_path / 'daily_reports.json'))
+        storage.add_report({'sender': '张三', 'message_id': 'om_1'}, '2026-02-26')
+        storage.add_report({'sender': '李四', 'message_id': 'om_2'}, '2026-02-26')
+        storage.add_report({'sender': '王五', 'message_id': 'om_3'}, '2026-02-26')
+
+        # 覆盖后旧 message_id 不再指向任何日报
+        storage.add_report({'sender': '张三', 'message_id': 'om_4'}, '2026-02-26')
+        assert 'om_1' not in storage._message_index
+        assert storage._message_index['om_4'] == ('2026-02-26', 0)
+
+        # 删除后后续日报的位置前移
+        assert storage.remove_report_by_message_id('om_2') is True
+        assert storage._message_index['om_3'] == ('2026-02-26', 1)
+        assert storage.remove_report_by_message_id('om_3') is True
+        assert [r['sender'] for r in storage.get_all_reports('2026-02-26')] == ['张三']
+
+    def test_index_rebuilt_on_load(self, tmp_path):
+        storage_file = str(tmp_path / 'daily_reports.json')
+        storage = DailyReportStorage(storage_file)
+        storage.add_report({'sender': '张三', 'message_id': 'om_1'}, '2026-02-25')
+        storage.add_report({'sender': '李四', 'message_id': 'om_2'}, '2026-02-26')
+
+        reloaded = DailyReportStorage(storage_file)
+        assert reloaded._message_index == {
+            'om_1': ('2026-02-25', 0),
+            'om_2': ('2026-02-26', 0),
+        }
+        assert reloaded.clear_reports('2026-02-25') is True
+        assert 'om_1' not in reloaded._message_index
+
+
+class TestDailyReportStorageSenderIndex:
+    def test_index_follows_add_replace_and_remove(self, tmp_path):
+        storage = DailyReportStorage(str(tmp_path / 'daily_reports.json'))
+        storage.add_report({'sender': '张三', 'message_id': 'om_1', 'work_content': 'A'}, '2026-02-26')
+        storage.add_report({'sender': '张三', 'message_id': 'om_2'}, '2026-02-24')
+        storage.add_report({'sender': '李四', 'message_id': 'om_3'}, '2026-02-25')
+        storage.add_report({'sender': '张三', 'message_id': 'om_4', 'work_content': 'B'}, '2026-02-26')
+
+        assert storage.get_sender_dates('张三') == ['2026-02-24', '2026-02-26']
+        assert storage.get_sender_dates('张三', start='2026-02-25') == ['2026-02-26']
+        assert storage.get_report_by_sender('张三', '2026-02-26')['work_content'] == 'B'
+        assert storage.get_report_by_sender('李四', '2026-02-26') is None
+
+        assert storage.remove_report_by_message_id('om_2') is True
+        assert storage.get_sender_dates('张三') == ['2026-02-26']
+        assert storage.clear_reports('2026-02-25') is True
+        assert '李四' not in storage._sender_index
+
+    def test_history_newest_first_after_reload(self, tmp_path):
+        storage_file = str(tmp_path / 'daily_reports.json')
+        storage = DailyReportStorage(storage_file)
+        for day in ('2026-02-23', '2026-02-25', '2026-02-24'):
+            storage.add_report({'sender': '张三', 'work_content': day}, day)
+
+        reloaded = DailyReportStorage(storage_file)
+        history = reloaded.get_user_history('张三', limit=2)
+        assert [r['work_content'] for r in history] == ['2026-02-25', '2026-02-24']
+
+
+class TestDailyReportStorageSnapshots:
+    def test_reads_do_not_wait_for_writer_lock(self, tmp_path):
+        storage = DailyReportStorage(str(tmp_path / 'daily_reports.json'))
+        storage.add_report({'sender': '张三'}, '2026-02-26')
+
+        results = []
+        reader = Thread(target=lambda: results.append(storage.get_report_count('2026-02-26')))
+        # 模拟写入方正在落盘
+        with storage.lock:
+            reader.start()
+            reader.join(timeout=2)
+            assert not reader.is_alive()
+        assert results == [1]
+
+    def test_snapshot_tracks_every_mutation(self, tmp_path):
+        storage = DailyReportStorage(str(tmp_path / 'daily_reports.json'))
+        storage.add_report({'sender': '张三', 'message_id': 'om_1'}, '2026-02-26')
+        before = storage.get_all_reports('2026-02-26')
+
+        storage.add_report({'sender': '李四', 'message_id': 'om_2'}, '2026-02-26')
+        storage.remove_report_by_message_id('om_1')
+        storage.mark_as_sent('2026-02-26')
+
+        # 之前拿到的结果不受后续变更影响
+        assert [r['sender'] for r in before] == ['张三']
+        assert [r['sender'] for r in storage.get_all_reports('2026-02-26')] == ['李四']
+        assert storage.is_sent('2026-02-26') is True
+
+        storage.clear_reports('2026-02-26')
+        assert storage.get_all_reports('2026-02-26') == []
+        assert storage.is_sent('2026-02-26') is False
+
+
+class TestDailyReportStorageRangeQuery:
+    def _make_storage(self, tmp_path):
+        storage = DailyReportStorage(str(tmp_path / 'daily_reports.json'))
+        for date in ('2026-01-30', '2026-02-02', '2026-02-03', '2026-03-01'):
+            storage.add_report({'sender': '张三'}, date)
+            storage.add_report({'sender': '李四'}, date)
+        return storage
+
+    def test_iter_reports_in_date_order(self, tmp_path):
+        storage = self._make_storage(tmp_path)
+
+        reports = storage.iter_reports('2026-01-31', '2026-03-01', sender='李四')
+        assert [r['date'] for r in reports] == ['2026-02-02', '2026-02-03', '2026-03-01']
+        assert next(storage.iter_reports('2026-02-03', '2026-02-03'))['sender'] == '张三'
+        assert list(storage.iter_reports('2026-02-04', '2026-02-28')) == []
+
+    def test_count_by_date_follows_mutations(self, tmp_path):
+        storage = self._make_storage(tmp_path)
+        storage.clear_reports('2026-02-02')
+        storage.add_report({'sender': '王五'}, '2026-02-15')
+
+        assert storage.count_by_date('2026-02-01', '2026-02-28') == {'2026-02-03': 2, '2026-02-15': 1}
+        assert storage._sorted_dates == ('2026-01-30', '2026-02-03', '2026-02-15', '2026-03-01')
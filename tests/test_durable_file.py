@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+持久化文件写入工具测试
+"""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from utils import durable_file
+from utils.durable_file import atomic_write_data, atomic_write_json, msgpack, read_data, read_json
+from utils.daily_report_storage import DailyReportStorage
+
+
+class TestDurableFile:
+    def test_write_keeps_previous_version_as_backup(self, tmp_path):
+        path = str(tmp_path / 'data.json')
+        assert atomic_write_json(path, {'v': 1}) is True
+        assert atomic_write_json(path, {'v': 2}) is True
+
+        assert read_json(path) == {'v': 2}
+        with open(path + '.bak', encoding='utf-8') as f:
+            assert json.load(f) == {'v': 1}
+
+    def test_skips_unchanged_content(self, tmp_path):
+        path = str(tmp_path / 'data.json')
+        assert atomic_write_json(path, {'v': 1}) is True
+        mtime = os.stat(path).st_mtime_ns
+
+        assert atomic_write_json(path, {'v': 1}) is False
+        assert os.stat(path).st_mtime_ns == mtime
+
+    def test_failed_write_leaves_original_intact(self, tmp_path):
+        path = str(tmp_path / 'data.json')
+        atomic_write_json(path, {'v': 1})
+
+        with patch('utils.durable_file.os.fsync', side_effect=OSError('disk full')):
+            with pytest.raises(OSError):
+                atomic_write_json(path, {'v': 2})
+
+        assert read_json(path) == {'v': 1}
+        assert [name for name in os.listdir(tmp_path) if name.endswith('.tmp')] == []
+
+    def test_read_falls_back_to_backup(self, tmp_path):
+        path = str(tmp_path / 'data.json')
+        atomic_write_json(path, {'v': 1})
+        atomic_write_json(path, {'v': 2})
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"v": ')
+
+        assert read_json(path) == {'v': 1}
+
+    def test_storage_recovers_from_truncated_file(self, tmp_path):
+        storage_file = str(tmp_path / 'daily_reports.json')
+        storage = DailyReportStorage(storage_file)
+        storage.add_report({'sender': '张三'}, '2026-02-25')
+        storage.add_report({'sender': '李四'}, '2026-02-26')
+        with open(storage_file, 'w', encoding='utf-8') as f:
+            f.write('')
+
+        reloaded = DailyReportStorage(storage_file)
+        assert reloaded.get_report_count('2026-02-25') == 1
+
+
+class TestSnapshotFormats:
+    DATA = {'2026-02-26': {'reports': [{'sender': '张三', 'work_content': '修复问题'}], 'sent': False}}
+
+    def test_compact_json_has_no_indentation(self, tmp_path):
+        path = str(tmp_path / 'data.json')
+        atomic_write_data(path, self.DATA, 'compact')
+
+        with open(path, encoding='utf-8') as f:
+            content = f.read()
+        assert '\n' not in content and '张三' in content
+        assert read_data(path) == self.DATA
+
+    @pytest.mark.skipif(msgpack is None, reason='未安装 msgpack')
+    def test_msgpack_round_trip_and_detection(self, tmp_path):
+        path = str(tmp_path / 'data.json')
+        atomic_write_data(path, self.DATA, 'msgpack')
+
+        with open(path, 'rb') as f:
+            assert f.read(1) not in (b'{', b'[')
+        assert read_data(path) == self.DATA
+
+    def test_msgpack_falls_back_to_compact_when_missing(self, tmp_path):
+        path = str(tmp_path / 'data.json')
+        with patch.object(durable_file, 'msgpack', None):
+            atomic_write_data(path, self.DATA, 'msgpack')
+
+        assert read_json(path) == self.DATA
+
+    def test_storage_switches_format_without_migration(self, tmp_path):
+        storage_file = str(tmp_path / 'daily_reports.json')
+        DailyReportStorage(storage_file).add_report({'sender': '张三'}, '2026-02-26')
+
+        storage = DailyReportStorage(storage_file, snapshot_format='compact')
+        assert storage.get_report_count('2026-02-26') == 1
+        storage.add_report({'sender': '李四'}, '2026-02-26')
+
+        assert DailyReportStorage(storage_file).get_report_count('2026-02-26') == 2
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+事件去重测试
+"""
+
+from unittest.mock import patch
+
+from utils import event_dedup
+from utils.event_dedup import EventDeduplicator
+
+
+class TestEventDeduplicator:
+    def test_repeat_delivery_is_dropped(self):
+        dedup = EventDeduplicator(storage_file=None)
+
+        assert dedup.is_duplicate('ev_1', 'om_1') is False
+        assert dedup.is_duplicate('ev_1', 'om_1') is True
+        # 重新推送时 event_id 可能变化，message_id 相同仍视为重复
+        assert dedup.is_duplicate('ev_2', 'om_1') is True
+        assert dedup.is_duplicate(None, '') is False
+
+    def test_entries_expire_and_are_bounded(self):
+        dedup = EventDeduplicator(storage_file=None, ttl=10, max_entries=3)
+        with patch('utils.event_dedup.time.time', return_value=1000):
+            for i in range(4):
+                dedup.is_duplicate(f'om_{i}')
+        assert len(dedup) == 3
+        with patch('utils.event_dedup.time.time', return_value=1000):
+            assert dedup.is_duplicate('om_0') is False
+
+        with patch('utils.event_dedup.time.time', return_value=1011):
+            assert dedup.is_duplicate('om_3') is False
+        assert len(dedup) == 1
+
+    def test_survives_restart(self, tmp_path):
+        storage_file = str(tmp_path / 'processed_events.json')
+        dedup = EventDeduplicator(storage_file, flush_interval=60)
+        dedup.is_duplicate('ev_1', 'om_1')
+        assert dedup.flush() is True
+
+        # 另一个进程写入的记录在合并时保留
+        other = EventDeduplicator(storage_file, flush_interval=60)
+        other.is_duplicate('om_2')
+        other.flush()
+
+        restarted = EventDeduplicator(storage_file)
+        assert restarted.is_duplicate('om_1') is True
+        assert restarted.is_duplicate('om_2') is True
+
+    def test_sees_events_recorded_by_other_worker(self, tmp_path):
+        storage_file = str(tmp_path / 'processed_events.json')
+        worker_a = EventDeduplicator(storage_file, flush_interval=60)
+        worker_b = EventDeduplicator(storage_file, flush_interval=60)
+
+        assert worker_a.is_duplicate('ev_1', 'om_1') is False
+        worker_a.flush()
+
+        # 重新投递落到另一个 worker：内存未命中时合并文件中的记录
+        assert worker_b.is_duplicate('ev_2', 'om_1') is True
+
+        with patch('utils.event_dedup.read_data', wraps=event_dedup.read_data) as mock_read:
+            # 文件未变化时不重复读取
+            assert worker_b.is_duplicate('om_2') is False
+            assert worker_b.is_duplicate('om_3') is False
+            mock_read.assert_not_called()
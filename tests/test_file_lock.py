@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跨进程文件锁测试
+同一进程内创建多个存储实例，模拟多个 worker 进程共享同一份数据文件
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+from utils.daily_report_storage import DailyReportStorage
+from utils.durable_file import read_json, update_json
+from utils.file_lock import fcntl, file_lock, file_version
+from utils.sharded_report_storage import ShardedReportStorage
+from utils.vacation_manager import VacationManager
+
+
+class TestFileLock:
+    @pytest.mark.skipif(fcntl is None, reason='需要 fcntl')
+    def test_lock_excludes_other_processes(self, tmp_path):
+        lock_path = str(tmp_path / 'data.json.lock')
+        probe = (
+            "import fcntl, sys\n"
+            "f = open(sys.argv[1], 'a')\n"
+            "try:\n"
+            "    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)\n"
+            "except BlockingIOError:\n"
+            "    sys.exit(1)\n"
+        )
+
+        with file_lock(lock_path):
+            assert subprocess.call([sys.executable, '-c', probe, lock_path]) == 1
+        assert subprocess.call([sys.executable, '-c', probe, lock_path]) == 0
+
+    def test_file_version_changes_on_rewrite(self, tmp_path):
+        path = str(tmp_path / 'data.json')
+        assert file_version(path) is None
+
+        update_json(path, lambda data: data.update(a=1), {})
+        first = file_version(path)
+        update_json(path, lambda data: data.update(b=2), {})
+
+        assert first is not None
+        assert file_version(path) != first
+        assert read_json(path) == {'a': 1, 'b': 2}
+
+
+class TestCrossProcessStores:
+    def test_report_writers_merge(self, tmp_path):
+        storage_file = str(tmp_path / 'daily_reports.json')
+        worker_a = DailyReportStorage(storage_file)
+        worker_b = DailyReportStorage(storage_file)
+
+        worker_a.add_report({'sender': '张三', 'message_id': 'om_1'}, '2026-02-26')
+        worker_b.add_report({'sender': '李四', 'message_id': 'om_2'}, '2026-02-26')
+
+        # 读取时发现文件已变化，自动重新加载
+        assert worker_a.get_report_count('2026-02-26') == 2
+        # 另一个进程收到的日报也能被撤回
+        assert worker_b.remove_report_by_message_id('om_1') is True
+
+        reloaded = DailyReportStorage(storage_file)
+        assert [r['sender'] for r in reloaded.get_all_reports('2026-02-26')] == ['李四']
+
+    def test_write_behind_replays_pending_changes(self, tmp_path):
+        storage_file = str(tmp_path / 'daily_reports.json')
+        worker_a = DailyReportStorage(storage_file, flush_interval=60)
+        worker_b = DailyReportStorage(storage_file)
+
+        worker_a.add_report({'sender': '张三'}, '2026-02-26')
+        worker_b.add_report({'sender': '李四'}, '2026-02-26')
+        assert worker_a.flush() is True
+
+        data = read_json(storage_file)
+        assert sorted(r['sender'] for r in data['2026-02-26']['reports']) == ['张三', '李四']
+
+    def test_sharded_writers_merge(self, tmp_path):
+        def make_storage():
+            return ShardedReportStorage(
+                str(tmp_path / 'reports'),
+                legacy_file=str(tmp_path / 'daily_reports.json')
+            )
+
+        worker_a = make_storage()
+        worker_b = make_storage()
+        worker_a.add_report({'sender': '张三'}, '2025-10-21')
+        worker_b.add_report({'sender': '李四'}, '2025-10-21')
+
+        assert make_storage().get_report_count('2025-10-21') == 2
+
+    def test_vacation_writers_merge(self, tmp_path):
+        storage_file = str(tmp_path / 'vacations.json')
+        worker_a = VacationManager(storage_file)
+        worker_b = VacationManager(storage_file)
+
+        worker_a.set_vacation('张三', '2026-02-26')
+        worker_b.set_vacation('李四', '2026-02-26')
+
+        assert worker_a.get_vacation_users('2026-02-26') == ['张三', '李四']
+        assert worker_a.cancel_vacation('李四', '2026-02-26') is True
+        assert worker_b.is_on_vacation('李四', '2026-02-26') is False
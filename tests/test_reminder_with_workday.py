@@ -6,6 +6,7 @@
 
 from unittest.mock import Mock, patch
 from utils.reminder_sender import ReminderSender
+from utils.vacation_manager import VacationManager
 
 
 class TestReminderWithWorkday:
@@ -13,37 +14,65 @@ class TestReminderWithWorkday:
 
     def test_skip_reminder_on_weekend(self):
         """测试周末跳过提醒"""
-        sender = ReminderSender('test_app_id', 'test_secret')
-
-        with patch('utils.reminder_sender.WorkdayCalendar') as mock_calendar:
-            mock_instance = Mock()
-            mock_instance.is_workday.return_value = False
-            mock_calendar.return_value = mock_instance
+        calendar = Mock()
+        calendar.is_workday.return_value = False
+        sender = ReminderSender('test_app_id', 'test_secret', workday_calendar=calendar)
 
-            result = sender.check_and_send_reminders(
-                chat_id='test_chat_id',
-                check_date='2026-02-08',
-                reports=[]
-            )
-            assert result == []
+        result = sender.check_and_send_reminders(
+            chat_id='test_chat_id',
+            check_date='2026-02-08',
+            reports=[]
+        )
+        assert result == []
+        calendar.is_workday.assert_called_once_with('2026-02-08')
 
     def test_send_reminder_on_workday(self):
         """测试工作日发送提醒"""
-        sender = ReminderSender('test_app_id', 'test_secret')
+        calendar = Mock()
+        calendar.is_workday.return_value = True
+        sender = ReminderSender('test_app_id', 'test_secret', workday_calendar=calendar)
+
+        with patch.object(sender, 'get_all_users', return_value={'u1': '张三', 'u2': '李四'}):
+            with patch.object(sender, 'send_reminder', return_value=True) as mock_send:
+                reports = [{'sender': '张三'}]
+                reminded = sender.check_and_send_reminders(
+                    chat_id='test_chat_id',
+                    check_date='2026-02-09',
+                    reports=reports
+                )
+
+                assert reminded == ['u2']
+                mock_send.assert_called_once()
 
-        with patch('utils.reminder_sender.WorkdayCalendar') as mock_calendar:
-            mock_instance = Mock()
-            mock_instance.is_workday.return_value = True
-            mock_calendar.return_value = mock_instance
-
-            with patch.object(sender, 'get_all_users', return_value={'u1': '张三', 'u2': '李四'}):
-                with patch.object(sender, 'send_reminder', return_value=True) as mock_send:
-                    reports = [{'sender': '张三'}]
-                    reminded = sender.check_and_send_reminders(
-                        chat_id='test_chat_id',
-                        check_date='2026-02-09',
-                        reports=reports
-                    )
-
-                    assert reminded == ['u2']
-                    mock_send.assert_called_once()
+    def test_skip_users_on_vacation(self, tmp_path):
+        """测试休假人员不被提醒"""
+        vacation_mgr = VacationManager(str(tmp_path / 'vacations.json'))
+        vacation_mgr.set_vacation('李四', '2026-02-09')
+        calendar = Mock()
+        calendar.is_workday.return_value = True
+        sender = ReminderSender('test_app_id', 'test_secret', vacation_mgr=vacation_mgr,
+                                workday_calendar=calendar)
+
+        with patch.object(sender, 'get_all_users', return_value={'u1': '张三', 'u2': '李四'}):
+            with patch.object(sender, 'send_reminder', return_value=True):
+                assert sender.check_and_send_reminders(
+                    chat_id='test_chat_id', check_date='2026-02-09', reports=[]
+                ) == ['u1']
+                assert sender.check_and_send_reminders(
+                    chat_id='test_chat_id', check_date='2026-02-10', reports=[]
+                ) == ['u1', 'u2']
+
+    def test_default_calendar_is_shared_instance(self):
+        """测试未注入日历时复用进程内共享实例"""
+        from utils.services import get_workday_calendar
+
+        sender = ReminderSender('test_app_id', 'test_secret')
+        with patch.object(get_workday_calendar(), 'is_workday', return_value=False) as mock_is_workday:
+            assert sender.check_and_send_reminders(
+                chat_id='test_chat_id', check_date='2026-02-08', reports=[]
+            ) == []
+            assert sender.check_and_send_reminders(
+                chat_id='test_chat_id', check_date='2026-02-09', reports=[]
+            ) == []
+        assert mock_is_workday.call_count == 2
+        assert sender.workday_calendar is get_workday_calendar()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日报历史归档测试
+"""
+
+import gzip
+import json
+from datetime import datetime, timedelta
+
+from utils.daily_report_storage import DailyReportStorage
+from utils.report_archive import ReportArchive
+from utils.sharded_report_storage import ShardedReportStorage
+
+
+def days_ago(days: int) -> str:
+    return (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+class TestReportArchive:
+    def test_write_and_load_gzip_jsonl(self, tmp_path):
+        archive = ReportArchive(str(tmp_path / 'archive'))
+        archive.write_days({
+            '2025-10-21': {'reports': [{'sender': '张三'}], 'sent': True},
+            '2025-11-03': {'reports': [{'sender': '李四'}], 'sent': False},
+        })
+
+        assert archive.list_months() == ['2025-10', '2025-11']
+        with gzip.open(tmp_path / 'archive' / '2025-10.jsonl.gz', 'rt', encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        assert lines == [{'date': '2025-10-21', 'reports': [{'sender': '张三'}], 'sent': True}]
+        assert archive.load_day('2025-11-03')['reports'] == [{'sender': '李四'}]
+        assert archive.load_day('2025-11-04') is None
+
+    def test_rewriting_a_day_merges_by_sender(self, tmp_path):
+        archive = ReportArchive(str(tmp_path / 'archive'))
+        archive.write_days({'2025-10-21': {'reports': [{'sender': '张三', 'v': 1}], 'sent': True}})
+        archive.write_days({'2025-10-21': {'reports': [{'sender': '张三', 'v': 2}, {'sender': '李四'}], 'sent': False}})
+
+        day = archive.load_day('2025-10-21')
+        assert day['reports'] == [{'sender': '张三', 'v': 2}, {'sender': '李四'}]
+        assert day['sent'] is True
+
+
+class TestStorageRetention:
+    def test_archives_old_days_and_keeps_them_readable(self, tmp_path):
+        storage_file = str(tmp_path / 'daily_reports.json')
+        storage = DailyReportStorage(storage_file, archive_dir=str(tmp_path / 'archive'))
+        old_date, recent_date = days_ago(40), days_ago(2)
+        storage.add_report({'sender': '张三', 'message_id': 'om_1'}, old_date)
+        storage.mark_as_sent(old_date)
+        storage.add_report({'sender': '李四'}, recent_date)
+
+        assert storage.archive_reports(30) == 1
+
+        # 在线文件只剩保留期内的日报
+        with open(storage_file, 'r', encoding='utf-8') as f:
+            assert list(json.load(f)) == [recent_date]
+        assert 'om_1' not in storage._message_index
+
+        # 查询仍能读到归档数据
+        assert [r['sender'] for r in storage.get_all_reports(old_date)] == ['张三']
+        assert storage.is_sent(old_date) is True
+        assert storage.count_by_date(old_date, recent_date) == {old_date: 1, recent_date: 1}
+        assert [r['sender'] for r in storage.iter_reports(old_date, recent_date)] == ['张三', '李四']
+        assert storage.archive_reports(30) == 0
+
+    def test_sender_history_includes_archive(self, tmp_path):
+        storage = DailyReportStorage(str(tmp_path / 'daily_reports.json'), archive_dir=str(tmp_path / 'archive'))
+        oldest, old_date, recent_date = days_ago(70), days_ago(40), days_ago(2)
+        storage.add_report({'sender': '张三', 'work_content': '最早'}, oldest)
+        storage.add_report({'sender': '张三', 'work_content': '归档', 'message_id': 'om_old'}, old_date)
+        storage.add_report({'sender': '李四'}, old_date)
+        storage.add_report({'sender': '张三', 'work_content': '在线'}, recent_date)
+        assert storage.archive_reports(30) == 2
+
+        assert storage.get_sender_dates('张三') == [oldest, old_date, recent_date]
+        assert storage.get_sender_dates('张三', start=days_ago(50)) == [old_date, recent_date]
+        assert storage.get_sender_dates('李四', end=days_ago(10)) == [old_date]
+        assert [r.work_content for r in storage.get_user_history('张三', 2)] == ['在线', '归档']
+
+        # 归档日期有在线数据时以在线数据为准
+        storage.add_report({'sender': '王五'}, old_date)
+        assert storage.remove_report_by_message_id('om_old') is True
+        assert storage.get_sender_dates('张三') == [oldest, recent_date]
+        assert storage.get_sender_dates('王五') == [old_date]
+
+    def test_journal_mode_compacts_after_archiving(self, tmp_path):
+        storage_file = str(tmp_path / 'daily_reports.json')
+        storage = DailyReportStorage(storage_file, journal=True, archive_dir=str(tmp_path / 'archive'))
+        storage.add_report({'sender': '张三'}, days_ago(40))
+
+        assert storage.archive_reports(30) == 1
+        reloaded = DailyReportStorage(storage_file, journal=True, archive_dir=str(tmp_path / 'archive'))
+        assert reloaded.reports_by_date == {}
+        assert reloaded.get_report_count(days_ago(40)) == 1
+
+    def test_sharded_archives_unloaded_months(self, tmp_path):
+        def make_storage():
+            return ShardedReportStorage(
+                str(tmp_path / 'reports'),
+                legacy_file=str(tmp_path / 'daily_reports.json'),
+                archive_dir=str(tmp_path / 'archive')
+            )
+
+        make_storage().add_report({'sender': '张三'}, '2025-01-10')
+
+        storage = make_storage()
+        assert '2025-01-10' not in storage.reports_by_date
+        assert storage.archive_reports(30) == 1
+
+        with open(tmp_path / 'reports' / '2025-01.json', encoding='utf-8') as f:
+            assert json.load(f) == {}
+        assert make_storage().get_report_count('2025-01-10') == 1
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+历史日报补录测试（使用本地模拟的飞书接口）
+"""
+
+import json
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from threading import Thread
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from utils.daily_report import DailyReport
+from utils.daily_report_storage import DailyReportStorage
+from utils.report_backfill import FeishuMessageSource, ReportBackfiller, iter_export_file
+from utils.sqlite_report_storage import SQLiteReportStorage
+
+REPORT_TEXT = "跟踪问题：TSTAS-431\n今天工作内容：{content}\nBlock点：无\n下一个工作日计划：TSTAS-437"
+
+
+def _ms(value: str) -> str:
+    return str(int(datetime.strptime(value, '%Y-%m-%d %H:%M').timestamp() * 1000))
+
+
+def _message(message_id, sender_id, sent_at, text, msg_type='text'):
+    if msg_type == 'text':
+        content = {'text': text}
+    else:
+        content = {'title': '', 'content': [[{'tag': 'text', 'text': line}] for line in text.split('\n')]}
+    return {
+        'message_id': message_id,
+        'msg_type': msg_type,
+        'create_time': _ms(sent_at),
+        'deleted': False,
+        'sender': {'id': sender_id, 'id_type': 'open_id', 'sender_type': 'user'},
+        'body': {'content': json.dumps(content, ensure_ascii=False)},
+    }
+
+
+MESSAGES = [
+    _message('om_1', 'ou_zhang', '2026-02-24 18:00', REPORT_TEXT.format(content='旧内容')),
+    _message('om_2', 'ou_li', '2026-02-24 18:30', REPORT_TEXT.format(content='李四的日报'), msg_type='post'),
+    _message('om_3', 'ou_li', '2026-02-24 19:00', '大家辛苦了'),
+    _message('om_4', 'ou_zhang', '2026-02-24 20:00', REPORT_TEXT.format(content='新内容')),
+    _message('om_5', 'ou_zhang', '2026-02-25 18:00', REPORT_TEXT.format(content='第二天')),
+]
+
+USERS = {
+    'ou_zhang': {'open_id': 'ou_zhang', 'user_id': 'u_zhang', 'name': 'Zhang San'},
+    'ou_li': {'open_id': 'ou_li', 'user_id': 'u_li', 'name': '李四'},
+}
+
+
+class FakeFeishuHandler(BaseHTTPRequestHandler):
+    page_size = 2
+    requests = []
+    token_requests = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        FakeFeishuHandler.token_requests += 1
+        self._reply({'code': 0, 'tenant_access_token': 't-test', 'expire': 7200})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self.requests.append((url.path, query, self.headers.get('Authorization')))
+        if url.path.startswith('/open-apis/contact/v3/users/'):
+            user = USERS.get(url.path.rsplit('/', 1)[-1])
+            if user is None or query.get('user_id_type') != ['open_id']:
+                self._reply({'code': 41050, 'msg': 'no user authority error'})
+            else:
+                self._reply({'code': 0, 'data': {'user': user}})
+            return
+        start = int(query.get('page_token', ['0'])[0])
+        items = MESSAGES[start:start + self.page_size]
+        has_more = start + self.page_size < len(MESSAGES)
+        self._reply({'code': 0, 'data': {
+            'items': items,
+            'has_more': has_more,
+            'page_token': str(start + self.page_size) if has_more else '',
+        }})
+
+    def _reply(self, body):
+        content = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_api():
+    FakeFeishuHandler.requests = []
+    FakeFeishuHandler.token_requests = 0
+    server = HTTPServer(('127.0.0.1', 0), FakeFeishuHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestReportBackfill:
+    def test_backfill_from_api_pages(self, tmp_path, fake_api):
+        storage = DailyReportStorage(str(tmp_path / 'daily_reports.json'))
+        source = FeishuMessageSource('app', 'secret', 'oc_test', page_size=2, base_url=fake_api)
+        backfiller = ReportBackfiller(storage, user_names={'ou_zhang': '张三', 'ou_li': '李四'})
+
+        stats = backfiller.run(source)
+
+        assert stats == {'messages': 5, 'reports': 3, 'skipped': 0}
+        assert len(FakeFeishuHandler.requests) == 3
+        assert all(auth == 'Bearer t-test' for _, _, auth in FakeFeishuHandler.requests)
+        assert FakeFeishuHandler.requests[1][1]['page_token'] == ['2']
+
+        zhang = storage.get_report_by_sender('张三', '2026-02-24')
+        assert '新内容' in zhang.work_content
+        assert zhang.timestamp == '2026-02-24 20:00:00'
+        assert zhang.message_id == 'om_4'
+        assert '李四的日报' in storage.get_report_by_sender('李四', '2026-02-24').work_content
+        assert storage.get_sender_dates('张三') == ['2026-02-24', '2026-02-25']
+
+    def test_rerun_skips_existing_and_writes_once_per_batch(self, tmp_path, monkeypatch):
+        export = tmp_path / 'messages.json'
+        export.write_text(json.dumps({'data': {'items': MESSAGES}}, ensure_ascii=False), encoding='utf-8')
+        storage = DailyReportStorage(str(tmp_path / 'daily_reports.json'))
+
+        saves = []
+        original_save = storage._save_reports
+        monkeypatch.setattr(storage, '_save_reports', lambda: (saves.append(1), original_save()))
+
+        assert ReportBackfiller(storage).run(iter_export_file(str(export)))['reports'] == 3
+        assert len(saves) == 1
+
+        stats = ReportBackfiller(storage).run(iter_export_file(str(export)))
+        assert stats['reports'] == 0
+        assert stats['skipped'] == 3
+        assert len(saves) == 1
+
+    def test_open_id_senders_resolved_via_user_id(self, tmp_path, fake_api):
+        storage = DailyReportStorage(str(tmp_path / 'daily_reports.json'))
+        source = FeishuMessageSource('app', 'secret', 'oc_test', page_size=2, base_url=fake_api)
+        # 姓名映射按 user_id 记录，映射里没有的人用通讯录姓名
+        backfiller = ReportBackfiller(storage, user_names={'u_zhang': '张三'}, user_lookup=source.get_user)
+
+        assert backfiller.run(source)['reports'] == 3
+
+        assert storage.get_sender_dates('张三') == ['2026-02-24', '2026-02-25']
+        assert storage.get_report_by_sender('李四', '2026-02-24') is not None
+        lookups = [path for path, _, _ in FakeFeishuHandler.requests if path.startswith('/open-apis/contact/')]
+        assert sorted(lookups) == ['/open-apis/contact/v3/users/ou_li', '/open-apis/contact/v3/users/ou_zhang']
+        assert FakeFeishuHandler.token_requests == 1
+
+    def test_failed_user_lookup_falls_back_to_id(self, tmp_path, fake_api):
+        source = FeishuMessageSource('app', 'secret', 'oc_test', base_url=fake_api)
+        backfiller = ReportBackfiller(DailyReportStorage(str(tmp_path / 'daily_reports.json')),
+                                      user_lookup=source.get_user)
+
+        assert backfiller._sender_name({'id': 'ou_unknown', 'id_type': 'open_id'}) == '用户_nknown'
+        assert backfiller._sender_name({'id': 'ou_unknown', 'id_type': 'open_id'}) == '用户_nknown'
+        assert len(FakeFeishuHandler.requests) == 1
+
+    @pytest.mark.parametrize('storage_cls, filename', [
+        (DailyReportStorage, 'daily_reports.json'),
+        (SQLiteReportStorage, 'daily_reports.db'),
+    ])
+    def test_add_reports_keeps_newer_live_report(self, tmp_path, storage_cls, filename):
+        storage = storage_cls(str(tmp_path / filename))
+        storage.add_report({'sender': '张三', 'work_content': '实时收到'}, '2026-02-24')
+
+        old = DailyReport(sender='张三', work_content='补录', date='2026-02-24', timestamp='2026-02-24 18:00:00')
+        new = DailyReport(sender='李四', work_content='补录', date='2026-02-24', timestamp='2026-02-24 18:30:00')
+        assert storage.add_reports([old, new]) == 1
+
+        assert storage.get_report_by_sender('张三', '2026-02-24').work_content == '实时收到'
+        assert storage.get_report_by_sender('李四', '2026-02-24').work_content == '补录'
+
+    def test_jsonl_export(self, tmp_path):
+        export = tmp_path / 'messages.jsonl'
+        export.write_text('\n'.join(json.dumps(m, ensure_ascii=False) for m in MESSAGES[:2]), encoding='utf-8')
+
+        assert [m['message_id'] for m in iter_export_file(str(export))] == ['om_1', 'om_2']
+
+    def test_backfill_into_archived_month(self, tmp_path):
+        export = tmp_path / 'messages.json'
+        export.write_text(json.dumps({'data': {'items': MESSAGES}}, ensure_ascii=False), encoding='utf-8')
+        storage_file = str(tmp_path / 'daily_reports.json')
+        archive_dir = str(tmp_path / 'archive')
+        storage = DailyReportStorage(storage_file, archive_dir=archive_dir)
+        storage.add_report({'sender': '王五', 'work_content': '已归档'}, '2026-02-24')
+        assert storage.archive_reports(30) == 1
+
+        stats = ReportBackfiller(storage, user_names={'ou_zhang': '张三', 'ou_li': '李四'}).run(
+            iter_export_file(str(export)))
+        assert stats['reports'] == 3
+
+        # 补录的日报和同一天已归档的日报都能读到
+        for reader in (storage, DailyReportStorage(storage_file, archive_dir=archive_dir)):
+            senders = [report.sender for report in reader.get_all_reports('2026-02-24')]
+            assert sorted(senders) == ['张三', '李四', '王五']
+            assert reader.get_report_by_sender('王五', '2026-02-24').work_content == '已归档'
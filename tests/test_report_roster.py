@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日报应提交名单测试
+"""
+
+import json
+
+import utils.report_roster as report_roster
+from utils.report_roster import ReportRoster, load_roster, normalize_name
+from utils.reminder_sender import ReminderSender
+from utils.vacation_manager import VacationManager
+
+
+def _write_user_names(path, whitelist=None):
+    data = {
+        '映射': {'u1': '张三', 'u2': '李四', 'u3': '王五（领导）'},
+    }
+    if whitelist is not None:
+        data['日报白名单'] = whitelist
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+
+
+class TestLoadRoster:
+    def test_whitelist_then_required_users(self, tmp_path):
+        user_names = tmp_path / 'user_names.json'
+        _write_user_names(user_names, whitelist=['u1', 'u3'])
+        assert load_roster(str(user_names), ['u2']) == {'u1': '张三', 'u3': '王五'}
+
+        _write_user_names(user_names)
+        assert load_roster(str(user_names), ['u2']) == {'u2': '李四'}
+        assert load_roster(str(user_names)) == {'u1': '张三', 'u2': '李四', 'u3': '王五'}
+        assert load_roster(str(tmp_path / 'missing.json')) == {}
+        # 没有明确配置名单时可以不回退到全部映射
+        assert load_roster(str(user_names), include_all=False) == {}
+
+    def test_leader_mark_normalized_on_both_sides(self, tmp_path):
+        user_names = tmp_path / 'user_names.json'
+        _write_user_names(user_names, whitelist=['u1', 'u3'])
+        roster = load_roster(str(user_names))
+        assert normalize_name('王五（领导）') == '王五'
+
+        # 日报发送者带“（领导）”标记，与名单比较时同样去除
+        sender = ReminderSender('test_app_id', 'test_secret')
+        submitted = sender.get_submitted_users([{'sender': '王五（领导）'}])
+        missing = sender.find_missing_users(roster, submitted)
+        assert [name for _, name in missing] == ['张三']
+
+
+class TestReportRoster:
+    def test_expected_users_exclude_vacations(self, tmp_path):
+        user_names = tmp_path / 'user_names.json'
+        _write_user_names(user_names)
+        vacation_mgr = VacationManager(str(tmp_path / 'vacations.json'))
+        roster = ReportRoster(vacation_mgr, str(user_names), required_users=['u1', 'u2', 'u3'])
+
+        assert roster.get_expected_users('2026-03-02') == ('张三', '李四', '王五')
+
+        vacation_mgr.set_vacations(['李四', '王五'], '2026-03-02')
+        assert roster.get_expected_users('2026-03-02') == ('张三',)
+        assert roster.get_expected_count('2026-03-03') == 3
+
+        vacation_mgr.cancel_vacation('王五', '2026-03-02')
+        assert roster.get_expected_count('2026-03-02') == 2
+
+    def test_cache_reused_until_data_changes(self, tmp_path, monkeypatch):
+        user_names = tmp_path / 'user_names.json'
+        _write_user_names(user_names, whitelist=['u1', 'u2', 'u3'])
+        vacation_mgr = VacationManager(str(tmp_path / 'vacations.json'))
+        roster = ReportRoster(vacation_mgr, str(user_names))
+
+        loads = []
+        original_load = report_roster.load_roster
+        monkeypatch.setattr(report_roster, 'load_roster',
+                            lambda *args, **kwargs: (loads.append(1), original_load(*args, **kwargs))[1])
+
+        roster.get_expected_users('2026-03-02')
+        roster.get_expected_users('2026-03-02')
+        assert len(loads) == 1
+
+        vacation_mgr.set_vacation('张三', '2026-03-02')
+        assert roster.get_expected_users('2026-03-02') == ('李四', '王五')
+        assert len(loads) == 2
+
+        _write_user_names(user_names, whitelist=['u1', 'u2'])
+        assert roster.get_expected_users('2026-03-02') == ('李四',)
+
+    def test_empty_roster_uses_default(self, tmp_path):
+        roster = ReportRoster(VacationManager(str(tmp_path / 'vacations.json')), str(tmp_path / 'missing.json'))
+        assert roster.get_expected_users('2026-03-02') == ()
+        assert roster.get_expected_count('2026-03-02', default=5) == 5
+
+    def test_without_explicit_roster_uses_default(self, tmp_path):
+        # 映射里有领导等不需要提交的人，没有白名单和必需用户时不按映射计数
+        user_names = tmp_path / 'user_names.json'
+        _write_user_names(user_names)
+        roster = ReportRoster(VacationManager(str(tmp_path / 'vacations.json')), str(user_names))
+        assert roster.get_expected_users('2026-03-02') == ()
+        assert roster.get_expected_count('2026-03-02', default=5) == 5
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享服务注册测试
+"""
+
+from utils.command_handler import CommandHandler
+from utils.reminder_sender import ReminderSender
+from utils.services import get_report_storage, get_vacation_manager, reset_services
+
+
+class TestServices:
+    def test_returns_single_instance(self):
+        assert get_report_storage() is get_report_storage()
+        assert get_vacation_manager() is get_vacation_manager()
+
+    def test_reset_creates_new_instance(self):
+        storage = get_report_storage()
+        reset_services()
+        assert get_report_storage() is not storage
+
+    def test_command_handlers_share_stores(self):
+        first = CommandHandler('test_id', 'test_secret')
+        second = CommandHandler('test_id', 'test_secret')
+
+        assert first.report_storage is second.report_storage
+        assert first.vacation_mgr is second.vacation_mgr
+        assert first.report_storage is get_report_storage()
+
+    def test_injected_stores_take_precedence(self):
+        storage = object()
+        sender = ReminderSender('test_app_id', 'test_secret', report_storage=storage)
+        assert sender.report_storage is storage
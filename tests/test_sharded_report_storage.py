@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按月分片日报存储测试
+"""
+
+import json
+import os
+from datetime import datetime
+
+from utils.sharded_report_storage import ShardedReportStorage
+
+
+class TestShardedReportStorage:
+    def _make_storage(self, tmp_path, **kwargs):
+        return ShardedReportStorage(
+            str(tmp_path / 'reports'),
+            legacy_file=str(tmp_path / 'daily_reports.json'),
+            **kwargs
+        )
+
+    def test_writes_only_the_changed_month(self, tmp_path):
+        storage = self._make_storage(tmp_path)
+        storage.add_report({'sender': '张三'}, '2025-10-21')
+        storage.add_report({'sender': '李四'}, '2025-11-03')
+
+        with open(tmp_path / 'reports' / '2025-10.json', encoding='utf-8') as f:
+            october = json.load(f)
+        assert list(october) == ['2025-10-21']
+        assert os.path.exists(tmp_path / 'reports' / '2025-11.json')
+
+    def test_cold_months_load_lazily(self, tmp_path):
+        storage = self._make_storage(tmp_path)
+        storage.add_report({'sender': '张三'}, '2025-10-21')
+        today = datetime.now().strftime('%Y-%m-%d')
+        storage.add_report({'sender': '李四'}, today)
+
+        reloaded = self._make_storage(tmp_path)
+        assert today in reloaded.reports_by_date
+        assert '2025-10-21' not in reloaded.reports_by_date
+
+        assert reloaded.get_report_count('2025-10-21') == 1
+        assert '2025-10-21' in reloaded.reports_by_date
+
+    def test_lru_evicts_cold_months(self, tmp_path):
+        storage = self._make_storage(tmp_path, cache_size=1)
+        storage.add_report({'sender': '张三'}, '2025-01-10')
+        storage.add_report({'sender': '李四'}, '2025-02-10')
+
+        reloaded = self._make_storage(tmp_path, cache_size=1)
+        assert reloaded.get_report_count('2025-01-10') == 1
+        assert reloaded.get_report_count('2025-02-10') == 1
+        assert '2025-01-10' not in reloaded.reports_by_date
+        assert '2025-01-10' not in reloaded._snapshots
+        assert reloaded.get_sender_dates('张三') == []
+        # 被淘汰的月份再次查询时重新加载
+        assert reloaded.get_report_count('2025-01-10') == 1
+
+    def test_range_query_loads_cold_months(self, tmp_path):
+        storage = self._make_storage(tmp_path, cache_size=1)
+        for date in ('2025-01-10', '2025-02-10', '2025-03-10'):
+            storage.add_report({'sender': '张三'}, date)
+
+        reloaded = self._make_storage(tmp_path, cache_size=1)
+        reports = list(reloaded.iter_reports('2025-01-01', '2025-03-31'))
+        assert [r['date'] for r in reports] == ['2025-01-10', '2025-02-10', '2025-03-10']
+        assert reloaded.count_by_date('2025-02-01', '2025-02-28') == {'2025-02-10': 1}
+
+    def test_migrates_legacy_single_file(self, tmp_path):
+        legacy = tmp_path / 'daily_reports.json'
+        legacy.write_text(json.dumps({
+            '2025-10-21': {'reports': [{'sender': '张三'}], 'sent': True},
+            '2025-11-03': {'reports': [{'sender': '李四'}], 'sent': False},
+        }, ensure_ascii=False), encoding='utf-8')
+
+        storage = self._make_storage(tmp_path)
+        assert sorted(os.listdir(tmp_path / 'reports')) == ['2025-10.json', '2025-11.json']
+        assert storage.is_sent('2025-10-21') is True
+        assert storage.get_report_count('2025-11-03') == 1
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite 日报存储测试
+"""
+
+import json
+
+from utils.sqlite_report_storage import SQLiteReportStorage, migrate_json_to_sqlite
+
+
+class TestSQLiteReportStorage:
+    def setup_method(self):
+        self.storage = None
+
+    def teardown_method(self):
+        if self.storage is not None:
+            self.storage.close()
+
+    def test_add_dedup_keeps_order(self, tmp_path):
+        self.storage = SQLiteReportStorage(str(tmp_path / 'reports.db'))
+        self.storage.add_report({'sender': '张三', 'work_content': 'A'}, '2026-02-26')
+        self.storage.add_report({'sender': '李四', 'work_content': 'B'}, '2026-02-26')
+        self.storage.add_report({'sender': '张三', 'work_content': 'C'}, '2026-02-26')
+
+        reports = self.storage.get_all_reports('2026-02-26')
+        assert [r['sender'] for r in reports] == ['张三', '李四']
+        assert reports[0]['work_content'] == 'C'
+        assert self.storage.get_report_count('2026-02-26') == 2
+
+    def test_sent_and_remove(self, tmp_path):
+        self.storage = SQLiteReportStorage(str(tmp_path / 'reports.db'))
+        self.storage.add_report({'sender': '张三', 'message_id': 'om_1'}, '2026-02-26')
+
+        assert self.storage.is_sent('2026-02-26') is False
+        assert self.storage.mark_as_sent('2026-02-26') is True
+        assert self.storage.is_sent('2026-02-26') is True
+
+        assert self.storage.remove_report_by_message_id('om_1') is True
+        assert self.storage.remove_report_by_message_id('om_1') is False
+        assert self.storage.get_report_count('2026-02-26') == 0
+
+    def test_range_queries(self, tmp_path):
+        self.storage = SQLiteReportStorage(str(tmp_path / 'reports.db'))
+        for date in ('2026-01-30', '2026-02-02', '2026-02-03', '2026-03-01'):
+            self.storage.add_report({'sender': '张三'}, date)
+            self.storage.add_report({'sender': '李四'}, date)
+
+        reports = list(self.storage.iter_reports('2026-02-01', '2026-02-28', page_size=3))
+        assert [(r['date'], r['sender']) for r in reports] == [
+            ('2026-02-02', '张三'), ('2026-02-02', '李四'),
+            ('2026-02-03', '张三'), ('2026-02-03', '李四'),
+        ]
+        assert [r['date'] for r in self.storage.iter_reports('2026-01-01', '2026-12-31', sender='李四')] == [
+            '2026-01-30', '2026-02-02', '2026-02-03', '2026-03-01'
+        ]
+        assert self.storage.count_by_date('2026-02-01', '2026-03-01') == {
+            '2026-02-02': 2, '2026-02-03': 2, '2026-03-01': 2
+        }
+
+    def test_sender_queries(self, tmp_path):
+        self.storage = SQLiteReportStorage(str(tmp_path / 'reports.db'))
+        for date in ('2026-02-03', '2026-02-01', '2026-02-02'):
+            self.storage.add_report({'sender': '张三', 'work_content': date}, date)
+        self.storage.add_report({'sender': '李四'}, '2026-02-02')
+
+        assert self.storage.get_sender_dates('张三', end='2026-02-02') == ['2026-02-01', '2026-02-02']
+        assert self.storage.get_report_by_sender('李四', '2026-02-02')['sender'] == '李四'
+        assert self.storage.get_report_by_sender('李四', '2026-02-03') is None
+        assert [r['date'] for r in self.storage.get_user_history('张三', limit=2)] == ['2026-02-03', '2026-02-02']
+
+    def test_shared_between_connections(self, tmp_path):
+        db_file = str(tmp_path / 'reports.db')
+        self.storage = SQLiteReportStorage(db_file)
+        other = SQLiteReportStorage(db_file)
+        try:
+            other.add_report({'sender': '张三'}, '2026-02-26')
+            assert self.storage.get_report_count('2026-02-26') == 1
+        finally:
+            other.close()
+
+    def test_migrate_from_json(self, tmp_path):
+        json_file = tmp_path / 'daily_reports.json'
+        json_file.write_text(json.dumps({
+            '2026-02-25': {'reports': [{'sender': '张三', 'message_id': 'om_1'}], 'sent': True},
+            '2026-02-26': {'reports': [{'sender': '李四'}, {'sender': '王五'}], 'sent': False},
+        }, ensure_ascii=False), encoding='utf-8')
+        db_file = str(tmp_path / 'reports.db')
+
+        assert migrate_json_to_sqlite(str(json_file), db_file) == 3
+
+        self.storage = SQLiteReportStorage(db_file)
+        assert self.storage.is_sent('2026-02-25') is True
+        assert self.storage.get_report_count('2026-02-26') == 2
+        assert self.storage.remove_report_by_message_id('om_1') is True
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+休假管理器测试
+"""
+
+import json
+
+import pytest
+
+from utils.interval_index import IntervalIndex
+from utils.vacation_manager import VacationManager, parse_weekdays
+
+
+class TestIntervalIndex:
+    def test_stab_returns_covering_intervals(self):
+        index = IntervalIndex([
+            ('2026-03-01', '2026-03-08', 'a'),
+            ('2026-03-05', '2026-03-06', 'b'),
+            ('2026-03-07', None, 'c'),
+        ])
+
+        assert index.stab('2026-02-28') == ()
+        assert index.stab('2026-03-01') == ('a',)
+        assert index.stab('2026-03-05') == ('a', 'b')
+        assert index.stab('2026-03-06') == ('a',)
+        assert index.stab('2026-03-07') == ('a', 'c')
+        assert index.stab('2030-01-01') == ('c',)
+
+
+class TestVacationManager:
+    def test_range_and_single_day(self, tmp_path):
+        manager = VacationManager(str(tmp_path / 'vacations.json'))
+        assert manager.set_vacation('张三', '2026-03-01', end_date='2026-03-07') is True
+        manager.set_vacation('李四', '2026-03-03')
+
+        assert manager.get_vacation_users('2026-03-03') == ['李四', '张三']
+        assert manager.is_on_vacation('张三', '2026-03-07') is True
+        assert manager.is_on_vacation('张三', '2026-03-08') is False
+        assert manager.set_vacation('张三', '2026-03-07', end_date='2026-03-01') is False
+
+    def test_recurring_weekdays(self, tmp_path):
+        manager = VacationManager(str(tmp_path / 'vacations.json'))
+        # 2026-03-06 是周五
+        manager.set_vacation('王五', '2026-03-01', weekdays=parse_weekdays('每周五'))
+
+        assert manager.is_on_vacation('王五', '2026-03-06') is True
+        assert manager.is_on_vacation('王五', '2026-03-05') is False
+        assert manager.is_on_vacation('王五', '2027-01-01') is True
+        assert manager.is_on_vacation('王五', '2026-02-27') is False
+
+        assert manager.cancel_vacation('王五', weekdays=[4]) is True
+        assert manager.get_vacation_ranges() == []
+
+    def test_cancel_splits_range(self, tmp_path):
+        manager = VacationManager(str(tmp_path / 'vacations.json'))
+        manager.set_vacation('张三', '2026-03-01', end_date='2026-03-07')
+
+        assert manager.cancel_vacation('张三', '2026-03-03', end_date='2026-03-04') is True
+        assert [(r['start'], r['end']) for r in manager.get_vacation_ranges()] == [
+            ('2026-03-01', '2026-03-02'), ('2026-03-05', '2026-03-07')
+        ]
+        assert manager.is_on_vacation('张三', '2026-03-03') is False
+        assert manager.cancel_vacation('张三', '2026-03-03') is False
+
+    def test_cancel_span_without_weekly_day_keeps_range(self, tmp_path):
+        manager = VacationManager(str(tmp_path / 'vacations.json'))
+        manager.set_vacation('张三', '2026-03-01', weekdays=parse_weekdays('每周一'))
+
+        # 2026-03-03 ~ 03-05 是周二到周四，不包含周一
+        assert manager.cancel_vacation('张三', '2026-03-03', end_date='2026-03-05') is False
+        assert manager.get_vacation_ranges() == [
+            {'name': '张三', 'start': '2026-03-01', 'end': None, 'weekdays': [0]}
+        ]
+
+        assert manager.cancel_vacation('张三', '2026-03-09') is True
+        assert manager.is_on_vacation('张三', '2026-03-09') is False
+        assert manager.is_on_vacation('张三', '2026-03-16') is True
+
+    def test_invalid_dates_rejected_before_changing_state(self, tmp_path):
+        storage_file = tmp_path / 'vacations.json'
+        manager = VacationManager(str(storage_file))
+
+        assert manager.set_vacation('张三', '2026-13-45') is False
+        assert manager.set_vacation('张三', '2026-03-01', end_date='2026-02-30') is False
+        assert manager.cancel_vacation('张三', '2026-13-45') is False
+        assert manager.get_all_vacations() == {}
+
+        # 之后的设置照常写盘
+        assert manager.set_vacation('李四', '2026-03-02') is True
+        assert json.loads(storage_file.read_text(encoding='utf-8')) == {'2026-03-02': ['李四']}
+
+        assert manager.is_on_vacation('李四', '2026-13-45') is False
+        assert manager.get_vacation_users('2026-13-45') == []
+        assert manager.get_user_vacation_dates('李四', '2026-13-01', '2026-13-31') == []
+
+    def test_bad_keys_in_file_are_skipped(self, tmp_path):
+        storage_file = tmp_path / 'vacations.json'
+        storage_file.write_text(json.dumps({
+            '2026-13-45': ['张三'],
+            '2026-03-02': ['李四'],
+            '_ranges': [{'name': '王五', 'start': 'bad', 'end': None}],
+        }, ensure_ascii=False), encoding='utf-8')
+
+        manager = VacationManager(str(storage_file))
+        assert manager.get_vacation_users('2026-03-02') == ['李四']
+        assert manager.get_vacation_ranges() == []
+        assert manager.set_vacation('张三', '2026-03-03') is True
+
+    def test_file_format_stays_compatible(self, tmp_path):
+        storage_file = tmp_path / 'vacations.json'
+        storage_file.write_text(json.dumps({'2026-02-26': ['张三']}, ensure_ascii=False), encoding='utf-8')
+
+        manager = VacationManager(str(storage_file))
+        assert manager.get_vacation_users('2026-02-26') == ['张三']
+        manager.set_vacation('李四', '2026-03-01', end_date='2026-03-02')
+
+        saved = json.loads(storage_file.read_text(encoding='utf-8'))
+        assert saved['2026-02-26'] == ['张三']
+        assert saved['_ranges'] == [{'name': '李四', 'start': '2026-03-01', 'end': '2026-03-02'}]
+        assert VacationManager(str(storage_file)).is_on_vacation('李四', '2026-03-02') is True
+
+    def test_user_vacation_dates_in_month(self, tmp_path):
+        manager = VacationManager(str(tmp_path / 'vacations.json'))
+        manager.set_vacation('张三', '2026-02-27')
+        manager.set_vacation('张三', '2026-03-02', end_date='2026-03-03')
+        manager.set_vacation('张三', '2026-03-01', weekdays=[4])
+        manager.set_vacation('李四', '2026-03-04')
+
+        assert manager.get_user_vacation_dates('张三', '2026-03-01', '2026-03-31') == [
+            '2026-03-02', '2026-03-03', '2026-03-06', '2026-03-13', '2026-03-20', '2026-03-27',
+        ]
+        assert manager.get_user_vacation_dates('李四', '2026-03-01', '2026-03-31') == ['2026-03-04']
+        assert manager.get_user_vacation_dates('王五', '2026-03-01', '2026-03-31') == []
+
+        manager.cancel_vacation('张三', '2026-02-27')
+        assert manager.get_user_vacation_dates('张三', '2026-02-01', '2026-02-28') == []
+
+    def test_readers_get_independent_copies(self, tmp_path):
+        manager = VacationManager(str(tmp_path / 'vacations.json'))
+        manager.set_vacation('张三', '2026-02-26')
+        manager.set_vacation('张三', '2026-03-01', end_date='2026-03-02')
+
+        vacations = manager.get_all_vacations()
+        vacations['2026-02-26'].append('李四')
+        manager.get_vacation_ranges()[0]['end'] = '2026-12-31'
+
+        assert manager.get_all_vacations() == {'2026-02-26': ['张三']}
+        assert manager.is_on_vacation('李四', '2026-02-26') is False
+        assert manager.is_on_vacation('张三', '2026-03-05') is False
+
+    def test_snapshot_is_read_only(self, tmp_path):
+        manager = VacationManager(str(tmp_path / 'vacations.json'))
+        manager.set_vacation('张三', '2026-02-26')
+        snapshot = manager._snapshot
+
+        manager.set_vacation('李四', '2026-02-26')
+
+        assert snapshot.days['2026-02-26'] == ('张三',)
+        assert manager._snapshot.days['2026-02-26'] == ('张三', '李四')
+        with pytest.raises(TypeError):
+            snapshot.days['2026-02-27'] = ('王五',)
+
+    def test_batch_set_and_cancel_write_once(self, tmp_path, monkeypatch):
+        manager = VacationManager(str(tmp_path / 'vacations.json'))
+        manager.set_vacation('王五', '2026-03-02')
+
+        saves = []
+        original_save = manager._save_vacations
+        monkeypatch.setattr(manager, '_save_vacations', lambda: (saves.append(1), original_save()))
+
+        assert manager.set_vacations(['张三', '李四', '王五', '张三'], '2026-03-02') == ['张三', '李四']
+        assert len(saves) == 1
+        assert manager.get_vacation_users('2026-03-02') == ['王五', '张三', '李四']
+
+        assert manager.set_vacations(['张三', '李四'], '2026-03-02', end_date='2026-03-01') is None
+        assert manager.set_vacations(['张三'], '2026-03-02') == []
+        assert len(saves) == 1
+
+        assert manager.cancel_vacations(['张三', '赵六', '王五'], '2026-03-02') == ['张三', '王五']
+        assert len(saves) == 2
+        assert VacationManager(str(tmp_path / 'vacations.json')).get_vacation_users('2026-03-02') == ['李四']
@@ -7,8 +7,12 @@
 import pytest
 import os
 import json
+import time
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from threading import Event, Thread
 from unittest.mock import patch, mock_open, MagicMock
+from utils import workday_calendar
 from utils.workday_calendar import WorkdayCalendar
 
 
@@ -22,6 +26,7 @@ class TestWorkdayCalendar:
     
     def teardown_method(self):
         """每个测试后的清理"""
+        self.calendar.wait_for_refresh()
         if os.path.exists(self.test_cache_file):
             os.remove(self.test_cache_file)
     
@@ -216,7 +221,7 @@ class TestWorkdayCalendarWithMocks:
     
     def test_year_boundary_cases(self):
         """测试年份边界情况"""
-        calendar = WorkdayCalendar(cache_file=self.test_cache_file)
+        calendar = WorkdayCalendar(cache_file=self.test_cache_file, cache_ttl=None)
 
         # 注入跨年测试数据，避免依赖外部API与实时节假日数据
         calendar.holidays_data['2026'] = {
@@ -277,6 +282,397 @@ class TestWorkdayCalendarWithMocks:
         assert '2026-01-01' in calendar2.holidays_data['2026']
 
 
+class TestWorkdayArithmetic:
+    """工作日位图和前缀和：下一个/上一个工作日、区间工作日数"""
+
+    def setup_method(self):
+        self.calendar = WorkdayCalendar(cache_file='data/test_arith_cache.json', config_file='config/holidays.json',
+                                        cache_ttl=None)
+        self.calendar.holidays_data = {
+            '2026': {
+                '2026-10-01': {'name': '国庆节', 'is_workday': False, 'type': 'holiday'},
+                '2026-10-02': {'name': '国庆节', 'is_workday': False, 'type': 'holiday'},
+                '2026-10-10': {'name': '国庆调休', 'is_workday': True, 'type': 'workday'},
+                '2026-12-31': {'name': '元旦', 'is_workday': False, 'type': 'holiday'},
+            },
+            '2027': {
+                '2027-01-01': {'name': '元旦', 'is_workday': False, 'type': 'holiday'},
+            },
+        }
+
+    def teardown_method(self):
+        self.calendar.wait_for_refresh()
+        if os.path.exists('data/test_arith_cache.json'):
+            os.remove('data/test_arith_cache.json')
+
+    def test_next_and_prev_workday(self):
+        # 2026-09-30 周三，10-01/10-02 放假，10-03/10-04 周末
+        assert self.calendar.next_workday('2026-09-30') == '2026-10-05'
+        assert self.calendar.prev_workday('2026-10-05') == '2026-09-30'
+        # 10-10 周六调休上班
+        assert self.calendar.next_workday('2026-10-09') == '2026-10-10'
+        assert self.calendar.prev_workday('2026-10-12') == '2026-10-10'
+
+    def test_workday_arithmetic_across_years(self):
+        assert self.calendar.next_workday('2026-12-30') == '2027-01-04'
+        assert self.calendar.prev_workday('2027-01-04') == '2026-12-30'
+        assert self.calendar.count_workdays('2026-12-28', '2027-01-08') == 8
+
+    def test_count_workdays(self):
+        assert self.calendar.count_workdays('2026-10-01', '2026-10-11') == 6
+        assert self.calendar.count_workdays('2026-10-05', '2026-10-05') == 1
+        assert self.calendar.count_workdays('2026-10-05', '2026-10-01') == 0
+
+    def test_data_change_recompiles(self):
+        assert self.calendar.is_workday('2026-10-01') is False
+        self.calendar._set_year(2026, {})
+        assert self.calendar.is_workday('2026-10-01') is True
+        assert self.calendar.next_workday('invalid') is None
+
+    def test_calendar_boundaries(self):
+        for year in (1, 9999):
+            self.calendar._last_attempt[year] = time.time()  # 不触发后台请求
+
+        # 9999-12-31 周五，0001-01-01 周一
+        assert self.calendar.is_workday('9999-12-31') is True
+        assert self.calendar.next_workday('9999-12-31') is None
+        assert self.calendar.prev_workday('9999-12-31') == '9999-12-30'
+        assert self.calendar.count_workdays('9999-12-27', '9999-12-31') == 5
+        assert self.calendar.prev_workday('0001-01-01') is None
+        assert self.calendar.next_workday('0001-01-01') == '0001-01-02'
+
+
+class TestWorkdayCalendarBackgroundRefresh:
+    """后台刷新测试：查询不等待网络请求"""
+
+    def _slow_api(self, release, calls):
+        def fake_get(url, timeout, headers=None):
+            calls.append(url)
+            release.wait(5)
+            response = MagicMock()
+            response.status_code = 200
+            response.headers = {}
+            response.json.return_value = {'code': 0, 'holiday': {
+                '01-01': {'date': '2027-01-01', 'name': '元旦', 'holiday': True},
+                '01-02': {'date': '2027-01-02', 'name': '调休', 'holiday': False},
+            }}
+            return response
+        return fake_get
+
+    def test_is_workday_answers_while_api_is_slow(self, tmp_path):
+        release, calls = Event(), []
+        calendar = WorkdayCalendar(cache_file=str(tmp_path / 'cache.json'),
+                                   config_file=str(tmp_path / 'holidays.json'))
+
+        with patch('utils.workday_calendar.requests.get', side_effect=self._slow_api(release, calls)):
+            started = time.time()
+            # 2027-01-01 是周五，接口数据到达前按周末规则判断
+            assert calendar.is_workday('2027-01-01') is True
+            assert calendar.is_workday('2027-01-02') is False
+            assert time.time() - started < 1
+
+            release.set()
+            calendar.wait_for_refresh(5)
+
+        assert len(calls) == 1
+        assert calendar.is_workday('2027-01-01') is False
+        assert calendar.is_workday('2027-01-02') is True
+        assert '2027' in json.loads((tmp_path / 'cache.json').read_text(encoding='utf-8'))
+
+    def test_refresh_is_single_flight(self, tmp_path):
+        release, calls = Event(), []
+        calendar = WorkdayCalendar(cache_file=str(tmp_path / 'cache.json'),
+                                   config_file=str(tmp_path / 'holidays.json'))
+
+        with patch('utils.workday_calendar.requests.get', side_effect=self._slow_api(release, calls)):
+            assert calendar.refresh_in_background(2027) is True
+            assert calendar.refresh_in_background(2027) is False
+            release.set()
+            calendar.wait_for_refresh(5)
+            assert len(calls) == 1
+
+            # 上一次刷新结束后可以再次刷新
+            assert calendar.refresh_in_background(2027) is True
+            calendar.wait_for_refresh(5)
+            assert len(calls) == 2
+
+    def test_missing_config_year_is_not_reparsed(self, tmp_path):
+        config_file = tmp_path / 'holidays.json'
+        config_file.write_text(json.dumps({'2026': {}}), encoding='utf-8')
+        calendar = WorkdayCalendar(cache_file=str(tmp_path / 'cache.json'), config_file=str(config_file))
+        calendar._last_attempt[2030] = time.time()  # 不触发后台请求
+
+        reads = []
+        original = workday_calendar.read_json
+        with patch('utils.workday_calendar.read_json', side_effect=lambda *a, **k: reads.append(a) or original(*a, **k)):
+            for _ in range(100):
+                assert calendar.is_workday('2030-01-02') is True
+            assert len(reads) == 1
+
+            # 配置文件更新后重新读取
+            config_file.write_text(json.dumps({'2030': {
+                '2030-01-02': {'name': '元旦', 'is_workday': False, 'type': 'holiday'}}}), encoding='utf-8')
+            assert calendar.is_workday('2030-01-02') is False
+            assert len(reads) == 2
+
+
+class TestHolidayPrefetch:
+    """次年节假日数据预取"""
+
+    def _response(self, holidays):
+        response = MagicMock()
+        response.status_code = 200
+        response.headers = {}
+        response.json.return_value = {'code': 0, 'holiday': holidays}
+        return response
+
+    def test_prefetch_backs_off_until_published(self, tmp_path):
+        cache_file = tmp_path / 'cache.json'
+        calendar = WorkdayCalendar(cache_file=str(cache_file), config_file=str(tmp_path / 'holidays.json'),
+                                   api_url='http://holiday.test/{year}')
+        published = self._response({'01-01': {'date': '2027-01-01', 'name': '元旦', 'holiday': True}})
+
+        # 定时任务每天 03:30 运行，第一次在 03:30:05 失败
+        first_run = datetime(2026, 11, 1, 3, 30, 5).timestamp()
+        with patch('utils.workday_calendar.requests.get', return_value=self._response({})) as mock_get, \
+                patch('utils.workday_calendar.time.time', return_value=first_run):
+            assert calendar.prefetch_year(2027) is False
+            assert mock_get.call_args[0][0] == 'http://holiday.test/2027'
+            # 退避期内不请求接口
+            assert calendar.prefetch_year(2027) is False
+            assert mock_get.call_count == 1
+        assert '2027' not in calendar.holidays_data
+
+        # 次日的任务早几秒触发（不足 24 小时）也照常重试
+        with patch('utils.workday_calendar.requests.get', return_value=self._response({})) as mock_get, \
+                patch('utils.workday_calendar.time.time', return_value=first_run + 86400 - 10):
+            assert calendar.prefetch_year(2027) is False
+            assert mock_get.call_count == 1
+        assert calendar._prefetch_backoff[2027][1] == 2
+
+        with patch('utils.workday_calendar.requests.get') as mock_get, \
+                patch('utils.workday_calendar.time.time', return_value=first_run + 2 * 86400):
+            assert calendar.prefetch_year(2027) is False
+            mock_get.assert_not_called()
+
+        with patch('utils.workday_calendar.requests.get', return_value=published), \
+                patch('utils.workday_calendar.time.time', return_value=first_run + 3 * 86400 - 10):
+            assert calendar.prefetch_year(2027) is True
+
+        reloaded = WorkdayCalendar(cache_file=str(cache_file), config_file=str(tmp_path / 'holidays.json'),
+                                   cache_ttl=None)
+        with patch('utils.workday_calendar.requests.get') as mock_get:
+            assert reloaded.is_workday('2027-01-01') is False
+            assert reloaded.prefetch_year(2027) is True
+            mock_get.assert_not_called()
+
+    def test_config_only_year_is_not_prefetched(self, tmp_path):
+        config_file = tmp_path / 'holidays.json'
+        config_file.write_text(json.dumps({
+            '2027': {'2027-01-01': {'name': '元旦', 'is_workday': False, 'type': 'holiday'}}
+        }), encoding='utf-8')
+        calendar = WorkdayCalendar(cache_file=str(tmp_path / 'cache.json'), config_file=str(config_file),
+                                   api_url='http://holiday.test/{year}')
+        published = self._response({'01-01': {'date': '2027-01-01', 'name': '元旦', 'holiday': True},
+                                    '02-11': {'date': '2027-02-11', 'name': '春节', 'holiday': True}})
+
+        # 接口不可用时用本地配置兜底
+        assert calendar._load_from_config(2027) is True
+        assert calendar.is_workday('2027-01-01') is False
+
+        with patch('utils.workday_calendar.requests.get', return_value=published) as mock_get:
+            assert calendar.prefetch_year(2027) is True
+            mock_get.assert_called_once()
+        assert calendar.meta['2027']['source'] == 'api'
+        assert calendar.is_workday('2027-02-11') is False
+
+
+class TestHolidayCacheRevalidation:
+    """缓存有效期和条件请求"""
+
+    def _response(self, status_code, holidays=None, headers=None):
+        response = MagicMock()
+        response.status_code = status_code
+        response.headers = headers or {}
+        response.json.return_value = {'code': 0, 'holiday': holidays or {}}
+        return response
+
+    def test_processes_saving_different_years_keep_both(self, tmp_path):
+        cache_file = tmp_path / 'cache.json'
+        worker_a = WorkdayCalendar(cache_file=str(cache_file), config_file=str(tmp_path / 'holidays.json'))
+        worker_b = WorkdayCalendar(cache_file=str(cache_file), config_file=str(tmp_path / 'holidays.json'))
+
+        with patch('utils.workday_calendar.requests.get', return_value=self._response(200, {
+                '01-01': {'date': '2027-01-01', 'name': '元旦', 'holiday': True}})):
+            assert worker_a.refresh_cache(2027) is True
+        with patch('utils.workday_calendar.requests.get', return_value=self._response(200, {
+                '01-01': {'date': '2028-01-01', 'name': '元旦', 'holiday': True}})):
+            assert worker_b.refresh_cache(2028) is True
+
+        saved = json.loads(cache_file.read_text(encoding='utf-8'))
+        assert '2027-01-01' in saved['2027'] and '2028-01-01' in saved['2028']
+        assert set(saved['_meta']) == {'2027', '2028'}
+        # 其他进程写入的年份同时进入内存
+        assert worker_b.is_workday('2027-01-01') is False
+
+    def test_expired_year_revalidates_with_conditional_get(self, tmp_path):
+        cache_file = tmp_path / 'cache.json'
+        holidays = {'01-01': {'date': '2027-01-01', 'name': '元旦', 'holiday': True}}
+        calendar = WorkdayCalendar(cache_file=str(cache_file), config_file=str(tmp_path / 'holidays.json'),
+                                   cache_ttl=3600)
+
+        first = self._response(200, holidays, {'ETag': '"v1"', 'Last-Modified': 'Mon, 02 Nov 2026 00:00:00 GMT'})
+        with patch('utils.workday_calendar.requests.get', return_value=first):
+            assert calendar.refresh_cache(2027) is True
+        saved = json.loads(cache_file.read_text(encoding='utf-8'))
+        assert saved['_meta']['2027']['etag'] == '"v1"'
+        assert saved['_meta']['2027']['source'] == 'api'
+
+        # 未过期：直接使用缓存
+        reloaded = WorkdayCalendar(cache_file=str(cache_file), config_file=str(tmp_path / 'holidays.json'),
+                                   cache_ttl=3600)
+        with patch('utils.workday_calendar.requests.get') as mock_get:
+            assert reloaded.is_workday('2027-01-01') is False
+            mock_get.assert_not_called()
+
+        # 过期后后台条件请求，304 只更新获取时间，节假日数据不变
+        saved['_meta']['2027']['fetched_at'] -= 7200
+        cache_file.write_text(json.dumps(saved), encoding='utf-8')
+        reloaded = WorkdayCalendar(cache_file=str(cache_file), config_file=str(tmp_path / 'holidays.json'),
+                                   cache_ttl=3600)
+        with patch('utils.workday_calendar.requests.get', return_value=self._response(304)) as mock_get:
+            assert reloaded.is_workday('2027-01-01') is False
+            reloaded.wait_for_refresh(5)
+        assert mock_get.call_args[1]['headers'] == {
+            'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 02 Nov 2026 00:00:00 GMT',
+        }
+        assert reloaded._is_expired(2027) is False
+        assert json.loads(cache_file.read_text(encoding='utf-8'))['2027'] == saved['2027']
+
+        # 新的获取时间已写入缓存文件，重启后不会再次重新验证
+        restarted = WorkdayCalendar(cache_file=str(cache_file), config_file=str(tmp_path / 'holidays.json'),
+                                    cache_ttl=3600)
+        assert restarted.meta['2027']['etag'] == '"v1"'
+        with patch('utils.workday_calendar.requests.get') as mock_get:
+            assert restarted.is_workday('2027-01-01') is False
+            mock_get.assert_not_called()
+
+    def test_revalidation_picks_up_corrections(self, tmp_path):
+        cache_file = tmp_path / 'cache.json'
+        calendar = WorkdayCalendar(cache_file=str(cache_file), config_file=str(tmp_path / 'holidays.json'))
+        calendar._set_year(2027, {'2027-01-04': {'name': '', 'is_workday': True, 'type': 'workday'}},
+                           {'source': 'api', 'fetched_at': 0, 'etag': '"v1"'})
+
+        corrected = self._response(200, {'01-04': {'date': '2027-01-04', 'name': '元旦', 'holiday': True}},
+                                   {'ETag': '"v2"'})
+        release = Event()
+        with patch('utils.workday_calendar.requests.get',
+                   side_effect=lambda *args, **kwargs: (release.wait(5), corrected)[1]):
+            assert calendar.is_workday('2027-01-04') is True  # 旧数据先行作答
+            release.set()
+            calendar.wait_for_refresh(5)
+
+        assert calendar.is_workday('2027-01-04') is False
+        saved = json.loads(cache_file.read_text(encoding='utf-8'))
+        assert saved['2027']['2027-01-04']['is_workday'] is False
+        assert saved['_meta']['2027']['etag'] == '"v2"'
+
+
+class FakeHolidayHandler(BaseHTTPRequestHandler):
+    """模拟节假日接口，down 为 True 时返回 503"""
+    down = False
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        if self.down:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = json.dumps({'code': 0, 'holiday': {
+            '01-01': {'date': '2027-01-01', 'name': '元旦', 'holiday': True},
+        }}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_holiday_api():
+    FakeHolidayHandler.down = False
+    FakeHolidayHandler.requests = []
+    server = HTTPServer(('127.0.0.1', 0), FakeHolidayHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/api/holiday/year/{{year}}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestHolidayApiCircuitBreaker:
+    """接口故障时的失败缓存和熔断（使用本地模拟接口）"""
+
+    def _calendar(self, tmp_path, api_url, **kwargs):
+        calendar = WorkdayCalendar(cache_file=str(tmp_path / 'cache.json'),
+                                   config_file=str(tmp_path / 'holidays.json'), api_url=api_url, **kwargs)
+        calendar.RETRY_DELAY = 0
+        return calendar
+
+    def test_outage_opens_breaker_and_falls_back_instantly(self, tmp_path, fake_holiday_api):
+        FakeHolidayHandler.down = True
+        calendar = self._calendar(tmp_path, fake_holiday_api, failure_threshold=3, failure_cooldown=60)
+
+        assert calendar.refresh_cache(2027) is False
+        assert len(FakeHolidayHandler.requests) == 3
+
+        # 熔断后其他年份也不再请求，直接按周末规则作答
+        started = time.time()
+        assert calendar.refresh_cache(2028) is False
+        assert calendar.is_workday('2028-01-03') is True
+        calendar.wait_for_refresh(5)
+        assert time.time() - started < 1
+        assert len(FakeHolidayHandler.requests) == 3
+
+        # 冷却结束后放行一次试探请求，接口恢复后关闭熔断
+        FakeHolidayHandler.down = False
+        calendar.breaker._opened_at -= 60
+        calendar._failed_until.clear()
+        assert calendar.refresh_cache(2027) is True
+        assert calendar.is_workday('2027-01-01') is False
+        assert len(FakeHolidayHandler.requests) == 4
+
+    def test_failed_year_is_cached(self, tmp_path, fake_holiday_api):
+        FakeHolidayHandler.down = True
+        calendar = self._calendar(tmp_path, fake_holiday_api, failure_threshold=10, failure_cooldown=60)
+
+        assert calendar.refresh_cache(2027) is False
+        assert len(FakeHolidayHandler.requests) == 3
+
+        # 接口已恢复，但失败缓存未到期前不再请求该年
+        FakeHolidayHandler.down = False
+        assert calendar.refresh_cache(2027) is False
+        assert len(FakeHolidayHandler.requests) == 3
+
+        calendar._failed_until[2027] = 0
+        assert calendar.refresh_cache(2027) is True
+        assert len(FakeHolidayHandler.requests) == 4
+
+    def test_unreachable_api(self, tmp_path):
+        server = HTTPServer(('127.0.0.1', 0), FakeHolidayHandler)
+        api_url = f"http://127.0.0.1:{server.server_port}/{{year}}"
+        server.server_close()  # 端口不再监听，请求直接被拒绝
+        calendar = self._calendar(tmp_path, api_url, failure_threshold=2, failure_cooldown=60)
+
+        assert calendar.refresh_cache(2027) is False
+        assert calendar.breaker.state == 'open'
+        assert calendar._fetch_from_api(2028) is False
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
 
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+延迟批量落盘测试
+"""
+
+import json
+import os
+import time
+from threading import Event, Thread, Timer
+
+from utils.write_behind import WriteBehindFlusher
+from utils.daily_report_storage import DailyReportStorage
+
+
+class TestWriteBehindFlusher:
+    def test_flush_batches_pending_changes(self):
+        calls = []
+        flusher = WriteBehindFlusher(lambda: calls.append(1), interval=60, max_pending=100)
+        for _ in range(5):
+            flusher.mark_dirty()
+
+        assert calls == []
+        assert flusher.flush() is True
+        assert calls == [1]
+        assert flusher.flush() is False
+
+    def test_max_pending_wakes_background_flush(self):
+        calls = []
+        flusher = WriteBehindFlusher(lambda: calls.append(1), interval=60, max_pending=3)
+        for _ in range(3):
+            flusher.mark_dirty()
+
+        deadline = time.time() + 2
+        while not calls and time.time() < deadline:
+            time.sleep(0.01)
+        assert calls == [1]
+        flusher.stop()
+
+    def test_failed_flush_keeps_changes_pending(self):
+        def broken():
+            raise OSError('disk full')
+
+        flusher = WriteBehindFlusher(broken, interval=60, max_pending=100)
+        flusher.mark_dirty()
+        assert flusher.flush() is False
+        assert flusher.pending == 1
+
+    def test_forced_flush_waits_for_running_write(self):
+        started, release, written = Event(), Event(), []
+
+        def slow():
+            started.set()
+            release.wait(5)
+            written.append(1)
+
+        flusher = WriteBehindFlusher(slow, interval=60, max_pending=100)
+        flusher.mark_dirty()
+        background = Thread(target=flusher.flush)
+        background.start()
+        assert started.wait(5)
+
+        # 写盘进行中又有新变更：强制落盘等正在进行的写盘结束后再写一次，不会提前返回
+        flusher.mark_dirty()
+        Timer(0.1, release.set).start()
+        assert flusher.flush() is True
+        assert written == [1, 1]
+        assert flusher.pending == 0
+        background.join(5)
+
+    def test_stop_joins_background_thread(self):
+        calls = []
+        flusher = WriteBehindFlusher(lambda: calls.append(1), interval=60, max_pending=100)
+        flusher.mark_dirty()
+        thread = flusher._thread
+
+        flusher.stop()
+        assert not thread.is_alive()
+        assert calls == [1]
+        assert flusher.pending == 0
+
+
+class TestDailyReportStorageWriteBehind:
+    def test_changes_reach_disk_on_flush(self, tmp_path):
+        storage_file = str(tmp_path / 'daily_reports.json')
+        storage = DailyReportStorage(storage_file, flush_interval=60, flush_max_pending=100)
+        storage.add_report({'sender': '张三'}, '2026-02-26')
+        storage.add_report({'sender': '李四'}, '2026-02-26')
+
+        assert not os.path.exists(storage_file)
+        assert storage.get_report_count('2026-02-26') == 2
+
+        assert storage.flush() is True
+        with open(storage_file, encoding='utf-8') as f:
+            assert len(json.load(f)['2026-02-26']['reports']) == 2
+
+    def test_failed_save_keeps_changes_pending(self, tmp_path, monkeypatch):
+        storage_file = str(tmp_path / 'daily_reports.json')
+        storage = DailyReportStorage(storage_file, flush_interval=60, flush_max_pending=100)
+        storage.add_report({'sender': '张三'}, '2026-02-26')
+
+        def broken(*args, **kwargs):
+            raise OSError('disk full')
+
+        monkeypatch.setattr('utils.daily_report_storage.atomic_write_data', broken)
+        assert storage.flush() is False
+        assert storage.flush() is False
+        assert not os.path.exists(storage_file)
+        assert storage._flusher.pending == 1
+        assert len(storage._pending_ops) == 1
+
+        monkeypatch.undo()
+        assert storage.flush() is True
+        assert storage._pending_ops == []
+        with open(storage_file, encoding='utf-8') as f:
+            assert json.load(f)['2026-02-26']['reports'][0]['sender'] == '张三'
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+历史日报补录工具
+从飞书群消息历史或本地导出的消息文件中识别日报并写入日报存储
+
+用法:
+    python tools/backfill_reports.py --since 2026-02-20                    # 拉取日报群 2/20 至今的消息
+    python tools/backfill_reports.py --since 2026-02-20 --until 2026-02-22
+    python tools/backfill_reports.py --file messages.json                  # 从导出文件补录
+
+补录期间可以保持机器人运行，存储的跨进程文件锁保证两边的写入不会互相覆盖。
+"""
+
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.durable_file import read_json  # noqa: E402
+from utils.report_backfill import FEISHU_BASE_URL, FeishuMessageSource, ReportBackfiller, iter_export_file  # noqa: E402
+from utils.services import get_config, get_report_storage  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='把历史群消息中的日报补录到日报存储')
+    parser.add_argument('--file', help='本地导出的消息文件（JSON / JSONL），指定后不请求飞书接口')
+    parser.add_argument('--chat-id', help='群组ID，默认使用 DAILY_REPORT_CHAT_ID')
+    parser.add_argument('--since', help='开始日期 (YYYY-MM-DD)，包含')
+    parser.add_argument('--until', help='结束日期 (YYYY-MM-DD)，包含，默认至今')
+    parser.add_argument('--batch-size', type=int, default=100, help='每批写入的日报数')
+    parser.add_argument('--base-url', default=FEISHU_BASE_URL, help='开放平台地址')
+    parser.add_argument('--user-names', default='config/user_names.json', help='用户姓名映射文件')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    config = get_config()
+
+    user_lookup = None
+    if args.file:
+        messages = iter_export_file(args.file)
+    else:
+        chat_id = args.chat_id or config.DAILY_REPORT_CHAT_ID
+        if not chat_id:
+            print("❌ 请通过 --chat-id 或 DAILY_REPORT_CHAT_ID 指定群组", file=sys.stderr)
+            return 1
+        start_time = int(datetime.strptime(args.since, '%Y-%m-%d').timestamp()) if args.since else None
+        end_time = None
+        if args.until:
+            end_time = int((datetime.strptime(args.until, '%Y-%m-%d') + timedelta(days=1)).timestamp()) - 1
+        messages = FeishuMessageSource(config.APP_ID, config.APP_SECRET, chat_id,
+                                       start_time=start_time, end_time=end_time, base_url=args.base_url)
+        # 历史消息的发送者是 open_id，按 open_id 查到 user_id 后再套用姓名映射
+        user_lookup = messages.get_user
+
+    user_names = (read_json(args.user_names, default={}) or {}).get('映射', {})
+    storage = get_report_storage()
+    stats = ReportBackfiller(storage, user_names=user_names, batch_size=args.batch_size,
+                             user_lookup=user_lookup).run(messages)
+    storage.flush()
+
+    print(f"✅ 读取 {stats['messages']} 条消息，补录 {stats['reports']} 份日报，跳过 {stats['skipped']} 份已有日报")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据文件导出工具
+把任意格式（json / compact / msgpack）的数据快照导出为缩进 JSON，便于排查问题
+
+用法:
+    python tools/export_json.py data/daily_reports.json             # 输出到终端
+    python tools/export_json.py data/daily_reports.json -o out.json # 输出到文件
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.durable_file import read_data  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='把数据快照导出为可读的 JSON')
+    parser.add_argument('path', help='数据文件路径（自动识别格式）')
+    parser.add_argument('-o', '--output', help='输出文件路径，默认输出到终端')
+    args = parser.parse_args()
+
+    data = read_data(args.path)
+    if data is None:
+        print(f"❌ 无法读取数据文件: {args.path}", file=sys.stderr)
+        return 1
+
+    content = json.dumps(data, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(content + '\n')
+        print(f"✅ 已导出到 {args.output}")
+    else:
+        print(content)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+熔断器
+外部接口连续失败达到阈值后熔断一段时间，期间直接拒绝请求走降级逻辑；
+冷却结束后放行一次试探请求，成功则恢复，失败则重新熔断
+"""
+
+import logging
+import time
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """连续失败计数熔断器（线程安全）"""
+
+    def __init__(self, name: str, failure_threshold: int = 3, cooldown: float = 300):
+        """
+        初始化熔断器
+
+        Args:
+            name: 名称（用于日志）
+            failure_threshold: 连续失败多少次后熔断
+            cooldown: 熔断持续时间（秒）
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self.lock = Lock()
+
+    @property
+    def state(self) -> str:
+        with self.lock:
+            return self._state(time.time())
+
+    def allow(self) -> bool:
+        """
+        是否允许发起请求
+
+        熔断期间返回 False；冷却结束后只放行一个试探请求，结果出来前其余调用仍返回 False。
+
+        Returns:
+            bool: 是否允许
+        """
+        with self.lock:
+            state = self._state(time.time())
+            if state == STATE_CLOSED:
+                return True
+            if state == STATE_HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        """记录一次成功，恢复正常状态"""
+        with self.lock:
+            if self._opened_at is not None:
+                logger.info(f"{self.name} 已恢复，关闭熔断")
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        """记录一次失败，连续失败达到阈值（或试探失败）时熔断"""
+        with self.lock:
+            self._failures += 1
+            if self._probing or (self._opened_at is None and self._failures >= self.failure_threshold):
+                self._opened_at = time.time()
+                self._probing = False
+                logger.warning(f"{self.name} 连续失败 {self._failures} 次，熔断 {self.cooldown:g} 秒")
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return STATE_CLOSED
+        if now - self._opened_at < self.cooldown:
+            return STATE_OPEN
+        return STATE_HALF_OPEN
@@ -7,27 +7,39 @@
 
 import json
 import logging
+import re
 from datetime import datetime, timedelta
 from typing import Dict, Any
 
 import lark_oapi as lark
 
 from utils.command_router import get_command_router
-from utils.vacation_manager import VacationManager
-from utils.daily_report_storage import DailyReportStorage
+from utils.vacation_manager import VacationManager, format_weekdays, parse_weekdays
+from utils.daily_report_storage import ReportStorageBase
+from utils.services import get_report_storage, get_vacation_manager
 
 logger = logging.getLogger(__name__)
 
+# /我的历史 默认和最多展示的条数
+DEFAULT_HISTORY_LIMIT = 10
+MAX_HISTORY_LIMIT = 30
+
+# 批量设置/取消调休时姓名之间的分隔符
+NAME_SEPARATORS = r'[,，、]'
+
 
 class CommandHandler:
     """命令处理器"""
 
-    def __init__(self, app_id: str, app_secret: str):
+    def __init__(self, app_id: str, app_secret: str,
+                 vacation_mgr: VacationManager = None,
+                 report_storage: ReportStorageBase = None):
         self.app_id = app_id
         self.app_secret = app_secret
         self.router = get_command_router()
-        self.vacation_mgr = VacationManager()
-        self.report_storage = DailyReportStorage()
+        # 默认使用进程内共享的存储实例，与消息处理看到的是同一份数据
+        self.vacation_mgr = vacation_mgr or get_vacation_manager()
+        self.report_storage = report_storage or get_report_storage()
 
         self.client = lark.Client.builder() \
             .app_id(app_id) \
@@ -44,6 +56,7 @@ class CommandHandler:
             'cancel_vacation': self.handle_cancel_vacation,
             'query_vacation': self.handle_query_vacation,
             'my_report': self.handle_my_report,
+            'my_history': self.handle_my_history,
         }
 
         handler = handler_map.get(command)
@@ -70,8 +83,8 @@ class CommandHandler:
         summary += f"共收到 {len(reports)} 份日报：\n\n"
 
         for i, report in enumerate(reports, 1):
-            name = report.get('sender', report.get('name', '未知'))
-            content = report.get('work_content') or report.get('content') or '无内容'
+            name = report.get('sender', '未知')
+            content = report.work_content or '无内容'
             if len(content) > 100:
                 content = content[:100] + '...'
             summary += f"{i}. **{name}**\n"
@@ -85,32 +98,83 @@ class CommandHandler:
 
         return summary
 
-    def handle_set_vacation(self, args: list, context: Dict) -> str:
-        if not args:
-            return "❌ 参数错误\n\n格式: `/设置调休 <姓名> [日期]`\n示例: `/设置调休 张三 2026-02-26`"
+    @staticmethod
+    def _parse_vacation_args(args: list):
+        """
+        解析调休命令的日期参数
 
-        name = args[0]
-        date = args[1] if len(args) > 1 else datetime.now().strftime('%Y-%m-%d')
+        Returns:
+            tuple: (开始日期, 结束日期或 None, 星期列表, 日期描述)
+        """
+        span = next((arg for arg in args[1:] if not arg.startswith('每周')), None)
+        weekly = next((arg for arg in args[1:] if arg.startswith('每周')), None)
 
-        success = self.vacation_mgr.set_vacation(name, date)
-        if success:
-            return f"✅ 成功设置调休\n\n**姓名**: {name}\n**日期**: {date}"
-        return "❌ 设置调休失败\n\n请检查参数是否正确"
+        if span:
+            start, _, end = span.replace('～', '~').partition('~')
+            start, end = start.strip(), end.strip() or None
+        else:
+            start, end = datetime.now().strftime('%Y-%m-%d'), None
+        weekdays = parse_weekdays(weekly) if weekly else []
 
-    def handle_cancel_vacation(self, args: list, context: Dict) -> str:
-        if not args:
-            return "❌ 参数错误\n\n格式: `/取消调休 <姓名> [日期]`\n示例: `/取消调休 张三 2026-02-26`"
+        if end and end != start:
+            description = f"{start} ~ {end}"
+        elif weekdays and not span:
+            description = f"{start} 起"
+        else:
+            description = start
+        if weekdays:
+            description += f"（{format_weekdays(weekdays)}）"
+        return start, end, weekdays, description
+
+    @staticmethod
+    def _split_names(text: str) -> list:
+        """把“张三,李四，王五”拆成去重后的姓名列表"""
+        return list(dict.fromkeys(name.strip() for name in re.split(NAME_SEPARATORS, text) if name.strip()))
 
-        name = args[0]
-        date = args[1] if len(args) > 1 else datetime.now().strftime('%Y-%m-%d')
+    def handle_set_vacation(self, args: list, context: Dict) -> str:
+        if not args or not self._split_names(args[0]):
+            return ("❌ 参数错误\n\n格式: `/设置调休 <姓名[,姓名...]> [日期|开始~结束] [每周X]`\n"
+                    "示例: `/设置调休 张三 2026-02-26`、`/设置调休 张三,李四 2026-03-02`")
 
-        success = self.vacation_mgr.cancel_vacation(name, date)
-        if success:
-            return f"✅ 成功取消调休\n\n**姓名**: {name}\n**日期**: {date}"
-        return "❌ 取消调休失败\n\n该用户可能未设置调休"
+        names = self._split_names(args[0])
+        start, end, weekdays, description = self._parse_vacation_args(args)
+
+        changed = self.vacation_mgr.set_vacations(names, start, end_date=end, weekdays=weekdays)
+        if changed is None:
+            return "❌ 设置调休失败\n\n请检查参数是否正确"
+
+        result = f"✅ 成功设置调休\n\n**姓名**: {'、'.join(names)}\n**日期**: {description}"
+        unchanged = [name for name in names if name not in changed]
+        if len(names) > 1 and unchanged:
+            result += f"\n\n💡 已设置过: {'、'.join(unchanged)}"
+        return result
+
+    def handle_cancel_vacation(self, args: list, context: Dict) -> str:
+        if not args or not self._split_names(args[0]):
+            return ("❌ 参数错误\n\n格式: `/取消调休 <姓名[,姓名...]> [日期|开始~结束] [每周X]`\n"
+                    "示例: `/取消调休 张三 2026-02-26`、`/取消调休 张三,李四 2026-03-02`")
+
+        names = self._split_names(args[0])
+        start, end, weekdays, description = self._parse_vacation_args(args)
+        if weekdays:
+            description = format_weekdays(weekdays)
+
+        changed = self.vacation_mgr.cancel_vacations(names, start, end_date=end, weekdays=weekdays)
+        if not changed:
+            return "❌ 取消调休失败\n\n" + ("这些用户可能未设置调休" if len(names) > 1 else "该用户可能未设置调休")
+
+        result = f"✅ 成功取消调休\n\n**姓名**: {'、'.join(changed)}\n**日期**: {description}"
+        unchanged = [name for name in names if name not in changed]
+        if unchanged:
+            result += f"\n\n💡 未设置调休: {'、'.join(unchanged)}"
+        return result
 
     def handle_query_vacation(self, args: list, context: Dict) -> str:
         date = args[0] if args else datetime.now().strftime('%Y-%m-%d')
+        try:
+            datetime.strptime(date, '%Y-%m-%d')
+        except ValueError:
+            return f"❌ 日期格式错误: {date}\n\n格式: `/查询调休 [YYYY-MM-DD]`"
         vacation_users = self.vacation_mgr.get_vacation_users(date)
 
         result = f"🏖️ **调休人员查询 - {date}**\n\n"
@@ -133,17 +197,35 @@ class CommandHandler:
         else:
             date = date_str
 
-        reports = self.report_storage.get_all_reports(date)
-        my_report = next((r for r in reports if r.get('sender') == user_name or r.get('name') == user_name), None)
+        my_report = self.report_storage.get_report_by_sender(user_name, date)
 
         if not my_report:
             return f"📝 **我的日报 - {date}**\n\n暂无日报记录"
 
-        content = my_report.get('work_content') or my_report.get('content') or '无内容'
-        submit_time = my_report.get('timestamp') or my_report.get('time') or '未知'
+        content = my_report.work_content or '无内容'
+        submit_time = my_report.timestamp or '未知'
 
         return (
             f"📝 **我的日报 - {date}**\n\n"
             f"**提交时间**: {submit_time}\n\n"
             f"**内容**:\n{content}"
         )
+
+    def handle_my_history(self, args: list, context: Dict) -> str:
+        user_name = context.get('user_name', '未知用户')
+        limit = int(args[0]) if args else DEFAULT_HISTORY_LIMIT
+        limit = max(1, min(limit, MAX_HISTORY_LIMIT))
+
+        history = self.report_storage.get_user_history(user_name, limit)
+        if not history:
+            return "📚 **我的历史日报**\n\n暂无日报记录"
+
+        total = len(self.report_storage.get_sender_dates(user_name))
+        result = f"📚 **我的历史日报**\n\n共提交 {total} 天，最近 {len(history)} 条：\n\n"
+        for report in history:
+            date = report.date or (report.timestamp or '')[:10] or '未知日期'
+            content = report.work_content or '无内容'
+            if len(content) > 50:
+                content = content[:50] + '...'
+            result += f"• **{date}** {content}\n"
+        return result
@@ -11,6 +11,14 @@ from typing import Optional, Dict
 
 logger = logging.getLogger(__name__)
 
+# 多个姓名用逗号或顿号分隔（张三,李四、王五），分隔符两侧可以有空格
+VACATION_NAMES_PATTERN = r'([^\s,，、]+(?:\s*[,，、]\s*[^\s,，、]+)*)'
+
+VACATION_SPAN_PATTERN = (
+    r'(?:\s+(\d{4}-\d{2}-\d{2}(?:\s*[~～]\s*\d{4}-\d{2}-\d{2})?))?'
+    r'(?:\s+(每周[一二三四五六日天、,，]+))?$'
+)
+
 
 class CommandRouter:
     """命令路由器"""
@@ -18,10 +26,12 @@ class CommandRouter:
     COMMAND_PATTERNS = {
         'help': r'^[/／](?:帮助|help)$',
         'summary': r'^[/／]日报汇总(?:\s+(\d{4}-\d{2}-\d{2}))?$',
-        'set_vacation': r'^[/／]设置调休\s+(\S+)(?:\s+(\d{4}-\d{2}-\d{2}))?$',
-        'cancel_vacation': r'^[/／]取消调休\s+(\S+)(?:\s+(\d{4}-\d{2}-\d{2}))?$',
+        # 日期可写成区间（2026-03-01~2026-03-07），可追加按周重复（每周五、每周一、三）
+        'set_vacation': r'^[/／]设置调休\s+' + VACATION_NAMES_PATTERN + VACATION_SPAN_PATTERN,
+        'cancel_vacation': r'^[/／]取消调休\s+' + VACATION_NAMES_PATTERN + VACATION_SPAN_PATTERN,
         'query_vacation': r'^[/／]查询调休(?:\s+(\d{4}-\d{2}-\d{2}))?$',
         'my_report': r'^[/／]我的日报(?:\s+(今天|昨天|\d{4}-\d{2}-\d{2}))?$',
+        'my_history': r'^[/／]我的历史(?:\s+(\d+))?$',
     }
 
     def __init__(self):
@@ -70,11 +80,17 @@ class CommandRouter:
 • `/我的日报 [日期]` - 查询自己的日报
   示例: `/我的日报 昨天`
 
+• `/我的历史 [条数]` - 查询自己最近的日报（默认 10 条）
+  示例: `/我的历史 5`
+
 **调休管理**
-• `/设置调休 <姓名> [日期]` - 设置某人调休（默认今天）
+• `/设置调休 <姓名[,姓名...]> [日期|开始~结束] [每周X]` - 设置调休（默认今天）
   示例: `/设置调休 张三 2026-02-26`
+  示例: `/设置调休 张三,李四,王五 2026-03-02`
+  示例: `/设置调休 张三 2026-03-01~2026-03-07`
+  示例: `/设置调休 张三 每周五`
 
-• `/取消调休 <姓名> [日期]` - 取消调休设置
+• `/取消调休 <姓名[,姓名...]> [日期|开始~结束] [每周X]` - 取消调休设置
   示例: `/取消调休 张三`
 
 • `/查询调休 [日期]` - 查询调休人员（默认今天）
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日报记录
+解析、存储、生成汇总和命令处理之间统一传递 DailyReport，
+旧数据中的字段名（name / content / time）在加载时一次性归一化
+"""
+
+from typing import Any, Dict
+
+# 旧字段名 -> 现字段名
+LEGACY_KEYS = {
+    'name': 'sender',
+    'content': 'work_content',
+    'time': 'timestamp',
+}
+
+
+class DailyReport:
+    """
+    单条日报
+
+    使用 __slots__ 存储固定字段，未知字段保存在 extra 中，转换回字典时原样写回。
+    同时提供 get / [] 访问，兼容仍按字典读取日报的调用方。
+    """
+
+    __slots__ = ('sender', 'tracking_issues', 'work_content', 'blocks', 'next_plan',
+                 'timestamp', 'date', 'message_id', 'extra')
+
+    FIELDS = __slots__[:-1]
+
+    def __init__(self, sender: str = None, tracking_issues: str = None, work_content: str = None,
+                 blocks: str = None, next_plan: str = None, timestamp: str = None,
+                 date: str = None, message_id: str = None, extra: Dict[str, Any] = None):
+        self.sender = sender
+        self.tracking_issues = tracking_issues
+        self.work_content = work_content
+        self.blocks = blocks
+        self.next_plan = next_plan
+        self.timestamp = timestamp
+        self.date = date
+        self.message_id = message_id
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DailyReport':
+        """
+        从字典创建日报（归一化旧字段名）
+
+        Args:
+            data: 日报字典
+
+        Returns:
+            DailyReport: 日报记录
+        """
+        get = data.get
+        report = cls(get('sender'), get('tracking_issues'), get('work_content'), get('blocks'),
+                     get('next_plan'), get('timestamp'), get('date'), get('message_id'))
+
+        if not _FIELD_SET.issuperset(data):
+            extra = {}
+            for key, value in data.items():
+                if key in _FIELD_SET:
+                    continue
+                target = LEGACY_KEYS.get(key)
+                if target is None:
+                    extra[key] = value
+                elif not getattr(report, target):
+                    # 与原先 get('work_content') or get('content') 的取值顺序一致
+                    setattr(report, target, value)
+            report.extra = extra or None
+        return report
+
+    @classmethod
+    def coerce(cls, report) -> 'DailyReport':
+        """把字典或 DailyReport 统一为 DailyReport"""
+        return report if isinstance(report, cls) else cls.from_dict(report)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换为字典（省略空字段，extra 中的字段原样保留）
+
+        Returns:
+            Dict[str, Any]: 日报字典
+        """
+        data = {field: getattr(self, field) for field in self.FIELDS if getattr(self, field) is not None}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """按字典方式读取字段，字段不存在或为空时返回 default"""
+        field = LEGACY_KEYS.get(key, key)
+        if field in _FIELD_SET:
+            value = getattr(self, field)
+            return default if value is None else value
+        return self.extra.get(key, default) if self.extra else default
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        field = LEGACY_KEYS.get(key, key)
+        if field in _FIELD_SET:
+            setattr(self, field, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, DailyReport):
+            other = other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"DailyReport({self.to_dict()!r})"
+
+
+_FIELD_SET = frozenset(DailyReport.FIELDS)
+_MISSING = object()
+
@@ -7,7 +7,9 @@
 
 import re
 import logging
-from typing import Dict, Optional
+from typing import Optional
+
+from utils.daily_report import DailyReport
 
 logger = logging.getLogger(__name__)
 
@@ -35,7 +37,7 @@ class DailyReportParser:
                 return True
         return False
 
-    def parse(self, text: str, sender_name: str = "未知") -> Optional[Dict]:
+    def parse(self, text: str, sender_name: str = "未知") -> Optional[DailyReport]:
         """
         解析日报内容
 
@@ -44,26 +46,20 @@ class DailyReportParser:
             sender_name: 发送者姓名
 
         Returns:
-            Dict: 解析后的日报数据，如果不是日报则返回 None
-            {
-                'sender': '发送者姓名',
-                'tracking_issues': '跟踪问题',
-                'work_content': '今天工作内容',
-                'blocks': 'Block点',
-                'next_plan': '下一工作日计划'
-            }
+            DailyReport: 解析后的日报，如果不是日报则返回 None
+            （sender / tracking_issues / work_content / blocks / next_plan）
         """
         if not self.is_daily_report(text):
             return None
 
         try:
-            report_data = {
-                'sender': sender_name,
-                'tracking_issues': self._extract_tracking_issues(text),
-                'work_content': self._extract_work_content(text),
-                'blocks': self._extract_blocks(text),
-                'next_plan': self._extract_next_plan(text)
-            }
+            report_data = DailyReport(
+                sender=sender_name,
+                tracking_issues=self._extract_tracking_issues(text),
+                work_content=self._extract_work_content(text),
+                blocks=self._extract_blocks(text),
+                next_plan=self._extract_next_plan(text)
+            )
 
             logger.info(f"成功解析日报 - 发送者: {sender_name}")
             return report_data
@@ -232,7 +228,7 @@ Block点：
     print("=" * 60)
     result1 = parser.parse(test_report1, "张三")
     if result1:
-        for key, value in result1.items():
+        for key, value in result1.to_dict().items():
             print(f"{key}: {value}")
 
     print("\n" + "=" * 60)
@@ -240,5 +236,5 @@ Block点：
     print("=" * 60)
     result2 = parser.parse(test_report2, "李四")
     if result2:
-        for key, value in result2.items():
+        for key, value in result2.to_dict().items():
             print(f"{key}: {value}")
@@ -8,39 +8,212 @@
 import json
 import logging
 import os
-from datetime import datetime
-from typing import List, Dict
-from threading import Lock
+from bisect import bisect_left, bisect_right, insort
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import List, Dict, Iterator, Optional, Tuple
+from threading import Lock, Thread
+
+from utils.daily_report import DailyReport
+from utils.durable_file import FORMAT_JSON, atomic_write_data, json_default, read_data
+from utils.file_lock import LOCK_SUFFIX, file_lock, file_version
+from utils.report_archive import ReportArchive
+from utils.write_behind import WriteBehindFlusher
 
 logger = logging.getLogger(__name__)
 
+# 某日数据的只读快照：写入方每次变更后整体替换，读取方无需加锁
+# by_sender 为 {发送者: 日报}，按人查询时无需遍历当天的日报列表
+DaySnapshot = namedtuple('DaySnapshot', ['reports', 'sent', 'by_sender'])
+
+
+def make_snapshot(reports: List[DailyReport], sent: bool) -> DaySnapshot:
+    """根据某日的日报列表创建只读快照"""
+    reports = tuple(reports)
+    return DaySnapshot(reports, sent, {r.sender: r for r in reports})
+
+
+class ReportStorageBase:
+    """
+    日报存储接口
+
+    所有存储后端（JSON 文件、SQLite 等）对外提供相同的方法，
+    调用方只依赖这些方法，不关心数据落在哪里。
+    """
+
+    def add_report(self, report: Dict, report_date: str = None) -> bool:
+        raise NotImplementedError
+
+    def add_reports(self, reports: List[DailyReport]) -> int:
+        raise NotImplementedError
+
+    def get_all_reports(self, date: str = None) -> List[Dict]:
+        raise NotImplementedError
+
+    def get_report_count(self, date: str = None) -> int:
+        raise NotImplementedError
+
+    def is_sent(self, date: str = None) -> bool:
+        raise NotImplementedError
+
+    def iter_reports(self, start: str, end: str, sender: str = None) -> Iterator[Dict]:
+        raise NotImplementedError
+
+    def count_by_date(self, start: str, end: str) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def get_report_by_sender(self, sender: str, date: str = None) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def get_sender_dates(self, sender: str, start: str = None, end: str = None) -> List[str]:
+        raise NotImplementedError
+
+    def get_user_history(self, sender: str, limit: int = 10) -> List[Dict]:
+        raise NotImplementedError
+
+    def mark_as_sent(self, date: str = None) -> bool:
+        raise NotImplementedError
+
+    def remove_report_by_message_id(self, message_id: str) -> bool:
+        raise NotImplementedError
+
+    def clear_reports(self, date: str = None) -> bool:
+        raise NotImplementedError
+
+    def flush(self) -> bool:
+        """立即写入尚未落盘的变更（每次变更都同步落盘的后端无需处理）"""
+        return True
+
+    def close(self) -> bool:
+        """进程退出前写入剩余变更并停止后台线程"""
+        return self.flush()
+
+    def archive_reports(self, keep_days: int) -> int:
+        """把超过保留天数的日报移入归档（不支持归档的后端无需处理）"""
+        return 0
+
+
+def create_report_storage(config) -> ReportStorageBase:
+    """
+    按配置创建日报存储
+
+    Args:
+        config: 配置对象，使用 DAILY_REPORT_STORAGE_BACKEND 选择后端（json / sharded / sqlite）
+
+    Returns:
+        ReportStorageBase: 日报存储实例
+    """
+    backend = getattr(config, 'DAILY_REPORT_STORAGE_BACKEND', 'json')
 
-class DailyReportStorage:
-    """日报存储管理器"""
+    if backend == 'sqlite':
+        from utils.sqlite_report_storage import SQLiteReportStorage
+        return SQLiteReportStorage(config.DAILY_REPORT_SQLITE_FILE)
 
-    def __init__(self, storage_file: str = "data/daily_reports.json"):
+    if backend == 'sharded':
+        from utils.sharded_report_storage import ShardedReportStorage
+        return ShardedReportStorage(
+            config.DAILY_REPORT_SHARD_DIR,
+            cache_size=config.DAILY_REPORT_SHARD_CACHE_SIZE,
+            legacy_file=config.DAILY_REPORT_STORAGE_FILE,
+            flush_interval=config.DAILY_REPORT_FLUSH_INTERVAL,
+            flush_max_pending=config.DAILY_REPORT_FLUSH_MAX_PENDING,
+            archive_dir=config.DAILY_REPORT_ARCHIVE_DIR,
+            snapshot_format=config.DATA_SNAPSHOT_FORMAT
+        )
+
+    if backend != 'json':
+        logger.warning(f"未知的日报存储后端: {backend}，使用 JSON 文件存储")
+
+    return DailyReportStorage(
+        config.DAILY_REPORT_STORAGE_FILE,
+        journal=config.DAILY_REPORT_STORAGE_JOURNAL,
+        compact_threshold=config.DAILY_REPORT_JOURNAL_COMPACT_THRESHOLD,
+        flush_interval=config.DAILY_REPORT_FLUSH_INTERVAL,
+        flush_max_pending=config.DAILY_REPORT_FLUSH_MAX_PENDING,
+        archive_dir=config.DAILY_REPORT_ARCHIVE_DIR,
+        snapshot_format=config.DATA_SNAPSHOT_FORMAT
+    )
+
+
+def _months_between(start: str, end: str) -> List[str]:
+    """日期范围覆盖的月份 (YYYY-MM)，升序"""
+    months = []
+    year, month = int(start[:4]), int(start[5:7])
+    while f"{year:04d}-{month:02d}" <= end[:7]:
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+class DailyReportStorage(ReportStorageBase):
+    """日报存储管理器（JSON 文件）"""
+
+    def __init__(self, storage_file: str = "data/daily_reports.json",
+                 journal: bool = False, compact_threshold: int = 200,
+                 flush_interval: float = 0, flush_max_pending: int = 20,
+                 archive_dir: str = None, snapshot_format: str = FORMAT_JSON):
         """
         初始化存储管理器
 
         Args:
             storage_file: 存储文件路径
+            journal: 是否启用日志模式（变更追加写入日志文件，后台压缩快照）
+            compact_threshold: 日志模式下触发快照压缩的日志条数
+            flush_interval: 延迟落盘间隔（秒），0 表示每次变更同步写盘（日志模式下不生效）
+            flush_max_pending: 延迟落盘模式下累计多少次变更后立即写盘
+            archive_dir: 历史归档目录，为 None 时不读写归档
+            snapshot_format: 数据文件格式（json / compact / msgpack），读取时自动识别
         """
         self.storage_file = storage_file
+        self.snapshot_format = snapshot_format
         self.reports_by_date = {}  # {date: {'reports': [...], 'sent': False}}
-        self.lock = Lock()  # 线程锁，确保并发安全
+        self._message_index = {}  # {message_id: (date, position)}，撤回时直接定位
+        self._sender_index = {}  # {sender: 有序日期元组}，查询个人历史时直接定位
+        self._snapshots = {}  # {date: DaySnapshot}，读取方直接使用，不等待写盘
+        self._sorted_dates = ()  # 已加载日期的有序元组，按日期范围查询时二分定位
+        self.lock = Lock()  # 写入锁，串行化变更和落盘
+
+        # 多进程共享数据文件：写入时持有文件锁，文件版本变化说明被其他进程改过
+        self.lock_file = f"{self.storage_file}{LOCK_SUFFIX}"
+        self._versions = {}  # {path: file_version}，最近一次加载或保存时的文件版本
+        self._pending_ops = []  # 延迟落盘模式下尚未写盘的变更，重新加载后需要重放
+
+        # 超过保留期的日报移入按月压缩的归档，查询时仍可读取
+        self.archive = ReportArchive(archive_dir) if archive_dir else None
+
+        # 日志模式：每次变更只追加一行紧凑 JSON，不再全量重写快照
+        self.journal = journal
+        self.compact_threshold = max(1, compact_threshold)
+        self.journal_file = f"{self.storage_file}.log"
+        self._journal_fp = None
+        self._journal_entries = 0
+        self._compacting = False
+
+        # 延迟落盘：变更只标记为脏，由后台线程合并写盘
+        self._flusher = None
+        if flush_interval > 0 and not journal:
+            self._flusher = WriteBehindFlusher(
+                self._flush_pending,
+                interval=flush_interval,
+                max_pending=flush_max_pending,
+                name='report-storage-flusher'
+            )
 
         # 确保数据目录存在
         os.makedirs(os.path.dirname(self.storage_file), exist_ok=True)
 
         # 加载已有数据
         self._load_reports()
+        if self.journal:
+            self._replay_journal()
+        self._publish_all()
 
     def add_report(self, report: Dict, report_date: str = None) -> bool:
         """
         添加日报
 
         Args:
-            report: 日报数据字典
+            report: 日报（DailyReport 或字典）
             report_date: 日报日期 (YYYY-MM-DD)，默认为今天
 
         Returns:
@@ -48,55 +221,47 @@ class DailyReportStorage:
         """
         try:
             with self.lock:
+                report = DailyReport.coerce(report)
                 # 确定日报日期
                 if report_date is None:
-                    report_date = report.get('date', datetime.now().strftime('%Y-%m-%d'))
-
-                # 确保该日期的数据结构存在
-                if report_date not in self.reports_by_date:
-                    self.reports_by_date[report_date] = {
-                        'reports': [],
-                        'sent': False
-                    }
-
-                # 获取该日期的日报列表
-                reports = self.reports_by_date[report_date]['reports']
-
-                # 去重：检查是否已存在相同发送者的日报
-                sender = report.get('sender', '未知')
-                existing_report = None
-                for idx, existing in enumerate(reports):
-                    if existing.get('sender') == sender:
-                        existing_report = idx
-                        break
+                    report_date = report.date or datetime.now().strftime('%Y-%m-%d')
 
                 # 添加/更新时间戳和日期
-                report['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                report['date'] = report_date
-                
-                # 如果报告中有 message_id，记录它
-                message_id = report.get('message_id', None)
-
-                if existing_report is not None:
-                    # 如果已存在，更新（覆盖）旧的日报
-                    reports[existing_report] = report
-                    logger.info(f"更新日报 - 发送者: {sender}, 日期: {report_date}, 当前共 {len(reports)} 条" + 
-                               (f", message_id: {message_id}" if message_id else ""))
-                else:
-                    # 如果不存在，添加新日报
-                    reports.append(report)
-                    logger.info(f"添加日报成功 - 发送者: {sender}, 日期: {report_date}, 当前共 {len(reports)} 条" +
-                               (f", message_id: {message_id}" if message_id else ""))
-
-                # 保存到文件
-                self._save_reports()
+                report.timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                report.date = report_date
 
+                self._commit({'op': 'add', 'date': report_date, 'report': report})
                 return True
 
         except Exception as e:
             logger.error(f"添加日报失败: {str(e)}", exc_info=True)
             return False
 
+    def add_reports(self, reports: List[DailyReport]) -> int:
+        """
+        批量导入日报（历史补录），整批只落盘一次
+
+        与 add_report 不同，保留日报自带的 date 和 timestamp（必须带 date）；
+        同一发送者同一天已有不早于它的日报时跳过，补录旧消息不会覆盖实时收到的日报。
+
+        Args:
+            reports: 日报列表（DailyReport 或字典）
+
+        Returns:
+            int: 实际写入的日报条数，失败时为 0
+        """
+        try:
+            with self.lock:
+                ops = []
+                for report in reports:
+                    report = DailyReport.coerce(report)
+                    ops.append({'op': 'add', 'date': report.date, 'report': report, 'keep_newer': True})
+                return self._commit_batch(ops)
+
+        except Exception as e:
+            logger.error(f"批量导入日报失败: {str(e)}", exc_info=True)
+            return 0
+
     def get_all_reports(self, date: str = None) -> List[Dict]:
         """
         获取指定日期的所有日报
@@ -107,13 +272,8 @@ class DailyReportStorage:
         Returns:
             List[Dict]: 日报列表
         """
-        with self.lock:
-            if date is None:
-                date = datetime.now().strftime('%Y-%m-%d')
-
-            if date in self.reports_by_date:
-                return self.reports_by_date[date]['reports'].copy()
-            return []
+        snapshot = self._get_snapshot(date)
+        return list(snapshot.reports) if snapshot else []
 
     def get_report_count(self, date: str = None) -> int:
         """
@@ -125,13 +285,8 @@ class DailyReportStorage:
         Returns:
             int: 日报数量
         """
-        with self.lock:
-            if date is None:
-                date = datetime.now().strftime('%Y-%m-%d')
-
-            if date in self.reports_by_date:
-                return len(self.reports_by_date[date]['reports'])
-            return 0
+        snapshot = self._get_snapshot(date)
+        return len(snapshot.reports) if snapshot else 0
 
     def is_sent(self, date: str = None) -> bool:
         """
@@ -143,13 +298,101 @@ class DailyReportStorage:
         Returns:
             bool: 是否已发送
         """
-        with self.lock:
-            if date is None:
-                date = datetime.now().strftime('%Y-%m-%d')
+        snapshot = self._get_snapshot(date)
+        return snapshot.sent if snapshot else False
 
-            if date in self.reports_by_date:
-                return self.reports_by_date[date]['sent']
-            return False
+    def iter_reports(self, start: str, end: str, sender: str = None) -> Iterator[Dict]:
+        """
+        按日期顺序逐条返回日期范围内的日报（含归档）
+
+        按月取数据，调用方提前结束迭代时不会读取后面的月份。
+
+        Args:
+            start: 开始日期 (YYYY-MM-DD)，包含
+            end: 结束日期 (YYYY-MM-DD)，包含
+            sender: 只返回该发送者的日报，默认全部
+
+        Returns:
+            Iterator[Dict]: 日报（每条都带有 date 字段）
+        """
+        for _, snapshot in self._iter_snapshots(start, end):
+            for report in snapshot.reports:
+                if sender is None or report.sender == sender:
+                    yield report
+
+    def count_by_date(self, start: str, end: str) -> Dict[str, int]:
+        """
+        统计日期范围内每天的日报数量（没有日报的日期不出现）
+
+        Args:
+            start: 开始日期 (YYYY-MM-DD)，包含
+            end: 结束日期 (YYYY-MM-DD)，包含
+
+        Returns:
+            Dict[str, int]: {date: 日报数量}，按日期升序
+        """
+        return {
+            date: len(snapshot.reports)
+            for date, snapshot in self._iter_snapshots(start, end)
+            if snapshot.reports
+        }
+
+    def get_report_by_sender(self, sender: str, date: str = None) -> Optional[Dict]:
+        """
+        获取某人某天的日报
+
+        Args:
+            sender: 发送者姓名
+            date: 日期 (YYYY-MM-DD)，默认为今天
+
+        Returns:
+            Optional[Dict]: 日报，未提交时为 None
+        """
+        snapshot = self._get_snapshot(date)
+        return snapshot.by_sender.get(sender) if snapshot else None
+
+    def get_sender_dates(self, sender: str, start: str = None, end: str = None) -> List[str]:
+        """
+        获取某人提交过日报的日期（升序，含归档）
+
+        分片存储的在线部分只包含已加载到内存的月份。
+
+        Args:
+            sender: 发送者姓名
+            start: 开始日期 (YYYY-MM-DD)，包含，默认不限
+            end: 结束日期 (YYYY-MM-DD)，包含，默认不限
+
+        Returns:
+            List[str]: 日期列表
+        """
+        self._prepare_read(datetime.now().strftime('%Y-%m-%d'))
+        dates = self._sender_index.get(sender, ())
+        low = bisect_left(dates, start) if start else 0
+        high = bisect_right(dates, end) if end else len(dates)
+        archived = self._archived_sender_dates(sender, start, end)
+        if not archived:
+            return list(dates[low:high])
+        return sorted(set(dates[low:high]).union(archived))
+
+    def get_user_history(self, sender: str, limit: int = 10) -> List[Dict]:
+        """
+        获取某人最近的日报（从新到旧）
+
+        Args:
+            sender: 发送者姓名
+            limit: 最多返回条数
+
+        Returns:
+            List[Dict]: 日报列表
+        """
+        history = []
+        for date in reversed(self.get_sender_dates(sender)):
+            if len(history) >= limit:
+                break
+            report = self.get_report_by_sender(sender, date)
+            if report is not None:
+                history.append(report)
+        return history
 
     def mark_as_sent(self, date: str = None) -> bool:
         """
@@ -166,14 +409,7 @@ class DailyReportStorage:
                 if date is None:
                     date = datetime.now().strftime('%Y-%m-%d')
 
-                if date not in self.reports_by_date:
-                    self.reports_by_date[date] = {
-                        'reports': [],
-                        'sent': False
-                    }
-
-                self.reports_by_date[date]['sent'] = True
-                self._save_reports()
+                self._commit({'op': 'sent', 'date': date})
                 logger.info(f"已标记 {date} 的日报为已发送")
                 return True
 
@@ -193,17 +429,9 @@ class DailyReportStorage:
         """
         try:
             with self.lock:
-                # 遍历所有日期的日报
-                for date, data in self.reports_by_date.items():
-                    reports = data['reports']
-                    for idx, report in enumerate(reports):
-                        if report.get('message_id') == message_id:
-                            sender = report.get('sender', '未知')
-                            reports.pop(idx)
-                            self._save_reports()
-                            logger.info(f"已删除撤回的日报 - 发送者: {sender}, 日期: {date}, message_id: {message_id}")
-                            return True
-                
+                if self._commit({'op': 'remove', 'message_id': message_id}):
+                    return True
+
                 logger.warning(f"未找到 message_id 为 {message_id} 的日报")
                 return False
 
@@ -226,9 +454,9 @@ class DailyReportStorage:
                 if date is None:
                     date = datetime.now().strftime('%Y-%m-%d')
 
+                self._ensure_loaded(date)
                 if date in self.reports_by_date:
-                    del self.reports_by_date[date]
-                    self._save_reports()
+                    self._commit({'op': 'clear', 'date': date})
                     logger.info(f"已清空 {date} 的日报")
                 return True
 
@@ -236,29 +464,72 @@ class DailyReportStorage:
             logger.error(f"清空日报失败: {str(e)}", exc_info=True)
             return False
 
+    def archive_reports(self, keep_days: int) -> int:
+        """
+        把超过保留天数的日报移入归档，并压缩在线数据
+
+        按月处理：先写入归档，再从在线数据中删除，中途失败时数据至少保留在一处。
+
+        Args:
+            keep_days: 在线保留的天数（含今天）
+
+        Returns:
+            int: 归档的天数
+        """
+        if self.archive is None:
+            logger.warning("未配置日报归档目录，跳过归档")
+            return 0
+
+        cutoff = (datetime.now() - timedelta(days=max(1, keep_days) - 1)).strftime('%Y-%m-%d')
+        archived = 0
+        try:
+            for month in self._archivable_months(cutoff):
+                with self.lock:
+                    self._sync_with_disk()
+                    self._ensure_loaded(f"{month}-01")
+                    days = {
+                        date: data
+                        for date, data in self.reports_by_date.items()
+                        if date.startswith(month) and date < cutoff
+                    }
+                    if not days:
+                        continue
+                    self.archive.write_days(days)
+                    self._commit_batch([{'op': 'clear', 'date': date} for date in sorted(days)])
+                archived += len(days)
+
+            if archived:
+                self.flush()
+                self.compact()
+                logger.info(f"日报归档完成 - 共 {archived} 天（保留 {cutoff} 及之后的日报）")
+        except Exception as e:
+            logger.error(f"日报归档失败: {str(e)}", exc_info=True)
+
+        return archived
+
+    def _archivable_months(self, cutoff: str) -> List[str]:
+        """早于保留期的日报所在月份"""
+        with self.lock:
+            return sorted({date[:7] for date in self.reports_by_date if date < cutoff})
+
     def _load_reports(self):
         """从文件加载日报数据"""
         try:
-            if os.path.exists(self.storage_file):
-                with open(self.storage_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-
-                    # 兼容旧格式（单日期）
-                    if 'date' in data and 'reports' in data:
-                        # 旧格式：{'date': 'YYYY-MM-DD', 'reports': [...]}
-                        date = data['date']
-                        self.reports_by_date = {
-                            date: {
-                                'reports': data.get('reports', []),
-                                'sent': data.get('sent', False)
-                            }
-                        }
-                        logger.info(f"加载旧格式数据，转换为新格式: {date} - {len(data.get('reports', []))} 条")
-                    else:
-                        # 新格式：{'YYYY-MM-DD': {'reports': [...], 'sent': False}, ...}
-                        self.reports_by_date = data
-                        total_reports = sum(len(v['reports']) for v in self.reports_by_date.values())
-                        logger.info(f"加载 {len(self.reports_by_date)} 个日期的日报，共 {total_reports} 条")
+            self._record_version(self.storage_file)
+            # 主文件损坏时自动回退到 .bak 备份
+            data = read_data(self.storage_file)
+            if data is not None:
+                # 兼容旧格式（单日期）
+                if 'date' in data and 'reports' in data:
+                    # 旧格式：{'date': 'YYYY-MM-DD', 'reports': [...]}
+                    date = data['date']
+                    self.reports_by_date = self._decode_days({date: data})
+                    logger.info(f"加载旧格式数据，转换为新格式: {date} - {len(data.get('reports', []))} 条")
+                else:
+                    # 新格式：{'YYYY-MM-DD': {'reports': [...], 'sent': False}, ...}
+                    self.reports_by_date = self._decode_days(data)
+                    total_reports = sum(len(v['reports']) for v in self.reports_by_date.values())
+                    logger.info(f"加载 {len(self.reports_by_date)} 个日期的日报，共 {total_reports} 条")
             else:
                 logger.info("未找到历史日报文件，初始化空数据")
                 self.reports_by_date = {}
@@ -267,15 +538,531 @@ class DailyReportStorage:
             logger.error(f"加载日报数据失败: {str(e)}", exc_info=True)
             self.reports_by_date = {}
 
-    def _save_reports(self):
-        """保存日报数据到文件"""
+        self._rebuild_indexes()
+
+    @staticmethod
+    def _decode_days(days: Dict) -> Dict:
+        """把文件中的 {date: {'reports': [...], 'sent': bool}} 转为 DailyReport 记录（旧字段名在这里归一化）"""
+        return {
+            date: {
+                'reports': [DailyReport.from_dict(report) for report in data.get('reports', [])],
+                'sent': data.get('sent', False)
+            }
+            for date, data in days.items()
+        }
+
+    def _save_reports(self) -> bool:
+        """
+        保存日报数据到文件
+
+        Returns:
+            bool: 是否保存成功
+        """
         try:
             # 直接保存新格式：{date: {'reports': [...], 'sent': False}}
-            with open(self.storage_file, 'w', encoding='utf-8') as f:
-                json.dump(self.reports_by_date, f, ensure_ascii=False, indent=2)
+            atomic_write_data(self.storage_file, self.reports_by_date, self.snapshot_format)
+            self._record_version(self.storage_file)
+            return True
 
         except Exception as e:
             logger.error(f"保存日报数据失败: {str(e)}", exc_info=True)
+            return False
+
+    def _reset_indexes(self):
+        """清空 message_id 索引和发送者索引"""
+        self._message_index = {}
+        self._sender_index = {}
+
+    def _rebuild_indexes(self):
+        """根据内存数据重建 message_id 索引和发送者索引"""
+        self._message_index = {}
+        sender_dates = {}
+        for date, data in self.reports_by_date.items():
+            for position, report in enumerate(data['reports']):
+                if report.message_id:
+                    self._message_index[report.message_id] = (date, position)
+                sender_dates.setdefault(report.sender, []).append(date)
+        self._sender_index = {sender: tuple(sorted(dates)) for sender, dates in sender_dates.items()}
+
+    def _index_date(self, date: str, reports: List[DailyReport]):
+        """把某日期的日报加入索引"""
+        for position, report in enumerate(reports):
+            if report.message_id:
+                self._message_index[report.message_id] = (date, position)
+            self._index_sender(report.sender, date)
+
+    def _unindex_date(self, date: str, reports: List[DailyReport]):
+        """把某日期的日报移出索引"""
+        for report in reports:
+            if report.message_id:
+                self._message_index.pop(report.message_id, None)
+            self._unindex_sender(report.sender, date)
+
+    def _index_sender(self, sender: str, date: str):
+        """记录某人在某天提交了日报（整体替换元组，读取方无需加锁）"""
+        dates = self._sender_index.get(sender, ())
+        position = bisect_left(dates, date)
+        if position < len(dates) and dates[position] == date:
+            return
+        self._sender_index[sender] = dates[:position] + (date,) + dates[position:]
+
+    def _unindex_sender(self, sender: str, date: str):
+        """移除某人在某天的提交记录"""
+        dates = self._sender_index.get(sender, ())
+        position = bisect_left(dates, date)
+        if position < len(dates) and dates[position] == date:
+            remaining = dates[:position] + dates[position + 1:]
+            if remaining:
+                self._sender_index[sender] = remaining
+            else:
+                self._sender_index.pop(sender, None)
+
+    def _ensure_loaded(self, date: str):
+        """确保某日期的数据已在内存中（全量加载时无需处理，分片存储按需加载）"""
+        pass
+
+    def _snapshot_ready(self, date: str) -> bool:
+        """某日期的快照是否可以不加锁直接读取（全量加载时总是可以）"""
+        return True
+
+    def _get_snapshot(self, date: str = None) -> Optional[DaySnapshot]:
+        """
+        读取某日期的只读快照
+
+        快照由写入方在锁内整体替换，读取方拿到的是某一时刻的完整数据，
+        因此摘要、提醒等读取操作不会被写盘阻塞。
+        """
+        if date is None:
+            date = datetime.now().strftime('%Y-%m-%d')
+
+        self._prepare_read(date)
+        snapshot = self._snapshots.get(date)
+
+        if snapshot is None and self.archive is not None:
+            archived = self.archive.load_day(date)
+            if archived is not None:
+                snapshot = make_snapshot(archived['reports'], archived['sent'])
+        return snapshot
+
+    def _prepare_read(self, date: str):
+        """确保读取某日期前内存数据可用且未过期"""
+        if self._snapshot_ready(date):
+            # 文件被其他进程改过时重新加载；本进程写入方正持有锁时它会负责合并，
+            # 读取方直接使用当前快照，不等待写盘
+            if self._is_stale() and self.lock.acquire(blocking=False):
+                try:
+                    self._sync_with_disk()
+                finally:
+                    self.lock.release()
+        else:
+            with self.lock:
+                self._sync_with_disk()
+                self._ensure_loaded(date)
+
+    def _iter_snapshots(self, start: str, end: str) -> Iterator[Tuple[str, DaySnapshot]]:
+        """按月遍历日期范围内的快照（在线数据优先，其余从归档读取）"""
+        for month in _months_between(start, end):
+            low, high = max(start, f"{month}-01"), min(end, f"{month}-31")
+            self._prepare_read(low)
+
+            dates = self._sorted_dates
+            snapshots = self._snapshots
+            live = dates[bisect_left(dates, low):bisect_right(dates, high)]
+
+            archived = {}
+            if self.archive is not None:
+                archived = {
+                    date: data for date, data in self.archive.load_month(month).items()
+                    if low <= date <= high
+                }
+
+            for date in sorted(set(live).union(archived)):
+                snapshot = snapshots.get(date)
+                if snapshot is None and date in archived:
+                    snapshot = make_snapshot(archived[date]['reports'], archived[date]['sent'])
+                if snapshot is not None:
+                    yield date, snapshot
+
+    def _publish(self, date: str):
+        """根据内存数据重新发布某日期的快照（调用方需持有 self.lock）"""
+        data = self.reports_by_date.get(date)
+        if data is None:
+            if self._snapshots.pop(date, None) is not None:
+                self._sorted_dates = tuple(d for d in self._sorted_dates if d != date)
+        else:
+            if date not in self._snapshots:
+                dates = list(self._sorted_dates)
+                insort(dates, date)
+                self._sorted_dates = tuple(dates)
+            self._snapshots[date] = make_snapshot(data['reports'], data['sent'])
+
+    def _publish_all(self):
+        """重新发布所有已加载日期的快照"""
+        self._snapshots = {
+            date: make_snapshot(data['reports'], data['sent'])
+            for date, data in self.reports_by_date.items()
+        }
+        self._sorted_dates = tuple(sorted(self._snapshots))
+
+    def _commit(self, op: Dict) -> bool:
+        """
+        应用一次变更并持久化（调用方需持有 self.lock）
+
+        Args:
+            op: 变更操作，见 _apply
+
+        Returns:
+            bool: 数据是否发生变化
+        """
+        return self._commit_batch([op]) > 0
+
+    def _commit_batch(self, ops: List[Dict]) -> int:
+        """
+        应用一批变更并只持久化一次（调用方需持有 self.lock）
+
+        持有文件锁期间先合并其他进程写入的数据，再应用本次变更并写盘，
+        多个进程同时写入也不会互相覆盖。
+
+        Args:
+            ops: 变更操作列表，见 _apply
+
+        Returns:
+            int: 实际产生变化的操作数
+        """
+        with file_lock(self.lock_file):
+            self._sync_with_disk()
+            changed = [op for op in ops if self._apply(op)]
+            if changed:
+                # 先发布快照再落盘，读取方立即看到新数据
+                for date in {op['date'] for op in changed}:
+                    self._publish(date)
+                if self.journal:
+                    for op in changed:
+                        self._append_journal(op)
+                elif self._flusher is not None:
+                    self._pending_ops.extend(changed)
+                    self._flusher.mark_dirty()
+                else:
+                    self._save_reports()
+        return len(changed)
+
+    def _data_files(self) -> List[str]:
+        """当前内存数据对应的数据文件（日志模式只支持单进程写入，不做检查）"""
+        return [] if self.journal else [self.storage_file]
+
+    def _is_stale(self) -> bool:
+        """数据文件是否已被其他进程改过"""
+        return any(file_version(path) != self._versions.get(path) for path in self._data_files())
+
+    def _record_version(self, path: str):
+        """记录文件当前版本（加载前或写盘后调用）"""
+        self._versions[path] = file_version(path)
+
+    def _sync_with_disk(self):
+        """数据文件被其他进程改过时重新加载（调用方需持有 self.lock）"""
+        if self._is_stale():
+            logger.info("检测到日报数据被其他进程修改，重新加载")
+            self._reload_from_disk()
+
+    def _reload_from_disk(self):
+        """重新加载数据文件，并重放本进程尚未写盘的变更"""
+        self._load_reports()
+        for op in self._pending_ops:
+            self._apply(op)
+        self._publish_all()
+
+    def flush(self) -> bool:
+        """
+        立即写入延迟落盘模式下尚未写入的变更
+
+        Returns:
+            bool: 是否成功
+        """
+        if self._flusher is None:
+            return True
+
+        self._flusher.flush()
+        return self._flusher.pending == 0
+
+    def close(self) -> bool:
+        """
+        停止后台落盘线程并写入剩余变更（进程退出前调用，等待正在进行的写盘完成）
+
+        Returns:
+            bool: 是否已全部写入
+        """
+        if self._flusher is None:
+            return True
+
+        self._flusher.stop()
+        return self._flusher.pending == 0
+
+    def _flush_pending(self):
+        """
+        延迟落盘回调：在锁内合并其他进程的变更后保存当前数据
+
+        写盘失败时抛出异常，由调度器保留待写入计数，尚未写盘的变更也继续保留，下次重试。
+        """
+        with self.lock, file_lock(self.lock_file):
+            self._sync_with_disk()
+            if not self._save_reports():
+                raise IOError(f"日报数据未能写入: {self.storage_file}")
+            self._pending_ops = []
+
+    def _apply(self, op: Dict) -> bool:
+        """
+        将一次变更应用到内存数据（调用方需持有 self.lock）
+
+        支持的操作：
+            {'op': 'add', 'date': ..., 'report': {...}}  添加或覆盖同一发送者的日报
+                （带 'keep_newer': True 时，已有日报的时间戳不早于它则不覆盖）
+            {'op': 'sent', 'date': ...}                 标记已发送
+            {'op': 'remove', 'message_id': ...}         按 message_id 删除日报
+            {'op': 'clear', 'date': ...}                清空某日日报
+
+        Returns:
+            bool: 数据是否发生变化
+        """
+        kind = op.get('op')
+
+        if kind == 'add':
+            report_date = op['date']
+            report = DailyReport.coerce(op['report'])
+            self._ensure_loaded(report_date)
+
+            # 确保该日期的数据结构存在（已归档的日期带上归档中的日报）
+            if report_date not in self.reports_by_date:
+                self._add_day(report_date, self._archived_day(report_date))
+
+            # 获取该日期的日报列表
+            reports = self.reports_by_date[report_date]['reports']
+
+            # 去重：检查是否已存在相同发送者的日报
+            sender = report.sender
+            existing_report = None
+            for idx, existing in enumerate(reports):
+                if existing.sender == sender:
+                    existing_report = idx
+                    break
+
+            if (existing_report is not None and op.get('keep_newer')
+                    and (reports[existing_report].timestamp or '') >= (report.timestamp or '')):
+                return False
+
+            # 如果报告中有 message_id，记录它
+            message_id = report.message_id
+
+            if existing_report is not None:
+                # 如果已存在，更新（覆盖）旧的日报
+                old_message_id = reports[existing_report].message_id
+                if old_message_id:
+                    self._message_index.pop(old_message_id, None)
+                reports[existing_report] = report
+                if message_id:
+                    self._message_index[message_id] = (report_date, existing_report)
+                logger.info(f"更新日报 - 发送者: {sender}, 日期: {report_date}, 当前共 {len(reports)} 条" +
+                           (f", message_id: {message_id}" if message_id else ""))
+            else:
+                # 如果不存在，添加新日报
+                reports.append(report)
+                if message_id:
+                    self._message_index[message_id] = (report_date, len(reports) - 1)
+                self._index_sender(sender, report_date)
+                logger.info(f"添加日报成功 - 发送者: {sender}, 日期: {report_date}, 当前共 {len(reports)} 条" +
+                           (f", message_id: {message_id}" if message_id else ""))
+            return True
+
+        if kind == 'sent':
+            date = op['date']
+            self._ensure_loaded(date)
+            day = self.reports_by_date.get(date) or self._archived_day(date)
+            if day['sent']:
+                # 重复标记不产生变更，也不触发写盘
+                return False
+            if date not in self.reports_by_date:
+                self._add_day(date, day)
+            day['sent'] = True
+            return True
+
+        if kind == 'remove':
+            message_id = op['message_id']
+            location = self._message_index.pop(message_id, None)
+            if location is None:
+                return False
+
+            date, idx = location
+            reports = self.reports_by_date[date]['reports']
+            removed = reports.pop(idx)
+            self._unindex_sender(removed.sender, date)
+
+            # 后面的日报位置前移一位
+            for position in range(idx, len(reports)):
+                later_message_id = reports[position].message_id
+                if later_message_id:
+                    self._message_index[later_message_id] = (date, position)
+
+            op['date'] = date  # 记录实际所在日期，便于按日期落盘
+            logger.info(f"已删除撤回的日报 - 发送者: {removed.sender or '未知'}, 日期: {date}, message_id: {message_id}")
+            return True
+
+        if kind == 'clear':
+            self._ensure_loaded(op['date'])
+            data = self.reports_by_date.pop(op['date'], None)
+            if data is None:
+                return False
+            self._unindex_date(op['date'], data['reports'])
+            return True
+
+        logger.warning(f"未知的日报变更操作: {kind}")
+        return False
+
+    def _archived_day(self, date: str) -> Dict:
+        """
+        新建某日期在线数据时的初始内容
+
+        日期已归档时复制归档中的日报，否则在线数据会遮住同一天的归档内容（读取时在线数据优先）。
+        """
+        archived = self.archive.load_day(date) if self.archive is not None else None
+        if archived is None:
+            return {'reports': [], 'sent': False}
+        return {'reports': list(archived['reports']), 'sent': archived['sent']}
+
+    def _archived_sender_dates(self, sender: str, start: str = None, end: str = None) -> List[str]:
+        """某人在归档中提交过日报的日期（有在线数据的日期以在线数据为准，不计入）"""
+        if self.archive is None:
+            return []
+
+        snapshots = self._snapshots
+        dates = []
+        for month in self.archive.list_months():
+            if (start and month < start[:7]) or (end and month > end[:7]):
+                continue
+            for date, data in self.archive.load_month(month).items():
+                if (start and date < start) or (end and date > end) or date in snapshots:
+                    continue
+                if any(report.sender == sender for report in data['reports']):
+                    dates.append(date)
+        return dates
+
+    def _add_day(self, date: str, day: Dict):
+        """加入某日期的在线数据并建立索引（调用方需持有 self.lock）"""
+        self.reports_by_date[date] = day
+        self._index_date(date, day['reports'])
+
+    def _append_journal(self, op: Dict):
+        """追加一条变更到日志文件，达到阈值后触发后台压缩（调用方需持有 self.lock）"""
+        try:
+            if self._journal_fp is None:
+                self._journal_fp = open(self.journal_file, 'a', encoding='utf-8')
+
+            self._journal_fp.write(json.dumps(op, ensure_ascii=False, separators=(',', ':'), default=json_default) + '\n')
+            self._journal_fp.flush()
+            self._journal_entries += 1
+
+        except Exception as e:
+            logger.error(f"写入日报日志失败: {str(e)}", exc_info=True)
+            # 日志不可写时退回全量保存，保证数据不丢
+            self._save_reports()
+            return
+
+        if self._journal_entries >= self.compact_threshold and not self._compacting:
+            self._start_compaction()
+
+    def _replay_journal(self):
+        """启动时在快照基础上重放日志（包括上次未完成压缩的日志段）"""
+        replayed = 0
+        for path in (f"{self.journal_file}.compacting", self.journal_file):
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            op = json.loads(line)
+                        except ValueError:
+                            # 崩溃时最后一行可能只写了一半，跳过即可
+                            logger.warning(f"跳过损坏的日报日志行: {path}")
+                            continue
+                        self._apply(op)
+                        replayed += 1
+            except Exception as e:
+                logger.error(f"重放日报日志失败: {str(e)}", exc_info=True)
+
+        if replayed:
+            logger.info(f"已重放 {replayed} 条日报日志")
+            # 把重放结果合并进快照，日志从空开始
+            self.compact()
+
+    def _start_compaction(self):
+        """切换日志段并在后台线程写入新快照（调用方需持有 self.lock）"""
+        snapshot = self._rotate_journal()
+        if snapshot is None:
+            return
+
+        self._compacting = True
+        Thread(target=self._finish_compaction, args=(snapshot,), daemon=True).start()
+
+    def _rotate_journal(self) -> Optional[Dict]:
+        """
+        将当前日志改名为压缩段并返回内存数据的浅拷贝（调用方需持有 self.lock）
+
+        日报记录写入后不再原地修改，所以只需复制到列表一层即可安全地在锁外序列化。
+        """
+        pending = f"{self.journal_file}.compacting"
+        if os.path.exists(pending):
+            # 上一次压缩还未完成
+            return None
+
+        if self._journal_fp is not None:
+            self._journal_fp.close()
+            self._journal_fp = None
+        if os.path.exists(self.journal_file):
+            os.replace(self.journal_file, pending)
+        self._journal_entries = 0
+
+        return {
+            date: {'reports': list(data['reports']), 'sent': data['sent']}
+            for date, data in self.reports_by_date.items()
+        }
+
+    def _finish_compaction(self, snapshot: Dict):
+        """在锁外写入快照，成功后删除已合并的日志段"""
+        try:
+            self._write_snapshot(snapshot)
+            pending = f"{self.journal_file}.compacting"
+            if os.path.exists(pending):
+                os.remove(pending)
+            logger.info(f"日报快照压缩完成 - {len(snapshot)} 个日期")
+        except Exception as e:
+            logger.error(f"日报快照压缩失败: {str(e)}", exc_info=True)
+        finally:
+            self._compacting = False
+
+    def _write_snapshot(self, snapshot: Dict):
+        """原子写入快照，避免压缩中途崩溃留下半个快照"""
+        atomic_write_data(self.storage_file, snapshot, self.snapshot_format)
+
+    def compact(self) -> bool:
+        """
+        立即把日志合并进快照（同步执行，可用于退出前收尾）
+
+        Returns:
+            bool: 是否压缩成功
+        """
+        if not self.journal:
+            return True
+
+        with self.lock:
+            snapshot = self._rotate_journal()
+        if snapshot is None:
+            return False
+
+        self._compacting = True
+        self._finish_compaction(snapshot)
+        return not os.path.exists(f"{self.journal_file}.compacting")
 
 
 # 测试代码
@@ -307,9 +1094,9 @@ if __name__ == '__main__':
     print(f"当前日报数量: {storage.get_report_count()}")
     print("\n所有日报:")
     for i, report in enumerate(storage.get_all_reports(), 1):
-        print(f"\n{i}. {report['sender']}:")
-        print(f"   跟踪问题: {report['tracking_issues']}")
-        print(f"   时间: {report['timestamp']}")
+        print(f"\n{i}. {report.sender}:")
+        print(f"   跟踪问题: {report.tracking_issues}")
+        print(f"   时间: {report.timestamp}")
 
     # 清理测试文件
     if os.path.exists("test_reports.json"):
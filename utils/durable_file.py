@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+持久化文件写入工具
+先写临时文件并 fsync，再原子替换目标文件，同时保留上一版本为 .bak，
+避免进程崩溃或磁盘写满时把数据文件截断
+
+数据快照支持三种格式（读取时自动识别，切换格式无需迁移）：
+- json: 缩进 JSON，便于直接查看（默认）
+- compact: 无缩进 JSON，体积更小、编码更快
+- msgpack: 二进制格式，需要安装 msgpack，未安装时退回 compact
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from threading import Lock
+from typing import Any, Callable
+
+from utils.file_lock import LOCK_SUFFIX, file_lock
+
+try:
+    import msgpack
+except ImportError:  # 可选依赖
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+BACKUP_SUFFIX = '.bak'
+
+FORMAT_JSON = 'json'
+FORMAT_COMPACT = 'compact'
+FORMAT_MSGPACK = 'msgpack'
+SNAPSHOT_FORMATS = (FORMAT_JSON, FORMAT_COMPACT, FORMAT_MSGPACK)
+
+_msgpack_warned = False
+
+# 每个文件最近一次写入内容的摘要，用于跳过内容未变化的写入
+_last_digests = {}
+_digests_lock = Lock()
+
+
+def atomic_write_bytes(path: str, data: bytes, backup: bool = True) -> bool:
+    """
+    原子写入文件
+
+    Args:
+        path: 目标文件路径
+        data: 文件内容
+        backup: 是否把被替换的旧文件保留为 <path>.bak
+
+    Returns:
+        bool: 是否实际写入（内容与现有文件相同时跳过写入，返回 False）
+    """
+    abs_path = os.path.abspath(path)
+    digest = hashlib.sha1(data).hexdigest()
+
+    if _is_unchanged(abs_path, data, digest):
+        return False
+
+    directory = os.path.dirname(abs_path)
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(abs_path)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if backup and os.path.exists(abs_path):
+            _roll_backup(abs_path)
+
+        os.replace(tmp_path, abs_path)
+        _fsync_directory(directory)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    _remember(abs_path, digest)
+    return True
+
+
+def atomic_write_json(path: str, data: Any, indent: int = 2, backup: bool = True) -> bool:
+    """
+    以 JSON 格式原子写入文件
+
+    Args:
+        path: 目标文件路径
+        data: 可 JSON 序列化的数据
+        indent: 缩进，None 表示紧凑格式
+        backup: 是否保留 .bak
+
+    Returns:
+        bool: 是否实际写入
+    """
+    content = json.dumps(data, ensure_ascii=False, indent=indent)
+    return atomic_write_bytes(path, content.encode('utf-8'), backup=backup)
+
+
+def encode_data(data: Any, fmt: str = FORMAT_JSON) -> bytes:
+    """
+    按指定格式编码数据
+
+    Args:
+        data: 待编码数据
+        fmt: json / compact / msgpack
+
+    Returns:
+        bytes: 编码结果
+    """
+    global _msgpack_warned
+
+    if fmt == FORMAT_MSGPACK:
+        if msgpack is not None:
+            return msgpack.packb(data, use_bin_type=True, default=json_default)
+        if not _msgpack_warned:
+            logger.warning("未安装 msgpack，数据快照改用紧凑 JSON 格式（pip install msgpack）")
+            _msgpack_warned = True
+        fmt = FORMAT_COMPACT
+
+    if fmt == FORMAT_COMPACT:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=json_default).encode('utf-8')
+
+    if fmt != FORMAT_JSON:
+        logger.warning(f"未知的数据快照格式: {fmt}，使用 JSON 格式")
+    return json.dumps(data, ensure_ascii=False, indent=2, default=json_default).encode('utf-8')
+
+
+def json_default(obj: Any) -> Any:
+    """json.dumps / msgpack 的 default 钩子：带 to_dict() 的记录对象（如 DailyReport）按字典编码"""
+    to_dict = getattr(obj, 'to_dict', None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+    return to_dict()
+
+
+def decode_data(content: bytes) -> Any:
+    """
+    解码数据，自动识别 JSON 和 msgpack
+
+    JSON 快照总是以 { 或 [ 开头，msgpack 的 map/array 头字节不会与之冲突。
+
+    Args:
+        content: 文件内容
+
+    Returns:
+        Any: 解码后的数据
+
+    Raises:
+        ValueError: 内容损坏或缺少 msgpack 依赖
+    """
+    head = content.lstrip()[:1]
+    if head in (b'{', b'[', b''):
+        return json.loads(content.decode('utf-8'))
+
+    if msgpack is None:
+        raise ValueError("文件为 msgpack 格式，但未安装 msgpack")
+    try:
+        return msgpack.unpackb(content, raw=False)
+    except Exception as e:
+        raise ValueError(f"msgpack 解码失败: {e}") from e
+
+
+def atomic_write_data(path: str, data: Any, fmt: str = FORMAT_JSON, backup: bool = True) -> bool:
+    """
+    按指定格式原子写入数据快照
+
+    Args:
+        path: 目标文件路径
+        data: 待写入数据
+        fmt: json / compact / msgpack
+        backup: 是否保留 .bak
+
+    Returns:
+        bool: 是否实际写入
+    """
+    return atomic_write_bytes(path, encode_data(data, fmt), backup=backup)
+
+
+def read_data(path: str, default: Any = None) -> Any:
+    """
+    读取数据快照（自动识别格式），主文件缺失或损坏时回退到 .bak
+
+    Args:
+        path: 文件路径
+        default: 两个文件都不可用时的返回值
+
+    Returns:
+        Any: 解析后的数据
+    """
+    return _read_with_backup(path, default, decode_data)
+
+
+def read_json(path: str, default: Any = None) -> Any:
+    """
+    读取 JSON 文件，主文件缺失或损坏时回退到 .bak
+
+    Args:
+        path: 文件路径
+        default: 两个文件都不可用时的返回值
+
+    Returns:
+        Any: 解析后的数据
+    """
+    return _read_with_backup(path, default, lambda content: json.loads(content.decode('utf-8')))
+
+
+def _read_with_backup(path: str, default: Any, decode: Callable[[bytes], Any]) -> Any:
+    for candidate in (path, path + BACKUP_SUFFIX):
+        if not os.path.exists(candidate):
+            continue
+        try:
+            with open(candidate, 'rb') as f:
+                data = decode(f.read())
+            if candidate != path:
+                logger.warning(f"⚠️  {path} 不可用，已从备份 {candidate} 恢复")
+            return data
+        except ValueError as e:
+            logger.error(f"文件内容损坏: {candidate} - {e}")
+
+    return default
+
+
+def update_json(path: str, mutate: Callable[[Any], None], default: Any = None, indent: int = 2) -> Any:
+    """
+    跨进程安全地读-改-写 JSON 文件
+
+    在文件锁内重新读取最新内容再修改，避免覆盖其他进程刚写入的数据。
+
+    Args:
+        path: 文件路径
+        mutate: 原地修改数据的函数
+        default: 文件不存在时的初始数据
+        indent: 缩进
+
+    Returns:
+        Any: 修改后的数据
+    """
+    with file_lock(path + LOCK_SUFFIX):
+        data = read_json(path, default)
+        mutate(data)
+        atomic_write_json(path, data, indent=indent)
+    return data
+
+
+def _is_unchanged(abs_path: str, data: bytes, digest: str) -> bool:
+    """判断待写入内容是否与磁盘上的文件相同"""
+    try:
+        stat = os.stat(abs_path)
+    except OSError:
+        return False
+
+    if stat.st_size != len(data):
+        return False
+
+    with _digests_lock:
+        last = _last_digests.get(abs_path)
+
+    # 文件自上次写入后未被改动，直接比较摘要
+    if last is not None and last[1] == stat.st_mtime_ns:
+        return last[0] == digest
+
+    # 进程内没有记录（如刚启动）或文件被外部改动过，读取磁盘内容比较
+    with open(abs_path, 'rb') as f:
+        unchanged = f.read() == data
+    if unchanged:
+        _remember(abs_path, digest)
+    return unchanged
+
+
+def _remember(abs_path: str, digest: str):
+    """记录文件当前内容的摘要和修改时间"""
+    try:
+        mtime_ns = os.stat(abs_path).st_mtime_ns
+    except OSError:
+        return
+    with _digests_lock:
+        _last_digests[abs_path] = (digest, mtime_ns)
+
+
+def _roll_backup(abs_path: str):
+    """把当前文件保留为 .bak（优先用硬链接，避免复制整个文件）"""
+    backup_path = abs_path + BACKUP_SUFFIX
+    link_tmp = backup_path + '.tmp'
+    try:
+        if os.path.exists(link_tmp):
+            os.remove(link_tmp)
+        os.link(abs_path, link_tmp)
+        os.replace(link_tmp, backup_path)
+    except OSError:
+        shutil.copy2(abs_path, backup_path)
+
+
+def _fsync_directory(directory: str):
+    """同步目录项，确保 rename 本身落盘（Windows 不支持，忽略）"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
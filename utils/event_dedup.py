@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+事件去重
+飞书长连接和 /webhook 回调都可能重复投递同一个事件，
+处理前先按 event_id / message_id 查重，重复投递直接丢弃
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Optional
+
+from utils.durable_file import atomic_write_data, read_data
+from utils.file_lock import LOCK_SUFFIX, file_lock, file_version
+from utils.write_behind import WriteBehindFlusher
+
+logger = logging.getLogger(__name__)
+
+
+class EventDeduplicator:
+    """最近处理过的事件ID缓存（带过期时间和容量上限，定期落盘，重启后仍然有效）"""
+
+    def __init__(self, storage_file: str = "data/processed_events.json", ttl: float = 86400,
+                 max_entries: int = 5000, flush_interval: float = 5.0):
+        """
+        初始化去重缓存
+
+        Args:
+            storage_file: 持久化文件路径，为空时只在内存中去重
+            ttl: 事件ID保留时长（秒）
+            max_entries: 最多保留的事件ID数量，超出时淘汰最早的记录
+            flush_interval: 延迟落盘间隔（秒）
+        """
+        self.storage_file = storage_file
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        # {event_key: 过期时间戳}，写入顺序即过期顺序，淘汰时只需检查队首
+        self._entries = OrderedDict()
+        self.lock = Lock()
+        self._flusher = None
+        self._version = None  # 最近一次读取或写入时的文件版本，变化说明其他进程写入过
+
+        if storage_file:
+            self._load()
+            self._flusher = WriteBehindFlusher(self._save, interval=flush_interval, name='event-dedup-flush')
+
+    def is_duplicate(self, *keys: Optional[str]) -> bool:
+        """
+        检查事件是否已处理过，未处理过则记录下来
+
+        同一事件可能只带其中一个ID（如重新推送时 event_id 变化而 message_id 不变），任一ID命中即视为重复。
+        内存中没有记录时，如果文件被其他进程（如另一个 worker）写过，先合并文件中的记录再判断。
+
+        Args:
+            keys: 事件ID、消息ID等（空值会被忽略）
+
+        Returns:
+            bool: 是否为重复投递
+        """
+        keys = [key for key in keys if key]
+        if not keys:
+            return False
+
+        now = time.time()
+        with self.lock:
+            self._expire(now)
+            if any(key in self._entries for key in keys):
+                return True
+            if self._refresh_from_disk(now) and any(key in self._entries for key in keys):
+                return True
+
+            expire_at = now + self.ttl
+            for key in keys:
+                self._entries[key] = expire_at
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        if self._flusher is not None:
+            self._flusher.mark_dirty()
+        return False
+
+    def flush(self) -> bool:
+        """立即写入尚未落盘的记录"""
+        if self._flusher is None:
+            return True
+        self._flusher.flush()
+        return self._flusher.pending == 0
+
+    def close(self) -> bool:
+        """停止后台落盘线程并写入剩余记录（进程退出前调用）"""
+        if self._flusher is None:
+            return True
+        self._flusher.stop()
+        return self._flusher.pending == 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expire(self, now: float):
+        """淘汰已过期的记录（调用方需持有 self.lock）"""
+        while self._entries:
+            key, expire_at = next(iter(self._entries.items()))
+            if expire_at > now:
+                break
+            self._entries.popitem(last=False)
+
+    def _load(self):
+        """从文件加载未过期的记录"""
+        try:
+            with self.lock:
+                self._refresh_from_disk(time.time())
+            if self._entries:
+                logger.info(f"加载已处理事件记录 {len(self._entries)} 条")
+        except Exception as e:
+            logger.error(f"加载已处理事件记录失败: {str(e)}", exc_info=True)
+
+    def _refresh_from_disk(self, now: float) -> bool:
+        """
+        文件版本变化时合并文件中的记录（调用方需持有 self.lock）
+
+        Returns:
+            bool: 是否读取了文件
+        """
+        if not self.storage_file:
+            return False
+        version = file_version(self.storage_file)
+        if version is None or version == self._version:
+            return False
+        try:
+            self._merge(read_data(self.storage_file, default={}), now)
+        except Exception as e:
+            logger.error(f"读取已处理事件记录失败: {str(e)}", exc_info=True)
+        self._version = version
+        return True
+
+    def _merge(self, data: Dict[str, float], now: float):
+        """把文件中未过期的记录合并到内存，保持按过期时间排序（调用方需持有 self.lock）"""
+        merged = {key: expire_at for key, expire_at in self._entries.items() if expire_at > now}
+        for key, expire_at in data.items():
+            if expire_at > now and expire_at > merged.get(key, 0):
+                merged[key] = expire_at
+        entries = sorted(merged.items(), key=lambda item: item[1])
+        self._entries = OrderedDict(entries[-self.max_entries:])
+
+    def _save(self):
+        """
+        写入文件
+
+        长连接服务和 webhook 服务（或多个 worker）可能共用同一个文件，写入前合并文件中其他进程记录的事件，
+        合并结果同时更新到内存。
+        """
+        with file_lock(self.storage_file + LOCK_SUFFIX):
+            data = read_data(self.storage_file, default={})
+            with self.lock:
+                self._merge(data, time.time())
+                entries = dict(self._entries)
+            atomic_write_data(self.storage_file, entries, backup=False)
+            with self.lock:
+                self._version = file_version(self.storage_file)
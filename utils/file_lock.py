@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跨进程文件锁
+多个进程（gunicorn 多 worker、命令行脚本）读-改-写同一个 JSON 文件时，
+用 fcntl 建议锁串行化写入，并通过文件版本判断内存数据是否已被其他进程改过
+"""
+
+import logging
+import os
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，单进程部署时不需要跨进程锁
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+LOCK_SUFFIX = '.lock'
+
+
+@contextmanager
+def file_lock(lock_path: str, shared: bool = False):
+    """
+    获取跨进程建议锁（阻塞直到拿到锁）
+
+    同一进程内的线程并发仍需调用方自己的线程锁保护，这里只负责进程之间的互斥。
+
+    Args:
+        lock_path: 锁文件路径（一般为数据文件路径加 .lock）
+        shared: 是否为共享锁（只读场景），默认排他锁
+    """
+    if fcntl is None:
+        yield
+        return
+
+    directory = os.path.dirname(lock_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(lock_path, 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def file_version(path: str) -> Optional[Tuple[int, int, int]]:
+    """
+    获取文件版本标识
+
+    数据文件都通过原子替换写入，每次写入 inode 都会变化，
+    结合修改时间和大小即可判断文件是否被其他进程改过。
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        Optional[Tuple[int, int, int]]: (inode, mtime_ns, size)，文件不存在时为 None
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
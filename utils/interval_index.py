@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+区间索引
+把若干区间按端点切成互不重叠的小段，每段预先记录覆盖它的区间，
+查询某个点落在哪些区间（刺探查询）只需一次二分查找
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable, Optional, Tuple
+
+
+class IntervalIndex:
+    """
+    只读区间索引（数据变化时整体重建）
+
+    区间为左闭右开 [start, end)，end 为 None 表示没有结束；端点只需可比较（如 YYYY-MM-DD 字符串）。
+    每个区间会登记到它覆盖的每个小段上，适合区间数量不大、查询远多于变更的场景。
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[Any, Optional[Any], Any]] = ()):
+        """
+        构建索引
+
+        Args:
+            intervals: (start, end, payload) 列表，同一小段内按传入顺序返回 payload
+        """
+        intervals = [(start, end, payload) for start, end, payload in intervals
+                     if end is None or start < end]
+        bounds = sorted({start for start, _, _ in intervals} |
+                        {end for _, end, _ in intervals if end is not None})
+
+        segments = [[] for _ in bounds]
+        for start, end, payload in intervals:
+            first = bisect_left(bounds, start)
+            last = len(bounds) if end is None else bisect_left(bounds, end)
+            for position in range(first, last):
+                segments[position].append(payload)
+
+        self._bounds = bounds
+        self._segments = [tuple(segment) for segment in segments]
+        self._size = len(intervals)
+
+    def stab(self, point: Any) -> Tuple:
+        """
+        查询覆盖某个点的所有区间
+
+        Args:
+            point: 查询点
+
+        Returns:
+            Tuple: 覆盖该点的区间的 payload
+        """
+        position = bisect_right(self._bounds, point) - 1
+        if position < 0:
+            return ()
+        return self._segments[position]
+
+    def __len__(self) -> int:
+        return self._size
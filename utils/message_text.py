@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+消息文本提取
+把飞书 text / post 消息的 content 转成纯文本，实时消息处理和历史补录共用
+"""
+
+import json
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def extract_text_from_post(content_json: dict) -> str:
+    """
+    从 post 类型消息中提取纯文本内容
+
+    Args:
+        content_json: post 消息的 content JSON 对象
+
+    Returns:
+        str: 提取的纯文本
+    """
+    try:
+        text_parts = []
+
+        # post 消息可能有两种结构：
+        # 1. 直接格式: {"title": "", "content": [[...]]}
+        # 2. 多语言格式: {"zh_cn": {"title": "", "content": [[...]]}}
+
+        # 先尝试多语言格式
+        lang_content = content_json.get('zh_cn') or content_json.get('en_us')
+
+        # 如果没有多语言格式，使用直接格式
+        if not lang_content:
+            lang_content = content_json
+
+        # 获取标题
+        title = lang_content.get('title', '')
+        if title and title.strip():
+            text_parts.append(title.strip())
+
+        # 获取内容块
+        content_blocks = lang_content.get('content', [])
+
+        # 遍历每个段落
+        for paragraph in content_blocks:
+            # 跳过空段落或None
+            if not paragraph:
+                # 空段落也要保留（作为段落分隔）
+                text_parts.append('')
+                continue
+
+            paragraph_text = []
+
+            # 遍历段落中的每个元素
+            for element in paragraph:
+                if not isinstance(element, dict):
+                    continue
+
+                tag = element.get('tag', '')
+
+                if tag == 'text':
+                    # 纯文本
+                    text = element.get('text', '')
+                    if text:
+                        paragraph_text.append(text)
+                elif tag == 'a':
+                    # 链接
+                    text = element.get('text', '')
+                    if text:
+                        paragraph_text.append(text)
+                elif tag == 'at':
+                    # @某人
+                    text = element.get('text', '')
+                    if text:
+                        paragraph_text.append(text)
+
+            # 合并段落文本
+            if paragraph_text:
+                combined_text = ''.join(paragraph_text)
+                # 只添加非空的段落文本
+                if combined_text.strip():
+                    text_parts.append(combined_text)
+
+        # 用换行符连接所有部分
+        result = '\n'.join(text_parts)
+        
+        # 清理多余的空行（超过2个连续换行符的情况）
+        while '\n\n\n' in result:
+            result = result.replace('\n\n\n', '\n\n')
+        
+        return result.strip()
+
+    except Exception as e:
+        logger.error(f"提取 post 消息文本失败: {str(e)}", exc_info=True)
+        return ""
+
+
+def extract_message_text(message_type: str, content: str) -> Optional[str]:
+    """
+    从消息 content（JSON 字符串）中提取纯文本
+
+    Args:
+        message_type: 消息类型（text / post）
+        content: 消息 content 字段
+
+    Returns:
+        Optional[str]: 纯文本，不支持的消息类型返回 None
+    """
+    if message_type not in ('text', 'post'):
+        return None
+
+    try:
+        content_json = json.loads(content) if content else {}
+    except (TypeError, ValueError):
+        logger.warning(f"消息内容不是有效的 JSON: {str(content)[:100]}")
+        return ""
+
+    if message_type == 'text':
+        return content_json.get('text', '').strip()
+    return extract_text_from_post(content_json).strip()
@@ -7,11 +7,10 @@
 
 import logging
 import json
-import os
 import lark_oapi as lark
 from lark_oapi.api.im.v1 import *
 from typing import List, Set
-from utils.workday_calendar import WorkdayCalendar
+from utils.report_roster import load_roster, normalize_name
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +18,8 @@ logger = logging.getLogger(__name__)
 class ReminderSender:
     """日报提醒发送器"""
 
-    def __init__(self, app_id: str, app_secret: str, required_users: List[str] = None):
+    def __init__(self, app_id: str, app_secret: str, required_users: List[str] = None,
+                 report_storage=None, vacation_mgr=None, workday_calendar=None):
         """
         初始化提醒发送器
 
@@ -27,10 +27,16 @@ class ReminderSender:
             app_id: 飞书应用ID
             app_secret: 飞书应用密钥
             required_users: 需要提交日报的用户ID列表（为None或空表示所有用户）
+            report_storage: 日报存储（为None时使用进程内共享实例）
+            vacation_mgr: 休假管理器（为None时使用进程内共享实例），休假人员不会被提醒
+            workday_calendar: 工作日日历（为None时使用进程内共享实例）
         """
         self.app_id = app_id
         self.app_secret = app_secret
         self.required_users = required_users or []
+        self.report_storage = report_storage
+        self.vacation_mgr = vacation_mgr
+        self.workday_calendar = workday_calendar
         self.client = lark.Client.builder() \
             .app_id(app_id) \
             .app_secret(app_secret) \
@@ -47,41 +53,7 @@ class ReminderSender:
             dict: 用户ID到姓名的映射 {user_id: name}
         """
         try:
-            if os.path.exists(user_names_file):
-                with open(user_names_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    all_users = data.get('映射', {})
-                    
-                    # 优先使用配置文件中的日报白名单
-                    whitelist = data.get('日报白名单', [])
-                    if whitelist:
-                        filtered_users = {
-                            user_id: name.replace('（领导）', '')  # 去除标记
-                            for user_id, name in all_users.items() 
-                            if user_id in whitelist
-                        }
-                        logger.info(f"使用日报白名单，共 {len(filtered_users)} 人需要提交日报")
-                        return filtered_users
-                    
-                    # 如果没有白名单但配置了required_users，使用required_users
-                    if self.required_users:
-                        filtered_users = {
-                            user_id: name.replace('（领导）', '') 
-                            for user_id, name in all_users.items() 
-                            if user_id in self.required_users
-                        }
-                        logger.info(f"使用配置的必需用户列表，过滤后: {len(filtered_users)} 人")
-                        return filtered_users
-                    
-                    # 去除所有姓名中的标记
-                    clean_users = {
-                        user_id: name.replace('（领导）', '')
-                        for user_id, name in all_users.items()
-                    }
-                    return clean_users
-            else:
-                logger.warning(f"用户姓名映射文件不存在: {user_names_file}")
-                return {}
+            return load_roster(user_names_file, self.required_users)
         except Exception as e:
             logger.error(f"读取用户姓名映射文件失败: {str(e)}", exc_info=True)
             return {}
@@ -94,28 +66,44 @@ class ReminderSender:
             reports: 日报列表
 
         Returns:
-            Set[str]: 已提交日报的用户姓名集合
+            Set[str]: 已提交日报的用户姓名集合（与名单一样去除“（领导）”标记）
         """
-        return {report.get('sender', '') for report in reports if report.get('sender')}
+        return {normalize_name(report.get('sender', '')) for report in reports if report.get('sender')}
 
-    def find_missing_users(self, all_users: dict, submitted_users: Set[str]) -> List[tuple]:
+    def find_missing_users(self, all_users: dict, submitted_users: Set[str],
+                           check_date: str = None) -> List[tuple]:
         """
-        找出未提交日报的用户
+        找出未提交日报的用户（跳过当天休假的人）
 
         Args:
             all_users: 所有用户映射 {user_id: name}
             submitted_users: 已提交日报的用户姓名集合
+            check_date: 检查日期 (YYYY-MM-DD)，默认今天
 
         Returns:
             List[tuple]: 未提交日报的用户列表 [(user_id, name), ...]
         """
+        vacation_mgr = self._get_vacation_manager()
         missing_users = []
         for user_id, name in all_users.items():
-            if name not in submitted_users:
-                missing_users.append((user_id, name))
+            if name in submitted_users or vacation_mgr.is_on_vacation(name, check_date):
+                continue
+            missing_users.append((user_id, name))
 
         return missing_users
 
+    def _get_vacation_manager(self):
+        if self.vacation_mgr is None:
+            from utils.services import get_vacation_manager
+            self.vacation_mgr = get_vacation_manager()
+        return self.vacation_mgr
+
+    def _get_workday_calendar(self):
+        if self.workday_calendar is None:
+            from utils.services import get_workday_calendar
+            self.workday_calendar = get_workday_calendar()
+        return self.workday_calendar
+
     def send_reminder(self, chat_id: str, missing_users: List[tuple]) -> bool:
         """
         发送提醒消息到群组，@未提交日报的人
@@ -263,17 +251,16 @@ class ReminderSender:
             List[str]: 被提醒的用户ID列表，非工作日返回空列表
         """
         # 1. 工作日判断
-        calendar = WorkdayCalendar()
+        calendar = self._get_workday_calendar()
         if not calendar.is_workday(check_date):
             logger.info(f"日期 {check_date or '今天'} 不是工作日，跳过日报提醒")
             return []
 
         # 2. 兼容已有调用：未传 reports 时按今天读取
         if reports is None:
-            from utils.daily_report_storage import DailyReportStorage
-            storage = DailyReportStorage()
-            target_date = check_date
-            reports = storage.get_all_reports(target_date)
+            from utils.services import get_report_storage
+            storage = self.report_storage or get_report_storage()
+            reports = storage.get_all_reports(check_date)
 
         # 3. 计算缺失用户并发送提醒
         all_users = self.get_all_users(user_names_file)
@@ -282,7 +269,7 @@ class ReminderSender:
             return []
 
         submitted_users = self.get_submitted_users(reports)
-        missing_users = self.find_missing_users(all_users, submitted_users)
+        missing_users = self.find_missing_users(all_users, submitted_users, check_date)
 
         if not missing_users:
             logger.info("所有人都已提交日报，无需发送提醒")
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日报历史归档
+超过保留期的日报按月写入 gzip 压缩的 JSONL 文件（如 data/archive/2025-10.jsonl.gz），
+每行一天：{"date": ..., "reports": [...], "sent": ...}，查询时仍可读取
+"""
+
+import gzip
+import json
+import logging
+import os
+import re
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional
+
+from utils.daily_report import DailyReport
+from utils.durable_file import atomic_write_bytes, json_default
+from utils.file_lock import LOCK_SUFFIX, file_lock, file_version
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_NAME_PATTERN = re.compile(r'^(\d{4}-\d{2})\.jsonl\.gz$')
+
+
+class ReportArchive:
+    """日报归档（按月 gzip JSONL）"""
+
+    def __init__(self, archive_dir: str = "data/archive", cache_size: int = 2):
+        """
+        初始化归档
+
+        Args:
+            archive_dir: 归档文件目录
+            cache_size: 内存中缓存的归档月份数量
+        """
+        self.archive_dir = archive_dir
+        self.cache_size = max(1, cache_size)
+        self._cache = OrderedDict()  # {month: (file_version, {date: data})}
+        self.lock = Lock()
+
+    def _archive_file(self, month: str) -> str:
+        return os.path.join(self.archive_dir, f"{month}.jsonl.gz")
+
+    def list_months(self) -> List[str]:
+        """已归档的月份（升序）"""
+        if not os.path.isdir(self.archive_dir):
+            return []
+        return sorted(
+            match.group(1)
+            for match in (ARCHIVE_NAME_PATTERN.match(name) for name in os.listdir(self.archive_dir))
+            if match
+        )
+
+    def load_day(self, date: str) -> Optional[Dict]:
+        """
+        读取某天的归档数据
+
+        Args:
+            date: 日期 (YYYY-MM-DD)
+
+        Returns:
+            Optional[Dict]: {'reports': [DailyReport, ...], 'sent': bool}，未归档时为 None
+        """
+        return self.load_month(date[:7]).get(date)
+
+    def load_month(self, month: str) -> Dict[str, Dict]:
+        """
+        读取某月的归档数据（带缓存，文件变化时重新读取）
+
+        Args:
+            month: 月份 (YYYY-MM)
+
+        Returns:
+            Dict[str, Dict]: {date: {'reports': [DailyReport, ...], 'sent': bool}}
+        """
+        path = self._archive_file(month)
+        version = file_version(path)
+        if version is None:
+            return {}
+
+        with self.lock:
+            cached = self._cache.get(month)
+            if cached is not None and cached[0] == version:
+                self._cache.move_to_end(month)
+                return cached[1]
+
+        try:
+            days = self._read_file(path)
+        except Exception as e:
+            logger.error(f"读取日报归档失败: {path} - {str(e)}", exc_info=True)
+            return {}
+
+        with self.lock:
+            self._cache[month] = (version, days)
+            self._cache.move_to_end(month)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return days
+
+    def write_days(self, days: Dict[str, Dict]) -> int:
+        """
+        把若干天的日报合并进归档
+
+        同一天已有归档时按发送者合并，新数据覆盖旧数据，重复归档不会丢失内容。
+
+        Args:
+            days: {date: {'reports': [...], 'sent': bool}}
+
+        Returns:
+            int: 归档的天数
+        """
+        by_month = {}
+        for date, data in days.items():
+            by_month.setdefault(date[:7], {})[date] = data
+
+        for month, month_days in sorted(by_month.items()):
+            path = self._archive_file(month)
+            with file_lock(path + LOCK_SUFFIX):
+                merged = self._read_file(path) if os.path.exists(path) else {}
+                for date, data in month_days.items():
+                    merged[date] = self._merge_day(merged.get(date), data)
+
+                lines = [
+                    json.dumps({'date': date, 'reports': data['reports'], 'sent': data['sent']},
+                               ensure_ascii=False, separators=(',', ':'), default=json_default)
+                    for date, data in sorted(merged.items())
+                ]
+                # mtime=0 让相同内容压缩出相同字节，内容未变时跳过写盘
+                content = gzip.compress(('\n'.join(lines) + '\n').encode('utf-8'), mtime=0)
+                atomic_write_bytes(path, content)
+            logger.info(f"已归档 {month} 的 {len(month_days)} 天日报")
+
+        return len(days)
+
+    @staticmethod
+    def _merge_day(archived: Optional[Dict], data: Dict) -> Dict:
+        """合并同一天的归档数据和新数据"""
+        if archived is None:
+            return {'reports': list(data['reports']), 'sent': data.get('sent', False)}
+
+        reports = OrderedDict((r.get('sender'), r) for r in archived['reports'])
+        for report in data['reports']:
+            reports[report.get('sender')] = report
+        return {
+            'reports': list(reports.values()),
+            'sent': archived.get('sent', False) or data.get('sent', False)
+        }
+
+    @staticmethod
+    def _read_file(path: str) -> Dict[str, Dict]:
+        """读取归档文件（文件损坏时抛出异常，避免用不完整的数据覆盖归档）"""
+        days = {}
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                days[entry['date']] = {
+                    'reports': [DailyReport.from_dict(report) for report in entry['reports']],
+                    'sent': entry.get('sent', False)
+                }
+        return days
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+历史日报补录
+机器人停机期间或新部署之前发到群里的日报不会经过实时消息处理，
+这里从飞书消息历史（分页拉取）或本地导出的 JSON 文件中逐条读取消息，
+识别出日报后按批写入日报存储
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import requests
+
+from utils.daily_report import DailyReport
+from utils.daily_report_parser import DailyReportParser
+from utils.daily_report_storage import ReportStorageBase
+from utils.message_text import extract_message_text
+
+logger = logging.getLogger(__name__)
+
+FEISHU_BASE_URL = 'https://open.feishu.cn'
+
+
+class FeishuMessageSource:
+    """通过 IM 历史消息接口分页读取群消息（按发送时间升序）"""
+
+    def __init__(self, app_id: str, app_secret: str, chat_id: str,
+                 start_time: Optional[int] = None, end_time: Optional[int] = None,
+                 page_size: int = 50, base_url: str = FEISHU_BASE_URL, timeout: float = 10):
+        """
+        初始化消息源
+
+        Args:
+            app_id: 飞书应用ID
+            app_secret: 飞书应用密钥
+            chat_id: 群组ID
+            start_time: 起始时间（秒级时间戳），包含
+            end_time: 结束时间（秒级时间戳），包含
+            page_size: 每页消息数（接口上限 50）
+            base_url: 开放平台地址（测试时可指向本地模拟服务）
+            timeout: 单次请求超时（秒）
+        """
+        self.app_id = app_id
+        self.app_secret = app_secret
+        self.chat_id = chat_id
+        self.start_time = start_time
+        self.end_time = end_time
+        self.page_size = min(max(1, page_size), 50)
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._token = None
+
+    def __iter__(self) -> Iterator[Dict]:
+        token = self._get_tenant_token()
+        params = {
+            'container_id_type': 'chat',
+            'container_id': self.chat_id,
+            'sort_type': 'ByCreateTimeAsc',
+            'page_size': self.page_size,
+        }
+        if self.start_time is not None:
+            params['start_time'] = str(self.start_time)
+        if self.end_time is not None:
+            params['end_time'] = str(self.end_time)
+
+        page = 0
+        while True:
+            data = self._request('GET', '/open-apis/im/v1/messages', token=token, params=params)
+            page += 1
+            items = data.get('items') or []
+            logger.info(f"拉取历史消息第 {page} 页，{len(items)} 条")
+            yield from items
+
+            if not data.get('has_more') or not data.get('page_token'):
+                return
+            params['page_token'] = data['page_token']
+
+    def get_user(self, open_id: str) -> Dict:
+        """
+        按 open_id 查询用户（历史消息接口的发送者只有 open_id，姓名映射按 user_id 记录）
+
+        Args:
+            open_id: 用户 open_id
+
+        Returns:
+            Dict: 用户信息（含 user_id、name），查询失败时为空字典
+        """
+        try:
+            data = self._request('GET', f'/open-apis/contact/v3/users/{open_id}', token=self._get_tenant_token(),
+                                 params={'user_id_type': 'open_id'})
+            return data.get('user') or {}
+        except Exception as e:
+            logger.warning(f"查询用户失败: {open_id} - {str(e)}")
+            return {}
+
+    def _get_tenant_token(self) -> str:
+        if self._token:
+            return self._token
+        data = self._request('POST', '/open-apis/auth/v3/tenant_access_token/internal', json_body={
+            'app_id': self.app_id,
+            'app_secret': self.app_secret,
+        }, unwrap=False)
+        self._token = data['tenant_access_token']
+        return self._token
+
+    def _request(self, method: str, path: str, token: str = None, params: Dict = None,
+                 json_body: Dict = None, unwrap: bool = True) -> Dict:
+        """发起请求并检查业务错误码，unwrap 时返回 data 字段"""
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        response = self.session.request(method, self.base_url + path, params=params, json=json_body,
+                                        headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        body = response.json()
+        if body.get('code', 0) != 0:
+            raise RuntimeError(f"飞书接口返回错误: {path} - {body.get('code')} {body.get('msg')}")
+        return (body.get('data') or {}) if unwrap else body
+
+
+def iter_export_file(path: str) -> Iterator[Dict]:
+    """
+    读取本地导出的消息文件
+
+    支持接口原始响应（{"data": {"items": [...]}}）、{"items": [...]} 或消息列表，
+    也支持每行一条消息的 JSONL 文件。
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        Iterator[Dict]: 消息（与 IM 历史消息接口的 items 结构相同）
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        # 每行一条消息
+        data = [json.loads(line) for line in content.splitlines() if line.strip()]
+
+    if isinstance(data, dict):
+        data = (data.get('data') or data).get('items', [])
+    yield from data
+
+
+class ReportBackfiller:
+    """历史日报补录器"""
+
+    def __init__(self, storage: ReportStorageBase, parser: DailyReportParser = None,
+                 user_names: Dict[str, str] = None, batch_size: int = 100,
+                 user_lookup: Callable[[str], Dict] = None):
+        """
+        初始化补录器
+
+        Args:
+            storage: 日报存储
+            parser: 日报解析器
+            user_names: 发送者ID到姓名的映射（user_names.json 的“映射”，open_id 也可以放进来）
+            batch_size: 每批写入的日报数
+            user_lookup: 按 open_id 查询用户的函数（如 FeishuMessageSource.get_user），
+                用查到的 user_id 在 user_names 中找姓名，找不到时用查到的 name
+        """
+        self.storage = storage
+        self.parser = parser or DailyReportParser()
+        self.user_names = dict(user_names or {})
+        self.batch_size = max(1, batch_size)
+        self.user_lookup = user_lookup
+
+    def run(self, messages: Iterable[Dict]) -> Dict[str, int]:
+        """
+        逐条处理消息并按批写入日报
+
+        同一批内同一发送者同一天只保留最新的一份；存储中已有不早于它的日报时由存储跳过，
+        避免用旧消息覆盖实时收到的日报。
+
+        Args:
+            messages: 消息迭代器（FeishuMessageSource 或 iter_export_file）
+
+        Returns:
+            Dict[str, int]: 统计 {'messages': 读取消息数, 'reports': 写入日报数, 'skipped': 跳过的日报数}
+        """
+        stats = {'messages': 0, 'reports': 0, 'skipped': 0}
+        batch = {}  # {(date, sender): DailyReport}
+
+        for message in messages:
+            stats['messages'] += 1
+            report = self.parse_message(message)
+            if report is None:
+                continue
+
+            key = (report.date, report.sender)
+            existing = batch.get(key)
+            if existing is not None and existing.timestamp >= report.timestamp:
+                continue
+
+            batch[key] = report
+            if len(batch) >= self.batch_size:
+                self._write(batch, stats)
+
+        if batch:
+            self._write(batch, stats)
+
+        logger.info(f"历史日报补录完成 - 读取 {stats['messages']} 条消息，写入 {stats['reports']} 份日报，"
+                    f"跳过 {stats['skipped']} 份")
+        return stats
+
+    def parse_message(self, message: Dict) -> Optional[DailyReport]:
+        """
+        把一条历史消息解析为日报
+
+        Args:
+            message: IM 历史消息接口返回的消息
+
+        Returns:
+            Optional[DailyReport]: 日报，不是日报时为 None
+        """
+        if message.get('deleted'):
+            return None
+
+        body = message.get('body') or {}
+        text = extract_message_text(message.get('msg_type'), body.get('content'))
+        if not text or not self.parser.is_daily_report(text):
+            return None
+
+        report = self.parser.parse(text, self._sender_name(message.get('sender') or {}))
+        if report is None:
+            return None
+
+        sent_at = datetime.fromtimestamp(int(message.get('create_time') or 0) / 1000)
+        report.date = sent_at.strftime('%Y-%m-%d')
+        report.timestamp = sent_at.strftime('%Y-%m-%d %H:%M:%S')
+        report.message_id = message.get('message_id')
+        return report
+
+    def _sender_name(self, sender: Dict) -> str:
+        sender_id = sender.get('id')
+        if not sender_id:
+            return "未知用户"
+        if sender_id not in self.user_names and self.user_lookup and sender.get('id_type') == 'open_id':
+            # 结果（包括查不到的情况）记入映射，每个发送者只查询一次
+            user = self.user_lookup(sender_id)
+            self.user_names[sender_id] = self.user_names.get(user.get('user_id')) or user.get('name')
+        return self.user_names.get(sender_id) or f"用户_{sender_id[-6:]}"
+
+    def _write(self, batch: Dict, stats: Dict[str, int]):
+        reports: List[DailyReport] = list(batch.values())
+        batch.clear()
+        written = self.storage.add_reports(reports)
+        stats['reports'] += written
+        stats['skipped'] += len(reports) - written
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日报应提交名单
+应提交人员 = user_names.json 中明确配置的名单（日报白名单 / 必需用户）减去当天休假的人，
+按日期缓存，名单文件或休假数据变化时自动失效；没有配置名单时由调用方按固定人数计数
+"""
+
+import logging
+from datetime import datetime
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from utils.durable_file import read_json
+from utils.file_lock import file_version
+from utils.vacation_manager import VacationManager
+
+logger = logging.getLogger(__name__)
+
+LEADER_MARK = '（领导）'
+
+
+def normalize_name(name: str) -> str:
+    """去除姓名中的“（领导）”标记，名单和日报发送者按同一规则比较"""
+    return name.replace(LEADER_MARK, '') if name else name
+
+
+def load_roster(user_names_file: str = 'config/user_names.json', required_users: List[str] = None,
+                include_all: bool = True) -> Dict[str, str]:
+    """
+    读取需要提交日报的用户
+
+    优先使用文件中的“日报白名单”，其次使用 required_users，都没有时为映射中的所有用户。
+
+    Args:
+        user_names_file: 用户姓名映射文件路径
+        required_users: 需要提交日报的用户ID列表
+        include_all: 没有白名单和 required_users 时是否返回映射中的所有用户，为 False 时返回空名单
+
+    Returns:
+        Dict[str, str]: 用户ID到姓名的映射 {user_id: name}（姓名已去除“（领导）”标记）
+    """
+    data = read_json(user_names_file)
+    if data is None:
+        logger.warning(f"用户姓名映射文件不存在: {user_names_file}")
+        return {}
+
+    all_users = data.get('映射', {})
+    allowed = data.get('日报白名单') or required_users
+    if not allowed and not include_all:
+        return {}
+    return {
+        user_id: normalize_name(name)
+        for user_id, name in all_users.items()
+        if not allowed or user_id in allowed
+    }
+
+
+class ReportRoster:
+    """应提交日报人员（按日期缓存）"""
+
+    def __init__(self, vacation_mgr: VacationManager, user_names_file: str = 'config/user_names.json',
+                 required_users: List[str] = None):
+        """
+        初始化名单
+
+        Args:
+            vacation_mgr: 休假管理器
+            user_names_file: 用户姓名映射文件路径
+            required_users: 需要提交日报的用户ID列表（文件中没有日报白名单时使用）
+        """
+        self.vacation_mgr = vacation_mgr
+        self.user_names_file = user_names_file
+        self.required_users = required_users or []
+        # (日期, 名单文件版本, 休假数据版本) -> 应提交人员
+        self._cache_key = None
+        self._cache_value = ()
+        self.lock = Lock()
+
+    def get_expected_users(self, date: str = None) -> Tuple[str, ...]:
+        """
+        获取某天应提交日报的人员（名单减去当天休假的人）
+
+        Args:
+            date: 日期 (YYYY-MM-DD)，默认为今天
+
+        Returns:
+            Tuple[str, ...]: 应提交人员姓名，没有配置名单时为空元组
+        """
+        date = date or datetime.now().strftime('%Y-%m-%d')
+        key = (date, file_version(self.user_names_file), self.vacation_mgr.generation)
+        with self.lock:
+            if key == self._cache_key:
+                return self._cache_value
+
+        try:
+            # 映射中包含领导等不需要提交日报的人，只有明确配置了名单时才按名单计算
+            roster = load_roster(self.user_names_file, self.required_users, include_all=False)
+        except Exception as e:
+            logger.error(f"读取日报名单失败: {str(e)}", exc_info=True)
+            return ()
+
+        names = tuple(dict.fromkeys(roster.values()))
+        expected = tuple(name for name in names if not self.vacation_mgr.is_on_vacation(name, date))
+        if len(expected) < len(names):
+            logger.info(f"应提交日报 {len(expected)} 人（{len(names) - len(expected)} 人休假）")
+
+        with self.lock:
+            self._cache_key, self._cache_value = key, expected
+        return expected
+
+    def get_expected_count(self, date: str = None, default: Optional[int] = None) -> Optional[int]:
+        """
+        获取某天应提交日报的人数
+
+        Args:
+            date: 日期 (YYYY-MM-DD)，默认为今天
+            default: 没有配置名单时返回的人数（如 DAILY_REPORT_EXPECTED_COUNT）
+
+        Returns:
+            Optional[int]: 应提交人数
+        """
+        expected = self.get_expected_users(date)
+        return len(expected) if expected else default
@@ -6,21 +6,23 @@
 """
 
 import logging
-from typing import List, Dict
+from typing import List
 from datetime import datetime
 
+from utils.daily_report import DailyReport
+
 logger = logging.getLogger(__name__)
 
 
 class ReportTableGenerator:
     """日报表格生成器"""
 
-    def generate_html_table(self, reports: List[Dict], date: str = None) -> str:
+    def generate_html_table(self, reports: List[DailyReport], date: str = None) -> str:
         """
         生成HTML表格
 
         Args:
-            reports: 日报列表
+            reports: 日报列表（DailyReport，也接受字典）
             date: 日期，如果为None则使用当前日期
 
         Returns:
@@ -155,12 +157,14 @@ class ReportTableGenerator:
 
         # 添加每条日报
         for report in reports:
+            report = DailyReport.coerce(report)
             sender = self._escape_html(report.get('sender', '未知'))
             # 特殊处理：人员姓名替换（保持连续性）
             if sender == '李尚璋':
                 sender = '蔡绍朋'
             if sender == 'FrankCheng':
                 sender = '成良雨'
+            # 与按字典读取时一致：字段缺失显示“无”，空字符串原样显示
             tracking_issues = self._escape_html(report.get('tracking_issues', '无'))
             work_content = self._escape_html(report.get('work_content', '无'))
             blocks = self._escape_html(report.get('blocks', '无'))
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享服务注册
+进程内每种存储只创建一个实例，所有模块通过这里获取，
+避免各自加载一份数据导致内存浪费和读到过期数据
+"""
+
+import logging
+from threading import RLock
+
+import lark_oapi as lark
+
+from config.config import Config
+from utils.daily_report_storage import ReportStorageBase, create_report_storage
+from utils.event_dedup import EventDeduplicator
+from utils.vacation_manager import VacationManager
+from utils.workday_calendar import WorkdayCalendar
+
+logger = logging.getLogger(__name__)
+
+_instances = {}
+# 工厂函数内部可能依赖其他服务（如 get_config），需要可重入锁
+_lock = RLock()
+
+
+def _get_or_create(name: str, factory):
+    instance = _instances.get(name)
+    if instance is not None:
+        return instance
+
+    with _lock:
+        instance = _instances.get(name)
+        if instance is None:
+            instance = factory()
+            _instances[name] = instance
+            logger.info(f"已创建共享服务: {name}")
+        return instance
+
+
+def get_config() -> Config:
+    """获取共享配置"""
+    return _get_or_create('config', Config)
+
+
+def get_report_storage() -> ReportStorageBase:
+    """获取共享日报存储"""
+    return _get_or_create('report_storage', lambda: create_report_storage(get_config()))
+
+
+def get_vacation_manager() -> VacationManager:
+    """获取共享休假管理器"""
+    return _get_or_create('vacation_manager', lambda: VacationManager(
+        get_config().VACATION_STORAGE_FILE,
+        snapshot_format=get_config().DATA_SNAPSHOT_FORMAT
+    ))
+
+
+def get_event_deduplicator() -> EventDeduplicator:
+    """获取共享事件去重缓存"""
+    return _get_or_create('event_deduplicator', lambda: EventDeduplicator(
+        get_config().EVENT_DEDUP_FILE,
+        ttl=get_config().EVENT_DEDUP_TTL_SECONDS,
+        max_entries=get_config().EVENT_DEDUP_MAX_ENTRIES
+    ))
+
+
+def get_workday_calendar() -> WorkdayCalendar:
+    """获取共享工作日日历（编译好的工作日位图和后台刷新状态在进程内复用）"""
+    return _get_or_create('workday_calendar', lambda: WorkdayCalendar(
+        get_config().HOLIDAY_CACHE_FILE,
+        get_config().HOLIDAY_CONFIG_FILE,
+        api_url=get_config().HOLIDAY_API_URL,
+        cache_ttl=get_config().HOLIDAY_CACHE_TTL_DAYS * 86400 or None,
+        failure_threshold=get_config().HOLIDAY_API_FAILURE_THRESHOLD,
+        failure_cooldown=get_config().HOLIDAY_API_COOLDOWN_SECONDS
+    ))
+
+
+def get_lark_client() -> lark.Client:
+    """获取共享飞书客户端（复用连接和租户令牌，不必每次发消息都重新创建）"""
+    return _get_or_create('lark_client', lambda: lark.Client.builder()
+                          .app_id(get_config().APP_ID)
+                          .app_secret(get_config().APP_SECRET)
+                          .build())
+
+
+def reset_services():
+    """清空已创建的服务（用于测试或重新加载配置）"""
+    with _lock:
+        _instances.clear()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按月分片的日报存储
+每个月一个文件（如 data/reports/2026-02.json），启动时只加载本月和上月，
+更早的月份在查询时按需加载，并由 LRU 缓存控制常驻内存的冷数据数量
+"""
+
+import logging
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Set
+
+from utils.daily_report_storage import DailyReportStorage
+from utils.durable_file import FORMAT_JSON, atomic_write_data, read_data
+from utils.file_lock import LOCK_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+SHARD_NAME_PATTERN = re.compile(r'^(\d{4}-\d{2})\.json$')
+
+
+class ShardedReportStorage(DailyReportStorage):
+    """日报存储管理器（按月分片）"""
+
+    def __init__(self, shard_dir: str = "data/reports", cache_size: int = 6,
+                 legacy_file: str = "data/daily_reports.json",
+                 flush_interval: float = 0, flush_max_pending: int = 20,
+                 archive_dir: str = None, snapshot_format: str = FORMAT_JSON):
+        """
+        初始化存储管理器
+
+        分片存储每次变更只重写所在月份的文件，因此不支持日志模式。
+
+        Args:
+            shard_dir: 分片文件目录
+            cache_size: 常驻内存的历史月份数量上限（本月和上月不计入）
+            legacy_file: 旧的单文件存储路径，分片目录为空时自动拆分迁移
+            flush_interval: 延迟落盘间隔（秒），0 表示每次变更同步写盘
+            flush_max_pending: 延迟落盘模式下累计多少次变更后立即写盘
+            archive_dir: 历史归档目录，为 None 时不读写归档
+            snapshot_format: 分片文件格式（json / compact / msgpack），读取时自动识别
+        """
+        self.shard_dir = shard_dir
+        self.cache_size = max(0, cache_size)
+        self._loaded_months: Set[str] = set()
+        self._cold_months = OrderedDict()  # 历史月份 LRU：{month: None}
+        self._dirty_months: Set[str] = set()
+
+        os.makedirs(self.shard_dir, exist_ok=True)
+
+        super().__init__(legacy_file, journal=False,
+                         flush_interval=flush_interval, flush_max_pending=flush_max_pending,
+                         archive_dir=archive_dir, snapshot_format=snapshot_format)
+        # 所有分片共用一把文件锁，变更可能涉及任意月份
+        self.lock_file = os.path.join(self.shard_dir, f"reports{LOCK_SUFFIX}")
+
+    def _shard_file(self, month: str) -> str:
+        return os.path.join(self.shard_dir, f"{month}.json")
+
+    def _hot_months(self) -> Set[str]:
+        """本月和上月，始终常驻内存"""
+        this_month = datetime.now().replace(day=1)
+        last_month = this_month - timedelta(days=1)
+        return {this_month.strftime('%Y-%m'), last_month.strftime('%Y-%m')}
+
+    def _list_shards(self) -> Set[str]:
+        return {
+            match.group(1)
+            for match in (SHARD_NAME_PATTERN.match(name) for name in os.listdir(self.shard_dir))
+            if match
+        }
+
+    def _ensure_loaded(self, date: str):
+        """按需加载日期所在月份的分片（调用方需持有 self.lock）"""
+        month = date[:7]
+        if month in self._loaded_months:
+            if month in self._cold_months:
+                self._cold_months.move_to_end(month)
+            return
+
+        self._load_shard(month)
+        if month not in self._hot_months():
+            self._cold_months[month] = None
+            self._evict_cold_months()
+
+    def _snapshot_ready(self, date: str) -> bool:
+        """本月和上月常驻内存，可直接读快照；历史月份需加锁按需加载并更新 LRU"""
+        month = date[:7]
+        return month in self._loaded_months and month not in self._cold_months
+
+    def _load_shard(self, month: str):
+        """读取单个月份分片到内存"""
+        try:
+            self._record_version(self._shard_file(month))
+            shard = read_data(self._shard_file(month))
+            if shard is not None:
+                shard = self._decode_days(shard)
+                self.reports_by_date.update(shard)
+                for date, data in shard.items():
+                    self._index_date(date, data['reports'])
+                    self._publish(date)
+                logger.info(f"加载日报分片: {month}")
+        except Exception as e:
+            logger.error(f"加载日报分片失败: {month} - {str(e)}", exc_info=True)
+        self._loaded_months.add(month)
+
+    def _evict_cold_months(self):
+        """淘汰最久未访问的历史月份（未落盘的月份不淘汰）"""
+        hot_months = self._hot_months()
+        for month in list(self._cold_months):
+            if len(self._cold_months) <= self.cache_size:
+                break
+            if month in self._dirty_months:
+                continue
+            del self._cold_months[month]
+            if month in hot_months:
+                # 跨月后原来的冷数据变成了热数据，只是不再参与淘汰
+                continue
+            for date in [d for d in self.reports_by_date if d.startswith(month)]:
+                self._unindex_date(date, self.reports_by_date.pop(date)['reports'])
+                self._publish(date)
+            self._loaded_months.discard(month)
+            self._versions.pop(self._shard_file(month), None)
+            logger.info(f"释放日报分片: {month}")
+
+    def _data_files(self) -> List[str]:
+        return [self._shard_file(month) for month in tuple(self._loaded_months)]
+
+    def _archivable_months(self, cutoff: str) -> List[str]:
+        """包括未加载到内存的历史分片"""
+        months = {month for month in self._list_shards() if month <= cutoff[:7]}
+        return sorted(months | set(super()._archivable_months(cutoff)))
+
+    def _reload_from_disk(self):
+        """丢弃已加载的分片，按启动时的方式重新加载后重放未写盘的变更"""
+        self._loaded_months = set()
+        self._cold_months.clear()
+        self._dirty_months = set()
+        self._versions = {}
+        self._reset_indexes()
+        super()._reload_from_disk()
+
+    def _apply(self, op: Dict) -> bool:
+        changed = super()._apply(op)
+        if changed:
+            self._dirty_months.add(op['date'][:7])
+        return changed
+
+    def _load_reports(self):
+        """
+        只加载本月和上月的分片；分片目录为空时从旧的单文件存储迁移
+
+        message_id 索引和发送者索引只覆盖已加载的月份，撤回的都是近期消息，落在常驻的本月和上月中。
+        """
+        self.reports_by_date = {}
+
+        if not self._list_shards() and os.path.exists(self.storage_file):
+            self._migrate_legacy_file()
+
+        for month in sorted(self._hot_months()):
+            self._load_shard(month)
+
+        total_reports = sum(len(v['reports']) for v in self.reports_by_date.values())
+        logger.info(f"加载日报分片 {len(self._loaded_months)} 个月，{len(self.reports_by_date)} 个日期，共 {total_reports} 条")
+
+    def _migrate_legacy_file(self):
+        """把旧的单文件存储拆分成月份分片（旧文件保留不删除）"""
+        super()._load_reports()
+        self._dirty_months = {date[:7] for date in self.reports_by_date}
+        self._save_reports()
+        logger.info(f"已将 {self.storage_file} 拆分为 {len(self._list_shards())} 个月份分片")
+        self.reports_by_date = {}
+        self._reset_indexes()
+
+    def _save_reports(self) -> bool:
+        """
+        只重写有变更的月份分片
+
+        Returns:
+            bool: 有变更的分片是否全部保存成功（失败的月份保留为待写入）
+        """
+        for month in sorted(self._dirty_months):
+            shard = {
+                date: data
+                for date, data in self.reports_by_date.items()
+                if date.startswith(month)
+            }
+            try:
+                atomic_write_data(self._shard_file(month), shard, self.snapshot_format)
+                self._record_version(self._shard_file(month))
+                self._dirty_months.discard(month)
+            except Exception as e:
+                logger.error(f"保存日报分片失败: {month} - {str(e)}", exc_info=True)
+        return not self._dirty_months
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite 日报存储
+与 DailyReportStorage 提供相同的方法，按日期、发送者和 message_id 建立索引，
+使用 WAL 模式，多个进程可以安全地共享同一个数据库文件
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from typing import List, Dict, Iterator, Optional
+from threading import Lock
+
+from utils.daily_report import DailyReport
+from utils.daily_report_storage import ReportStorageBase, DailyReportStorage
+from utils.durable_file import json_default
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    message_id TEXT,
+    data TEXT NOT NULL
+);
+-- (date, sender) 唯一索引同时覆盖按日期查询，发送者去重直接交给 UPSERT
+CREATE UNIQUE INDEX IF NOT EXISTS idx_reports_date_sender ON reports (date, sender);
+CREATE INDEX IF NOT EXISTS idx_reports_message_id ON reports (message_id);
+-- 按人查询历史日报
+CREATE INDEX IF NOT EXISTS idx_reports_sender_date ON reports (sender, date);
+
+CREATE TABLE IF NOT EXISTS report_days (
+    date TEXT PRIMARY KEY,
+    sent INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class SQLiteReportStorage(ReportStorageBase):
+    """日报存储管理器（SQLite）"""
+
+    def __init__(self, db_file: str = "data/daily_reports.db", timeout: float = 10.0):
+        """
+        初始化存储管理器
+
+        Args:
+            db_file: 数据库文件路径
+            timeout: 等待其他进程释放写锁的秒数
+        """
+        self.db_file = db_file
+        self.lock = Lock()  # 同一连接在线程间共享，需要串行使用
+
+        # 确保数据目录存在
+        os.makedirs(os.path.dirname(self.db_file) or '.', exist_ok=True)
+
+        self.conn = sqlite3.connect(self.db_file, timeout=timeout, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+        logger.info(f"SQLite 日报存储已就绪: {self.db_file}")
+
+    def add_report(self, report: Dict, report_date: str = None) -> bool:
+        """
+        添加日报（同一天同一发送者覆盖旧日报，保留原有顺序）
+
+        Args:
+            report: 日报（DailyReport 或字典）
+            report_date: 日报日期 (YYYY-MM-DD)，默认为今天
+
+        Returns:
+            bool: 是否添加成功
+        """
+        try:
+            with self.lock:
+                report = DailyReport.coerce(report)
+                if report_date is None:
+                    report_date = report.date or datetime.now().strftime('%Y-%m-%d')
+
+                report.timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                report.date = report_date
+
+                with self.conn:
+                    self._upsert(report_date, report)
+                logger.info(f"保存日报成功 - 发送者: {report.sender or '未知'}, 日期: {report_date}")
+                return True
+
+        except Exception as e:
+            logger.error(f"添加日报失败: {str(e)}", exc_info=True)
+            return False
+
+    def add_reports(self, reports: List[DailyReport]) -> int:
+        """
+        批量导入日报（历史补录），整批在一个事务中提交
+
+        保留日报自带的 date 和 timestamp（必须带 date）；
+        同一发送者同一天已有不早于它的日报时跳过，补录旧消息不会覆盖实时收到的日报。
+
+        Args:
+            reports: 日报列表（DailyReport 或字典）
+
+        Returns:
+            int: 实际写入的日报条数，失败时为 0
+        """
+        try:
+            with self.lock, self.conn:
+                count = 0
+                for report in reports:
+                    report = DailyReport.coerce(report)
+                    row = self.conn.execute(
+                        'SELECT data FROM reports WHERE date = ? AND sender = ?',
+                        (report.date, report.sender or '未知')
+                    ).fetchone()
+                    if row and (json.loads(row[0]).get('timestamp') or '') >= (report.timestamp or ''):
+                        continue
+                    self._upsert(report.date, report)
+                    count += 1
+            logger.info(f"批量导入日报 {count} 条")
+            return count
+
+        except Exception as e:
+            logger.error(f"批量导入日报失败: {str(e)}", exc_info=True)
+            return 0
+
+    def get_all_reports(self, date: str = None) -> List[Dict]:
+        """
+        获取指定日期的所有日报
+
+        Args:
+            date: 日期 (YYYY-MM-DD)，默认为今天
+
+        Returns:
+            List[Dict]: 日报列表
+        """
+        if date is None:
+            date = datetime.now().strftime('%Y-%m-%d')
+
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT data FROM reports WHERE date = ? ORDER BY id', (date,)
+            ).fetchall()
+        return [DailyReport.from_dict(json.loads(row[0])) for row in rows]
+
+    def get_report_count(self, date: str = None) -> int:
+        """
+        获取指定日期的日报数量
+
+        Args:
+            date: 日期 (YYYY-MM-DD)，默认为今天
+
+        Returns:
+            int: 日报数量
+        """
+        if date is None:
+            date = datetime.now().strftime('%Y-%m-%d')
+
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT COUNT(*) FROM reports WHERE date = ?', (date,)
+            ).fetchone()
+        return row[0]
+
+    def is_sent(self, date: str = None) -> bool:
+        """
+        检查指定日期的日报是否已发送
+
+        Args:
+            date: 日期 (YYYY-MM-DD)，默认为今天
+
+        Returns:
+            bool: 是否已发送
+        """
+        if date is None:
+            date = datetime.now().strftime('%Y-%m-%d')
+
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT sent FROM report_days WHERE date = ?', (date,)
+            ).fetchone()
+        return bool(row and row[0])
+
+    def iter_reports(self, start: str, end: str, sender: str = None,
+                     page_size: int = 200) -> Iterator[Dict]:
+        """
+        按日期顺序逐条返回日期范围内的日报
+
+        分页查询（按 (date, id) 续查），不会一次把整个范围读进内存，也不会在迭代期间一直占用锁。
+
+        Args:
+            start: 开始日期 (YYYY-MM-DD)，包含
+            end: 结束日期 (YYYY-MM-DD)，包含
+            sender: 只返回该发送者的日报，默认全部
+            page_size: 每次查询的条数
+
+        Returns:
+            Iterator[Dict]: 日报
+        """
+        sql = 'SELECT date, id, data FROM reports WHERE date <= ? AND (date, id) > (?, ?)'
+        if sender is not None:
+            sql += ' AND sender = ?'
+        sql += ' ORDER BY date, id LIMIT ?'
+
+        last = (start, 0)
+        while True:
+            params = [end, last[0], last[1]]
+            if sender is not None:
+                params.append(sender)
+            params.append(page_size)
+
+            with self.lock:
+                rows = self.conn.execute(sql, params).fetchall()
+            for row in rows:
+                yield DailyReport.from_dict(json.loads(row[2]))
+            if len(rows) < page_size:
+                return
+            last = (rows[-1][0], rows[-1][1])
+
+    def count_by_date(self, start: str, end: str) -> Dict[str, int]:
+        """
+        统计日期范围内每天的日报数量（没有日报的日期不出现）
+
+        Args:
+            start: 开始日期 (YYYY-MM-DD)，包含
+            end: 结束日期 (YYYY-MM-DD)，包含
+
+        Returns:
+            Dict[str, int]: {date: 日报数量}，按日期升序
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT date, COUNT(*) FROM reports WHERE date BETWEEN ? AND ? GROUP BY date ORDER BY date',
+                (start, end)
+            ).fetchall()
+        return dict(rows)
+
+    def get_report_by_sender(self, sender: str, date: str = None) -> Optional[Dict]:
+        """
+        获取某人某天的日报
+
+        Args:
+            sender: 发送者姓名
+            date: 日期 (YYYY-MM-DD)，默认为今天
+
+        Returns:
+            Optional[Dict]: 日报，未提交时为 None
+        """
+        if date is None:
+            date = datetime.now().strftime('%Y-%m-%d')
+
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT data FROM reports WHERE date = ? AND sender = ?', (date, sender)
+            ).fetchone()
+        return DailyReport.from_dict(json.loads(row[0])) if row else None
+
+    def get_sender_dates(self, sender: str, start: str = None, end: str = None) -> List[str]:
+        """
+        获取某人提交过日报的日期（升序）
+
+        Args:
+            sender: 发送者姓名
+            start: 开始日期 (YYYY-MM-DD)，包含，默认不限
+            end: 结束日期 (YYYY-MM-DD)，包含，默认不限
+
+        Returns:
+            List[str]: 日期列表
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT date FROM reports WHERE sender = ? AND date >= ? AND date <= ? ORDER BY date',
+                (sender, start or '', end or '9999-12-31')
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_user_history(self, sender: str, limit: int = 10) -> List[Dict]:
+        """
+        获取某人最近的日报（从新到旧）
+
+        Args:
+            sender: 发送者姓名
+            limit: 最多返回条数
+
+        Returns:
+            List[Dict]: 日报列表
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT data FROM reports WHERE sender = ? ORDER BY date DESC LIMIT ?', (sender, limit)
+            ).fetchall()
+        return [DailyReport.from_dict(json.loads(row[0])) for row in rows]
+
+    def mark_as_sent(self, date: str = None) -> bool:
+        """
+        标记指定日期的日报为已发送
+
+        Args:
+            date: 日期 (YYYY-MM-DD)，默认为今天
+
+        Returns:
+            bool: 是否标记成功
+        """
+        try:
+            if date is None:
+                date = datetime.now().strftime('%Y-%m-%d')
+
+            with self.lock, self.conn:
+                self.conn.execute(
+                    'INSERT INTO report_days (date, sent) VALUES (?, 1) '
+                    'ON CONFLICT(date) DO UPDATE SET sent = 1',
+                    (date,)
+                )
+            logger.info(f"已标记 {date} 的日报为已发送")
+            return True
+
+        except Exception as e:
+            logger.error(f"标记已发送失败: {str(e)}", exc_info=True)
+            return False
+
+    def remove_report_by_message_id(self, message_id: str) -> bool:
+        """
+        通过 message_id 删除日报
+
+        Args:
+            message_id: 消息ID
+
+        Returns:
+            bool: 是否删除成功
+        """
+        try:
+            with self.lock, self.conn:
+                row = self.conn.execute(
+                    'SELECT id, date, sender FROM reports WHERE message_id = ? LIMIT 1',
+                    (message_id,)
+                ).fetchone()
+                if row is None:
+                    logger.warning(f"未找到 message_id 为 {message_id} 的日报")
+                    return False
+
+                self.conn.execute('DELETE FROM reports WHERE id = ?', (row[0],))
+
+            logger.info(f"已删除撤回的日报 - 发送者: {row[2]}, 日期: {row[1]}, message_id: {message_id}")
+            return True
+
+        except Exception as e:
+            logger.error(f"删除日报失败: {str(e)}", exc_info=True)
+            return False
+
+    def clear_reports(self, date: str = None) -> bool:
+        """
+        清空指定日期的日报
+
+        Args:
+            date: 日期 (YYYY-MM-DD)，默认为今天
+
+        Returns:
+            bool: 是否清空成功
+        """
+        try:
+            if date is None:
+                date = datetime.now().strftime('%Y-%m-%d')
+
+            with self.lock, self.conn:
+                self.conn.execute('DELETE FROM reports WHERE date = ?', (date,))
+                self.conn.execute('DELETE FROM report_days WHERE date = ?', (date,))
+            logger.info(f"已清空 {date} 的日报")
+            return True
+
+        except Exception as e:
+            logger.error(f"清空日报失败: {str(e)}", exc_info=True)
+            return False
+
+    def close(self):
+        """关闭数据库连接"""
+        with self.lock:
+            self.conn.close()
+
+    def _upsert(self, report_date: str, report: DailyReport):
+        """
+        写入一条日报，(date, sender) 冲突时原地更新
+
+        调用方需持有 self.lock 并负责提交事务。
+        """
+        self.conn.execute(
+            'INSERT INTO reports (date, sender, message_id, data) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT(date, sender) DO UPDATE SET '
+            'message_id = excluded.message_id, data = excluded.data',
+            (
+                report_date,
+                report.sender or '未知',
+                report.message_id,
+                json.dumps(report, ensure_ascii=False, default=json_default),
+            )
+        )
+
+
+def migrate_json_to_sqlite(json_file: str, db_file: str) -> int:
+    """
+    一次性把 JSON 日报文件迁移到 SQLite（可重复执行，已存在的日报会被覆盖）
+
+    Args:
+        json_file: 原 JSON 存储文件路径
+        db_file: 目标数据库文件路径
+
+    Returns:
+        int: 迁移的日报条数
+    """
+    source = DailyReportStorage(json_file)
+    target = SQLiteReportStorage(db_file)
+    migrated = 0
+
+    try:
+        with target.lock, target.conn:
+            for date, data in source.reports_by_date.items():
+                for report in data.get('reports', []):
+                    target._upsert(date, report)
+                    migrated += 1
+
+                if data.get('sent'):
+                    target.conn.execute(
+                        'INSERT INTO report_days (date, sent) VALUES (?, 1) '
+                        'ON CONFLICT(date) DO UPDATE SET sent = 1',
+                        (date,)
+                    )
+    finally:
+        target.close()
+
+    logger.info(f"迁移完成 - {len(source.reports_by_date)} 个日期, {migrated} 条日报: {json_file} -> {db_file}")
+    return migrated
+
+
+# 迁移脚本：python -m utils.sqlite_report_storage [json_file] [db_file]
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+
+    json_path = sys.argv[1] if len(sys.argv) > 1 else 'data/daily_reports.json'
+    db_path = sys.argv[2] if len(sys.argv) > 2 else 'data/daily_reports.db'
+
+    count = migrate_json_to_sqlite(json_path, db_path)
+    print(f"已迁移 {count} 条日报到 {db_path}")
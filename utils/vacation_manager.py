@@ -3,31 +3,119 @@
 """
 休假管理器
 用于管理团队成员的休假状态
+
+单日休假保存为 {date: [user_names]}（与旧文件格式相同），
+连续多天和按周重复的休假以区间形式保存在 "_ranges" 中：
+    {"name": "张三", "start": "2026-03-01", "end": "2026-03-07"}
+    {"name": "李四", "start": "2026-03-02", "end": null, "weekdays": [4]}   # 每周五，长期有效
+查询时通过区间索引一次二分查找得到当天的休假人员
+
+内存中每个日期的休假人员用有序集合保存，并维护 姓名 -> 日期 的反向索引；
+每次变更后发布一份深度只读的快照，读取方直接使用快照，不需要等待写入锁
 """
 
-import json
 import logging
 import os
-from datetime import datetime
-from typing import List, Dict, Set
+import re
+from collections import namedtuple
+from datetime import datetime, timedelta
+from types import MappingProxyType
+from typing import List, Dict, Optional
 from threading import Lock
 
+from utils.durable_file import FORMAT_JSON, atomic_write_data, read_data
+from utils.file_lock import LOCK_SUFFIX, file_lock, file_version
+from utils.interval_index import IntervalIndex
+
 logger = logging.getLogger(__name__)
 
+RANGES_KEY = '_ranges'
+WEEKDAY_NAMES = '一二三四五六日'
+
+
+def parse_weekdays(text: str) -> List[int]:
+    """
+    解析“每周五”“每周一、三”这类写法
+
+    Args:
+        text: 星期描述
+
+    Returns:
+        List[int]: 星期列表（0 表示周一），无法解析时为空列表
+    """
+    text = re.sub(r'^每周|[、,，\s]', '', text or '').replace('天', '日')
+    return sorted({WEEKDAY_NAMES.index(char) for char in text if char in WEEKDAY_NAMES})
+
+
+def format_weekdays(weekdays: List[int]) -> str:
+    """把星期列表格式化为“每周一、三”"""
+    return '每周' + '、'.join(WEEKDAY_NAMES[day] for day in weekdays)
+
+
+def _is_valid_date(date: Optional[str]) -> bool:
+    """是否为合法的 YYYY-MM-DD 日期（正则只检查格式，2026-13-45 这样的日期在这里拦下）"""
+    try:
+        datetime.strptime(date, '%Y-%m-%d')
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def _shift_day(date: str, days: int) -> str:
+    return (datetime.strptime(date, '%Y-%m-%d') + timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+# 只读快照：days {date: (姓名, ...)}，ranges (区间记录, ...)，
+# user_days {姓名: frozenset(单日休假日期)}，user_ranges {姓名: (区间记录, ...)}，
+# generation 每发布一次快照加一，供依赖休假数据的缓存判断是否失效
+VacationSnapshot = namedtuple('VacationSnapshot',
+                              ['days', 'ranges', 'index', 'user_days', 'user_ranges', 'generation'])
+
+
+def _covers(record, date: str, weekday: int) -> bool:
+    """区间记录是否覆盖某天"""
+    if date < record['start'] or (record['end'] is not None and date > record['end']):
+        return False
+    return not record.get('weekdays') or weekday in record['weekdays']
+
+
+def _covers_any(record, start: str, end: str) -> bool:
+    """区间记录是否覆盖 [start, end] 中的至少一天（按周重复的记录需有星期落在其中）"""
+    first = max(start, record['start'])
+    last = end if record['end'] is None else min(end, record['end'])
+    if first > last:
+        return False
+    if not record.get('weekdays'):
+        return True
+    day = datetime.strptime(first, '%Y-%m-%d')
+    span = (datetime.strptime(last, '%Y-%m-%d') - day).days + 1
+    weekdays = {(day.weekday() + offset) % 7 for offset in range(min(span, 7))}
+    return bool(weekdays & set(record['weekdays']))
+
 
 class VacationManager:
     """休假管理器"""
 
-    def __init__(self, storage_file: str = "data/vacations.json"):
+    def __init__(self, storage_file: str = "data/vacations.json", snapshot_format: str = FORMAT_JSON):
         """
         初始化休假管理器
 
         Args:
             storage_file: 休假数据存储文件路径
+            snapshot_format: 数据文件格式（json / compact / msgpack），读取时自动识别
         """
         self.storage_file = storage_file
-        self.vacations = {}  # {date: [user_names]}
-        self.lock = Lock()
+        self.snapshot_format = snapshot_format
+        self.vacations = {}  # {date: {user_name: None}}，用字典当作保持插入顺序的集合
+        self.ranges = []  # [{'name', 'start', 'end', 'weekdays'?}]，end 为 None 表示长期有效
+        self._user_days = {}  # {user_name: set(date)}，单日休假的反向索引
+        self._generation = 0
+        self._snapshot = self._build_snapshot()
+        self.lock = Lock()  # 写入锁，串行化变更和落盘
+
+        # 多进程共享数据文件：写入时持有文件锁，文件版本变化时重新加载
+        self.lock_file = f"{self.storage_file}{LOCK_SUFFIX}"
+        self._version = None
 
         # 确保数据目录存在
         os.makedirs(os.path.dirname(self.storage_file), exist_ok=True)
@@ -35,73 +123,196 @@ class VacationManager:
         # 加载已有数据
         self._load_vacations()
 
-    def set_vacation(self, user_name: str, date: str = None) -> bool:
+    def set_vacation(self, user_name: str, date: str = None, end_date: str = None,
+                     weekdays: List[int] = None) -> bool:
         """
         设置某人休假
 
         Args:
             user_name: 用户姓名
-            date: 休假日期 (YYYY-MM-DD)，默认为今天
+            date: 休假日期或开始日期 (YYYY-MM-DD)，默认为今天
+            end_date: 结束日期 (YYYY-MM-DD)，包含；设置 weekdays 时为空表示长期有效
+            weekdays: 只在这些星期休假（0 表示周一），为空表示区间内每天
 
         Returns:
             bool: 是否设置成功
         """
+        return self.set_vacations([user_name], date, end_date, weekdays) is not None
+
+    def set_vacations(self, user_names: List[str], date: str = None, end_date: str = None,
+                      weekdays: List[int] = None) -> Optional[List[str]]:
+        """
+        批量设置休假（一次加锁、一次写盘）
+
+        Args:
+            user_names: 用户姓名列表
+            date: 休假日期或开始日期 (YYYY-MM-DD)，默认为今天
+            end_date: 结束日期 (YYYY-MM-DD)，包含；设置 weekdays 时为空表示长期有效
+            weekdays: 只在这些星期休假（0 表示周一），为空表示区间内每天
+
+        Returns:
+            Optional[List[str]]: 本次新设置的人员（之前已设置过的不在其中），失败时为 None
+        """
         try:
-            with self.lock:
+            with self.lock, file_lock(self.lock_file):
                 if date is None:
                     date = datetime.now().strftime('%Y-%m-%d')
-
-                # 确保日期键存在
-                if date not in self.vacations:
-                    self.vacations[date] = []
-
-                # 添加休假（避免重复）
-                if user_name not in self.vacations[date]:
-                    self.vacations[date].append(user_name)
+                # 先校验日期再修改数据，非法日期不会留在内存中导致之后的写盘失败
+                if not _is_valid_date(date) or (end_date is not None and not _is_valid_date(end_date)):
+                    logger.warning(f"休假日期无效: {date} ~ {end_date}")
+                    return None
+                if end_date is not None and end_date < date:
+                    logger.warning(f"休假结束日期早于开始日期: {date} ~ {end_date}")
+                    return None
+                self._sync_with_disk()
+
+                changed = []
+                for user_name in dict.fromkeys(user_names):
+                    if not weekdays and (end_date is None or end_date == date):
+                        added, description = self._set_single_day(user_name, date), date
+                    else:
+                        record = {'name': user_name, 'start': date, 'end': end_date}
+                        if weekdays:
+                            record['weekdays'] = sorted(set(weekdays))
+                        added, description = record not in self.ranges, self._describe(record)
+                        if added:
+                            self.ranges.append(record)
+
+                    if added:
+                        changed.append(user_name)
+                        logger.info(f"✅ 已设置休假 - {user_name} ({description})")
+                    else:
+                        logger.info(f"💡 {user_name} 已经设置过休假 ({description})")
+
+                if changed:
                     self._save_vacations()
-                    logger.info(f"✅ 已设置休假 - {user_name} ({date})")
-                    return True
-                else:
-                    logger.info(f"💡 {user_name} 在 {date} 已经设置过休假")
-                    return True
+                return changed
 
         except Exception as e:
             logger.error(f"设置休假失败: {str(e)}", exc_info=True)
+            return None
+
+    def _set_single_day(self, user_name: str, date: str) -> bool:
+        """设置单日休假（调用方需持有锁），返回是否有变化"""
+        user_names = self.vacations.setdefault(date, {})
+
+        # 添加休假（避免重复）
+        if user_name in user_names:
             return False
+        user_names[user_name] = None
+        self._user_days.setdefault(user_name, set()).add(date)
+        return True
 
-    def cancel_vacation(self, user_name: str, date: str = None) -> bool:
+    def cancel_vacation(self, user_name: str, date: str = None, end_date: str = None,
+                        weekdays: List[int] = None) -> bool:
         """
         取消某人的休假
 
+        取消区间中间的某几天时，原区间会被拆成前后两段。
+
         Args:
             user_name: 用户姓名
-            date: 休假日期 (YYYY-MM-DD)，默认为今天
+            date: 休假日期或开始日期 (YYYY-MM-DD)，默认为今天
+            end_date: 结束日期 (YYYY-MM-DD)，包含，默认与开始日期相同
+            weekdays: 取消按周重复的休假中的这些星期（指定时忽略日期）
 
         Returns:
             bool: 是否取消成功
         """
-        try:
-            with self.lock:
-                if date is None:
-                    date = datetime.now().strftime('%Y-%m-%d')
+        return bool(self.cancel_vacations([user_name], date, end_date, weekdays))
 
-                if date in self.vacations and user_name in self.vacations[date]:
-                    self.vacations[date].remove(user_name)
+    def cancel_vacations(self, user_names: List[str], date: str = None, end_date: str = None,
+                         weekdays: List[int] = None) -> Optional[List[str]]:
+        """
+        批量取消休假（一次加锁、一次写盘）
 
-                    # 如果该日期没有休假人员了，删除该日期键
-                    if not self.vacations[date]:
-                        del self.vacations[date]
+        Args:
+            user_names: 用户姓名列表
+            date: 休假日期或开始日期 (YYYY-MM-DD)，默认为今天
+            end_date: 结束日期 (YYYY-MM-DD)，包含，默认与开始日期相同
+            weekdays: 取消按周重复的休假中的这些星期（指定时忽略日期）
 
-                    self._save_vacations()
-                    logger.info(f"✅ 已取消休假 - {user_name} ({date})")
-                    return True
+        Returns:
+            Optional[List[str]]: 确实取消了休假的人员，失败时为 None
+        """
+        try:
+            with self.lock, file_lock(self.lock_file):
+                if date is None:
+                    date = datetime.now().strftime('%Y-%m-%d')
+                end_date = end_date or date
+                if not weekdays and not (_is_valid_date(date) and _is_valid_date(end_date)):
+                    logger.warning(f"休假日期无效: {date} ~ {end_date}")
+                    return None
+                self._sync_with_disk()
+
+                if weekdays:
+                    description = format_weekdays(sorted(set(weekdays)))
                 else:
-                    logger.info(f"💡 {user_name} 在 {date} 没有设置休假")
-                    return False
+                    description = date if end_date == date else f"{date} ~ {end_date}"
+
+                changed = []
+                for user_name in dict.fromkeys(user_names):
+                    if weekdays:
+                        cancelled = self._cancel_weekdays(user_name, set(weekdays))
+                    else:
+                        cancelled = self._cancel_days(user_name, date, end_date)
+
+                    if cancelled:
+                        changed.append(user_name)
+                        logger.info(f"✅ 已取消休假 - {user_name} ({description})")
+                    else:
+                        logger.info(f"💡 {user_name} 在 {description} 没有设置休假")
+
+                if changed:
+                    self._save_vacations()
+                return changed
 
         except Exception as e:
             logger.error(f"取消休假失败: {str(e)}", exc_info=True)
-            return False
+            return None
+
+    def _cancel_days(self, user_name: str, start: str, end: str) -> bool:
+        """取消 [start, end] 内的单日休假并裁剪区间休假（调用方需持有锁）"""
+        changed = False
+        user_days = self._user_days.get(user_name, set())
+        for date in [d for d in user_days if start <= d <= end]:
+            user_days.discard(date)
+            del self.vacations[date][user_name]
+            # 如果该日期没有休假人员了，删除该日期键
+            if not self.vacations[date]:
+                del self.vacations[date]
+            changed = True
+        if not user_days:
+            self._user_days.pop(user_name, None)
+
+        ranges = []
+        for record in self.ranges:
+            # 按周重复的区间只有在 [start, end] 内有休假的星期时才需要裁剪
+            if record['name'] != user_name or not _covers_any(record, start, end):
+                ranges.append(record)
+                continue
+            changed = True
+            if record['start'] < start:
+                ranges.append(dict(record, end=_shift_day(start, -1)))
+            if record['end'] is None or record['end'] > end:
+                ranges.append(dict(record, start=_shift_day(end, 1)))
+        self.ranges = ranges
+        return changed
+
+    def _cancel_weekdays(self, user_name: str, weekdays: set) -> bool:
+        """从按周重复的休假中去掉指定星期（调用方需持有锁）"""
+        changed = False
+        ranges = []
+        for record in self.ranges:
+            if record['name'] == user_name and weekdays & set(record.get('weekdays', ())):
+                changed = True
+                remaining = [day for day in record['weekdays'] if day not in weekdays]
+                if remaining:
+                    ranges.append(dict(record, weekdays=remaining))
+            else:
+                ranges.append(record)
+        self.ranges = ranges
+        return changed
 
     def is_on_vacation(self, user_name: str, date: str = None) -> bool:
         """
@@ -114,11 +325,18 @@ class VacationManager:
         Returns:
             bool: 是否在休假
         """
-        with self.lock:
-            if date is None:
-                date = datetime.now().strftime('%Y-%m-%d')
+        if date is None:
+            date = datetime.now().strftime('%Y-%m-%d')
+        snapshot = self._get_snapshot()
 
-            return date in self.vacations and user_name in self.vacations[date]
+        if date in snapshot.user_days.get(user_name, ()):
+            return True
+        try:
+            weekday = datetime.strptime(date, '%Y-%m-%d').weekday()
+        except ValueError:
+            logger.error(f"日期格式错误: {date}")
+            return False
+        return any(_covers(record, date, weekday) for record in snapshot.user_ranges.get(user_name, ()))
 
     def get_vacation_users(self, date: str = None) -> List[str]:
         """
@@ -130,42 +348,196 @@ class VacationManager:
         Returns:
             List[str]: 休假人员姓名列表
         """
-        with self.lock:
-            if date is None:
-                date = datetime.now().strftime('%Y-%m-%d')
+        if date is None:
+            date = datetime.now().strftime('%Y-%m-%d')
+        snapshot = self._get_snapshot()
+
+        try:
+            weekday = datetime.strptime(date, '%Y-%m-%d').weekday()
+        except ValueError:
+            logger.error(f"日期格式错误: {date}")
+            return []
+        users = {}
+        for user_name, weekdays in snapshot.index.stab(date):
+            if weekdays is None or weekday in weekdays:
+                users[user_name] = None
+        return list(users)
+
+    def get_user_vacation_dates(self, user_name: str, start: str, end: str) -> List[str]:
+        """
+        获取某人在日期范围内的所有休假日期（展开区间和按周重复的休假）
+
+        Args:
+            user_name: 用户姓名
+            start: 开始日期 (YYYY-MM-DD)，包含
+            end: 结束日期 (YYYY-MM-DD)，包含
 
-            return self.vacations.get(date, []).copy()
+        Returns:
+            List[str]: 按日期排序的休假日期
+        """
+        if not (_is_valid_date(start) and _is_valid_date(end)):
+            logger.error(f"日期格式错误: {start} ~ {end}")
+            return []
+        snapshot = self._get_snapshot()
+        dates = {date for date in snapshot.user_days.get(user_name, ()) if start <= date <= end}
+
+        for record in snapshot.user_ranges.get(user_name, ()):
+            day = max(start, record['start'])
+            last = end if record['end'] is None else min(end, record['end'])
+            current = datetime.strptime(day, '%Y-%m-%d')
+            while day <= last:
+                if not record.get('weekdays') or current.weekday() in record['weekdays']:
+                    dates.add(day)
+                current += timedelta(days=1)
+                day = current.strftime('%Y-%m-%d')
+
+        return sorted(dates)
 
     def get_all_vacations(self) -> Dict[str, List[str]]:
         """
-        获取所有休假数据
+        获取所有单日休假数据（区间休假见 get_vacation_ranges）
+
+        Returns:
+            Dict[str, List[str]]: 休假数据 {日期: [姓名列表]}，调用方可以随意修改
+        """
+        return {date: list(user_names) for date, user_names in self._get_snapshot().days.items()}
+
+    def get_vacation_ranges(self, user_name: str = None) -> List[Dict]:
+        """
+        获取区间和按周重复的休假
+
+        Args:
+            user_name: 只返回该用户的记录，默认全部
 
         Returns:
-            Dict[str, List[str]]: 休假数据 {日期: [姓名列表]}
+            List[Dict]: [{'name', 'start', 'end', 'weekdays'?}]
         """
-        with self.lock:
-            return self.vacations.copy()
+        snapshot = self._get_snapshot()
+        records = snapshot.ranges if user_name is None else snapshot.user_ranges.get(user_name, ())
+        return [self._thaw_record(record) for record in records]
+
+    @property
+    def generation(self) -> int:
+        """休假数据版本号，数据变化（包括其他进程修改文件）后递增"""
+        return self._get_snapshot().generation
+
+    def _get_snapshot(self) -> VacationSnapshot:
+        """
+        获取当前只读快照
+
+        数据文件被其他进程改过时先重新加载；本进程写入方正持有锁时它会负责合并，读取方不等待。
+        """
+        if file_version(self.storage_file) != self._version and self.lock.acquire(blocking=False):
+            try:
+                self._sync_with_disk()
+            finally:
+                self.lock.release()
+        return self._snapshot
+
+    def _describe(self, record: Dict) -> str:
+        """区间休假的可读描述"""
+        if record['end'] is None:
+            description = f"{record['start']} 起"
+        else:
+            description = f"{record['start']} ~ {record['end']}"
+        if record.get('weekdays'):
+            description += f" {format_weekdays(record['weekdays'])}"
+        return description
+
+    @staticmethod
+    def _freeze_record(record: Dict) -> MappingProxyType:
+        record = dict(record)
+        if record.get('weekdays'):
+            record['weekdays'] = tuple(record['weekdays'])
+        return MappingProxyType(record)
+
+    @staticmethod
+    def _thaw_record(record) -> Dict:
+        record = dict(record)
+        if 'weekdays' in record:
+            record['weekdays'] = list(record['weekdays'])
+        return record
+
+    def _build_snapshot(self) -> VacationSnapshot:
+        """根据当前数据构建只读快照和区间索引（单日休假视为一天长的区间）"""
+        self._generation += 1
+        days = {date: tuple(user_names) for date, user_names in sorted(self.vacations.items())}
+        ranges = tuple(self._freeze_record(record) for record in self.ranges)
+
+        user_ranges = {}
+        for record in ranges:
+            user_ranges.setdefault(record['name'], []).append(record)
+
+        intervals = [
+            (date, _shift_day(date, 1), (user_name, None))
+            for date, user_names in days.items()
+            for user_name in user_names
+        ]
+        for record in ranges:
+            end = _shift_day(record['end'], 1) if record['end'] else None
+            weekdays = frozenset(record['weekdays']) if record.get('weekdays') else None
+            intervals.append((record['start'], end, (record['name'], weekdays)))
+
+        return VacationSnapshot(
+            days=MappingProxyType(days),
+            ranges=ranges,
+            index=IntervalIndex(intervals),
+            user_days=MappingProxyType({name: frozenset(dates) for name, dates in self._user_days.items()}),
+            user_ranges=MappingProxyType({name: tuple(records) for name, records in user_ranges.items()}),
+            generation=self._generation,
+        )
+
+    def _set_data(self, vacations: Dict[str, List[str]], ranges: List[Dict]):
+        """替换内存数据并重建反向索引（跳过日期无效的记录，避免一条坏数据导致无法启动）"""
+        for date in [date for date in vacations if not _is_valid_date(date)]:
+            logger.warning(f"跳过日期无效的休假记录: {date} - {vacations.pop(date)}")
+        valid_ranges = []
+        for record in ranges:
+            if _is_valid_date(record.get('start')) and (record.get('end') is None or _is_valid_date(record['end'])):
+                valid_ranges.append(record)
+            else:
+                logger.warning(f"跳过日期无效的区间休假: {record}")
+        self.vacations = {date: dict.fromkeys(user_names) for date, user_names in vacations.items() if user_names}
+        self.ranges = valid_ranges
+        self._user_days = {}
+        for date, user_names in self.vacations.items():
+            for user_name in user_names:
+                self._user_days.setdefault(user_name, set()).add(date)
 
     def _load_vacations(self):
         """从文件加载休假数据"""
         try:
-            if os.path.exists(self.storage_file):
-                with open(self.storage_file, 'r', encoding='utf-8') as f:
-                    self.vacations = json.load(f)
-                    logger.info(f"加载休假数据: {len(self.vacations)} 个日期")
+            self._version = file_version(self.storage_file)
+            data = read_data(self.storage_file)
+            if data is not None:
+                ranges = data.pop(RANGES_KEY, [])
+                self._set_data(data, ranges)
+                logger.info(f"加载休假数据: {len(self.vacations)} 个日期，{len(self.ranges)} 个区间")
             else:
                 logger.info("未找到休假数据文件，初始化空数据")
-                self.vacations = {}
+                self._set_data({}, [])
 
         except Exception as e:
             logger.error(f"加载休假数据失败: {str(e)}", exc_info=True)
-            self.vacations = {}
+            self._set_data({}, [])
+
+        self._snapshot = self._build_snapshot()
+
+    def _sync_with_disk(self):
+        """数据文件被其他进程改过时重新加载（调用方需持有 self.lock）"""
+        if file_version(self.storage_file) != self._version:
+            logger.info("检测到休假数据被其他进程修改，重新加载")
+            self._load_vacations()
 
     def _save_vacations(self):
-        """保存休假数据到文件"""
+        """保存休假数据到文件并发布新快照"""
+        self._snapshot = self._build_snapshot()
         try:
-            with open(self.storage_file, 'w', encoding='utf-8') as f:
-                json.dump(self.vacations, f, ensure_ascii=False, indent=2)
+            data = {date: list(user_names) for date, user_names in self._snapshot.days.items()}
+            if self.ranges:
+                data[RANGES_KEY] = self.ranges
+            atomic_write_data(self.storage_file, data, self.snapshot_format)
+            self._version = file_version(self.storage_file)
 
         except Exception as e:
             logger.error(f"保存休假数据失败: {str(e)}", exc_info=True)
@@ -3,40 +3,109 @@
 """
 工作日日历管理器
 支持中国法定节假日和调休的工作日判断
+
+查询只读内存数据：缺少某年数据时先用本地配置（或周末规则）立即作答，
+同时在后台线程请求节假日接口，拿到数据后整体替换，查询方不会等待网络请求
 """
 
-import json
 import logging
 import os
 import time
 import requests
-from datetime import datetime
+from array import array
+from calendar import isleap
+from collections import namedtuple
+from datetime import MAXYEAR, MINYEAR, date as dt_date, datetime
 from typing import Dict, Optional
-from threading import Lock
+from threading import Lock, Thread
+
+from utils.circuit_breaker import CircuitBreaker
+from utils.durable_file import read_json, update_json
+from utils.file_lock import file_version
 
 logger = logging.getLogger(__name__)
 
+# 编译后的一年：bitmap[i] 表示当年第 i 天是否为工作日，prefix[i] 为前 i 天的工作日数，
+# workdays 为所有工作日的天序号；source 是编译所用的节假日数据（None 表示没有数据，按周末规则）
+CompiledYear = namedtuple('CompiledYear', ['source', 'first_ordinal', 'bitmap', 'prefix', 'workdays'])
+
+# 查找下一个/上一个工作日时最多跨越的年数
+MAX_SEARCH_YEARS = 2
+
+# 缓存文件中保存每年元数据的键：{year: {'source', 'fetched_at', 'etag'?, 'last_modified'?}}
+META_KEY = '_meta'
+
+# 接口请求结果
+FETCH_MODIFIED = 'modified'
+FETCH_NOT_MODIFIED = 'not_modified'
+
+
+def _to_ordinal(date: str) -> int:
+    """把 YYYY-MM-DD 转为公历序数（比 strptime 快），格式错误时抛出 ValueError"""
+    if len(date) != 10 or date[4] != '-' or date[7] != '-':
+        raise ValueError(f"日期格式错误: {date}")
+    return dt_date(int(date[:4]), int(date[5:7]), int(date[8:])).toordinal()
+
+
+def _from_ordinal(ordinal: int) -> str:
+    return dt_date.fromordinal(ordinal).isoformat()
+
 
 class WorkdayCalendar:
     """工作日日历管理器"""
     
     # 节假日API地址
     API_URL = "http://timor.tech/api/holiday/year/{year}"
+
+    # 后台刷新失败后，同一年份至少间隔多久再试（秒）
+    REFRESH_RETRY_INTERVAL = 3600
+
+    # 单次获取的最大请求次数和重试间隔（秒）
+    MAX_RETRIES = 3
+    RETRY_DELAY = 1
+
+    # 预取次年数据失败后的退避天数：从 1 天开始翻倍，最长 7 天
+    # 按自然日比较而不是按秒，每天定时任务的几秒调度误差不会让次日的重试被跳过
+    PREFETCH_INITIAL_BACKOFF_DAYS = 1
+    PREFETCH_MAX_BACKOFF_DAYS = 7
     
     def __init__(self, 
                  cache_file: str = "data/holidays_cache.json",
-                 config_file: str = "config/holidays.json"):
+                 config_file: str = "config/holidays.json",
+                 api_url: Optional[str] = None,
+                 cache_ttl: Optional[float] = 7 * 86400,
+                 failure_threshold: int = 3,
+                 failure_cooldown: float = 300):
         """
         初始化工作日日历
         
         Args:
             cache_file: 缓存文件路径
             config_file: 本地配置文件路径（降级方案）
+            api_url: 节假日API地址（含 {year} 占位符），默认 API_URL
+            cache_ttl: 缓存数据的有效期（秒），过期后在后台用条件请求重新验证；为空表示不重新验证
+            failure_threshold: 接口连续失败多少次后熔断
+            failure_cooldown: 熔断时间，以及某年获取失败后多久内不再请求该年（秒）
         """
         self.cache_file = cache_file
         self.config_file = config_file
+        self.api_url = api_url or self.API_URL
+        self.cache_ttl = cache_ttl
+        # {year: {date: info}}，整体替换（写时复制），读取方不加锁
         self.holidays_data: Dict[str, Dict] = {}
-        self.lock = Lock()
+        self.meta: Dict[str, Dict] = {}  # {year: 元数据}，与 holidays_data 一起保存到缓存文件
+        self.lock = Lock()  # 只保护内存数据替换和刷新线程登记，不在持锁时请求网络
+        self._refreshing: Dict[int, Thread] = {}  # 正在后台刷新的年份，同一年份只有一个请求
+        self._last_attempt: Dict[int, float] = {}  # 年份 -> 上次后台刷新时间
+        self._compiled: Dict[int, CompiledYear] = {}  # 年份 -> 编译后的工作日位图，数据替换后按需重建
+        self._prefetch_backoff: Dict[int, tuple] = {}  # 年份 -> (下次预取日期的公历序数, 当前退避天数)
+        # 本地配置内容，配置文件版本变化时才重新读取（缺少的年份不会每次查询都重新解析文件）
+        self._config_data: Optional[Dict] = None
+        self._config_version = None
+        # 接口不可用时熔断，期间直接走本地配置或周末规则，不再发请求、不再等待重试
+        self.breaker = CircuitBreaker('节假日API', failure_threshold, failure_cooldown)
+        self.failure_cooldown = failure_cooldown
+        self._failed_until: Dict[int, float] = {}  # 年份 -> 失败缓存到期时间，到期前不请求该年
         
         # 确保目录存在
         os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
@@ -64,25 +133,132 @@ class WorkdayCalendar:
         
         # 解析日期
         try:
-            dt = datetime.strptime(date, '%Y-%m-%d')
+            ordinal = _to_ordinal(date)
         except ValueError:
             logger.error(f"日期格式错误: {date}")
             return False
         
-        year = dt.year
+        # 查当年位图（缺少节假日数据时按周末规则编译，不等待网络请求）
+        table = self._year_table(int(date[:4]))
+        return bool(table.bitmap[ordinal - table.first_ordinal])
+
+    def next_workday(self, date: Optional[str] = None) -> Optional[str]:
+        """
+        获取指定日期之后的第一个工作日
         
-        # 确保有当年的数据
-        if str(year) not in self.holidays_data:
-            self.refresh_cache(year)
+        Args:
+            date: 日期字符串 YYYY-MM-DD，None表示今天
+            
+        Returns:
+            Optional[str]: 下一个工作日，日期格式错误时为 None
+        """
+        if date is None:
+            date = datetime.now().strftime('%Y-%m-%d')
+        try:
+            ordinal = _to_ordinal(date)
+        except ValueError:
+            logger.error(f"日期格式错误: {date}")
+            return None
         
-        # 检查是否在节假日数据中
-        year_data = self.holidays_data.get(str(year), {})
-        if date in year_data:
-            return year_data[date].get('is_workday', False)
+        year = int(date[:4])
+        table = self._year_table(year)
+        # 当年 [0, i] 内的工作日数，即下一个工作日在 workdays 中的位置
+        position = table.prefix[ordinal - table.first_ordinal + 1]
+        for _ in range(MAX_SEARCH_YEARS):
+            if position < len(table.workdays):
+                return _from_ordinal(table.first_ordinal + table.workdays[position])
+            year += 1
+            if year > MAXYEAR:
+                break
+            table, position = self._year_table(year), 0
+        return None
+
+    def prev_workday(self, date: Optional[str] = None) -> Optional[str]:
+        """
+        获取指定日期之前的最后一个工作日
         
-        # 如果不在数据中，按周末规则判断
-        weekday = dt.weekday()
-        return weekday < 5  # 0-4 是周一到周五
+        Args:
+            date: 日期字符串 YYYY-MM-DD，None表示今天
+            
+        Returns:
+            Optional[str]: 上一个工作日，日期格式错误时为 None
+        """
+        if date is None:
+            date = datetime.now().strftime('%Y-%m-%d')
+        try:
+            ordinal = _to_ordinal(date)
+        except ValueError:
+            logger.error(f"日期格式错误: {date}")
+            return None
+        
+        year = int(date[:4])
+        table = self._year_table(year)
+        # 当年 [0, i) 内的工作日数，上一个工作日是其中最后一个
+        position = table.prefix[ordinal - table.first_ordinal]
+        for _ in range(MAX_SEARCH_YEARS):
+            if position > 0:
+                return _from_ordinal(table.first_ordinal + table.workdays[position - 1])
+            year -= 1
+            if year < MINYEAR:
+                break
+            table = self._year_table(year)
+            position = len(table.workdays)
+        return None
+
+    def count_workdays(self, start: str, end: str) -> int:
+        """
+        统计日期范围内的工作日数（包含首尾）
+        
+        Args:
+            start: 开始日期 YYYY-MM-DD
+            end: 结束日期 YYYY-MM-DD
+            
+        Returns:
+            int: 工作日数，开始日期晚于结束日期时为 0
+        """
+        try:
+            start_ordinal, end_ordinal = _to_ordinal(start), _to_ordinal(end)
+        except ValueError:
+            logger.error(f"日期格式错误: {start} ~ {end}")
+            return 0
+        if start_ordinal > end_ordinal:
+            return 0
+        
+        total = 0
+        for year in range(int(start[:4]), int(end[:4]) + 1):
+            table = self._year_table(year)
+            first = max(start_ordinal - table.first_ordinal, 0)
+            last = min(end_ordinal - table.first_ordinal, len(table.bitmap) - 1)
+            total += table.prefix[last + 1] - table.prefix[first]
+        return total
+
+    def _year_table(self, year: int) -> CompiledYear:
+        """获取某年的工作日位图，节假日数据变化后重新编译"""
+        source = self._ensure_year(year)
+        table = self._compiled.get(year)
+        if table is not None and table.source is source:
+            return table
+        
+        first_ordinal = dt_date(year, 1, 1).toordinal()
+        days = 366 if isleap(year) else 365
+        # 公历序数 1 为周一，(ordinal - 1) % 7 < 5 即周一到周五
+        bitmap = bytearray((first_ordinal + i - 1) % 7 < 5 for i in range(days))
+        for date, info in (source or {}).items():
+            try:
+                index = _to_ordinal(date) - first_ordinal
+            except ValueError:
+                continue
+            if 0 <= index < days:
+                bitmap[index] = bool(info.get('is_workday', False))
+        
+        prefix = array('H', [0]) * (days + 1)
+        for i in range(days):
+            prefix[i + 1] = prefix[i] + bitmap[i]
+        workdays = array('H', (i for i in range(days) if bitmap[i]))
+        
+        table = CompiledYear(source, first_ordinal, bitmap, prefix, workdays)
+        self._compiled[year] = table
+        return table
     
     def get_holidays(self, year: Optional[int] = None) -> Dict:
         """
@@ -97,15 +273,12 @@ class WorkdayCalendar:
         if year is None:
             year = datetime.now().year
         
-        # 确保有数据
-        if str(year) not in self.holidays_data:
-            self.refresh_cache(year)
-        
-        return self.holidays_data.get(str(year), {})
+        # 确保有数据（不等待网络请求）
+        return self._ensure_year(year) or {}
     
     def refresh_cache(self, year: Optional[int] = None) -> bool:
         """
-        刷新缓存（从API或本地配置）
+        刷新缓存（从API或本地配置），同步等待结果
         
         Args:
             year: 年份，None表示当年
@@ -116,40 +289,228 @@ class WorkdayCalendar:
         if year is None:
             year = datetime.now().year
         
+        # 首先尝试从API获取（不持锁，请求期间查询照常进行）
+        result = self._fetch_year(year)
+        if result:
+            logger.info(f"成功从API获取{year}年节假日数据")
+            self._save_cache()
+            return True
+        
+        # API失败，尝试从本地配置加载
+        logger.warning(f"API获取失败，尝试从本地配置加载")
+        if self._load_from_config(year):
+            logger.info(f"成功从本地配置加载{year}年节假日数据")
+            self._save_cache()  # 保存到缓存文件
+            return True
+        
+        # 都失败了
+        logger.error(f"无法获取{year}年节假日数据")
+        return False
+
+    def refresh_in_background(self, year: Optional[int] = None) -> bool:
+        """
+        在后台线程中从API刷新某年数据（同一年份同时只有一个请求）
+        
+        Args:
+            year: 年份，None表示当年
+            
+        Returns:
+            bool: 是否启动了新的刷新线程（已有线程在刷新该年份时为 False）
+        """
+        if year is None:
+            year = datetime.now().year
+        
         with self.lock:
-            # 首先尝试从API获取
-            if self._fetch_from_api(year):
-                logger.info(f"成功从API获取{year}年节假日数据")
+            if year in self._refreshing:
+                return False
+            thread = Thread(target=self._background_refresh, args=(year,),
+                            name=f'workday-refresh-{year}', daemon=True)
+            self._refreshing[year] = thread
+            self._last_attempt[year] = time.time()
+        thread.start()
+        return True
+
+    def wait_for_refresh(self, timeout: Optional[float] = None):
+        """等待正在进行的后台刷新结束（用于测试和退出前）"""
+        with self.lock:
+            threads = list(self._refreshing.values())
+        for thread in threads:
+            thread.join(timeout)
+
+    def _background_refresh(self, year: int):
+        try:
+            result = self._fetch_year(year)
+            if result == FETCH_MODIFIED:
+                logger.info(f"后台刷新{year}年节假日数据成功")
+            elif result == FETCH_NOT_MODIFIED:
+                logger.info(f"{year}年节假日数据未变化")
+            if result:
+                # 数据未变化时也要保存新的获取时间，重启后不会立即重新验证
                 self._save_cache()
-                return True
+        except Exception as e:
+            logger.error(f"后台刷新{year}年节假日数据失败: {e}", exc_info=True)
+        finally:
+            with self.lock:
+                self._refreshing.pop(year, None)
+
+    def _ensure_year(self, year: int) -> Optional[Dict]:
+        """
+        获取某年数据，缺失时立即从本地配置补上，并在后台请求API
+        
+        Args:
+            year: 年份
             
-            # API失败，尝试从本地配置加载
-            logger.warning(f"API获取失败，尝试从本地配置加载")
-            if self._load_from_config(year):
-                logger.info(f"成功从本地配置加载{year}年节假日数据")
-                self._save_cache()  # 保存到缓存文件
-                return True
+        Returns:
+            Optional[dict]: 该年数据，没有数据时为 None（调用方按周末规则判断）
+        """
+        year_data = self.holidays_data.get(str(year))
+        if year_data is None:
+            self._load_from_config(year)
+            self._refresh_if_due(year)
+        elif self._is_expired(year):
+            # 数据仍然可用，后台重新验证
+            self._refresh_if_due(year)
+        return self.holidays_data.get(str(year))
+
+    def _is_expired(self, year: int) -> bool:
+        """某年数据是否需要重新验证（不是来自API或超过有效期）"""
+        if self.cache_ttl is None:
+            return False
+        fetched_at = self.meta.get(str(year), {}).get('fetched_at')
+        return fetched_at is None or time.time() - fetched_at >= self.cache_ttl
+
+    def _refresh_if_due(self, year: int):
+        """距离上次后台刷新足够久时启动后台刷新"""
+        last_attempt = self._last_attempt.get(year)
+        if last_attempt is None or time.time() - last_attempt >= self.REFRESH_RETRY_INTERVAL:
+            self.refresh_in_background(year)
+
+    def _set_year(self, year: int, year_data: Dict, meta: Optional[Dict] = None):
+        """替换某年数据和元数据（复制后整体替换，读取方看到的始终是完整数据）"""
+        with self.lock:
+            holidays_data = dict(self.holidays_data)
+            holidays_data[str(year)] = year_data
+            self.holidays_data = holidays_data
+            if meta is not None:
+                self._set_meta(year, meta)
+
+    def _set_meta(self, year: int, meta: Dict):
+        """替换某年元数据（调用方需持有 self.lock）"""
+        all_meta = dict(self.meta)
+        all_meta[str(year)] = meta
+        self.meta = all_meta
+
+    def prefetch_year(self, year: int) -> bool:
+        """
+        提前获取某年的节假日数据（供年底定时任务调用）
+        
+        接口在国务院公布安排前返回空数据，此时视为失败；失败后按指数退避推迟下次尝试，
+        未到时间的调用直接返回 False，不请求接口。
+        只有本地配置兜底的年份不算已就绪，仍会请求接口。
+        
+        Args:
+            year: 年份
             
-            # 都失败了
-            logger.error(f"无法获取{year}年节假日数据")
+        Returns:
+            bool: 该年数据是否已从接口获取（或从缓存加载）
+        """
+        if self.holidays_data.get(str(year)) and self.meta.get(str(year), {}).get('source') != 'config':
+            return True
+        
+        today = dt_date.fromtimestamp(time.time()).toordinal()
+        next_attempt, backoff = self._prefetch_backoff.get(year, (0, 0))
+        if today < next_attempt:
+            logger.info(f"{year}年节假日数据预取退避中，下次尝试: {_from_ordinal(next_attempt)}")
             return False
-    
-    def _fetch_from_api(self, year: int) -> bool:
-        """从API获取节假日数据（带重试逻辑）"""
-        max_retries = 3
-        retry_delay = 1  # seconds
+        
+        result = self._fetch_year(year, require_holidays=True)
+        if result:
+            logger.info(f"已预取{year}年节假日数据")
+            self._save_cache()
+            self._prefetch_backoff.pop(year, None)
+            return True
+        
+        backoff = min(backoff * 2 or self.PREFETCH_INITIAL_BACKOFF_DAYS, self.PREFETCH_MAX_BACKOFF_DAYS)
+        self._prefetch_backoff[year] = (today + backoff, backoff)
+        logger.warning(f"预取{year}年节假日数据失败，{backoff} 天后重试")
+        return False
+
+    def _fetch_from_api(self, year: int, require_holidays: bool = False) -> bool:
+        """从API获取节假日数据（带重试逻辑），返回是否成功"""
+        return self._fetch_year(year, require_holidays) is not None
+
+    def _fetch_year(self, year: int, require_holidays: bool = False) -> Optional[str]:
+        """
+        从API获取节假日数据（带失败缓存和熔断）
+        
+        某年获取失败后，在冷却时间内再次获取该年直接返回失败；接口熔断期间同样不发请求。
+        
+        Args:
+            year: 年份
+            require_holidays: 接口返回空数据（尚未公布）时视为失败
+            
+        Returns:
+            Optional[str]: FETCH_MODIFIED / FETCH_NOT_MODIFIED，失败时为 None
+        """
+        failed_until = self._failed_until.get(year)
+        if failed_until is not None and time.time() < failed_until:
+            logger.info(f"{year}年节假日数据最近获取失败，暂不请求API")
+            return None
+        
+        result = self._request_year(year, require_holidays)
+        if result is None:
+            self._failed_until[year] = time.time() + self.failure_cooldown
+        else:
+            self._failed_until.pop(year, None)
+        return result
+
+    def _request_year(self, year: int, require_holidays: bool = False) -> Optional[str]:
+        """
+        请求API（带重试逻辑）
+        
+        已有来自API的数据时带上 ETag / Last-Modified 发起条件请求，
+        返回 304 或数据没有变化时只更新获取时间，不替换数据。
+        """
+        max_retries = self.MAX_RETRIES
+        retry_delay = self.RETRY_DELAY
+        
+        current = self.holidays_data.get(str(year))
+        meta = self.meta.get(str(year), {})
+        headers = {}
+        if current is not None and meta.get('source') == 'api':
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
         
         for attempt in range(max_retries):
+            if not self.breaker.allow():
+                logger.info(f"节假日API熔断中，跳过请求{year}年数据")
+                return None
             try:
-                url = self.API_URL.format(year=year)
-                response = requests.get(url, timeout=10)
+                url = self.api_url.format(year=year)
+                response = requests.get(url, timeout=10, headers=headers)
+                
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                
+                if response.status_code == 304:
+                    # 304 可能带回新的校验值，一并更新
+                    validators = {'etag': response.headers.get('ETag'),
+                                  'last_modified': response.headers.get('Last-Modified')}
+                    with self.lock:
+                        self._set_meta(year, dict(meta, fetched_at=time.time(),
+                                                  **{key: value for key, value in validators.items() if value}))
+                    return FETCH_NOT_MODIFIED
                 
                 if response.status_code != 200:
                     logger.warning(f"API返回错误: {response.status_code}，尝试 {attempt + 1}/{max_retries}")
                     if attempt < max_retries - 1:
                         time.sleep(retry_delay)
                         continue
-                    return False
+                    return None
             
                 data = response.json()
                 
@@ -166,7 +527,7 @@ class WorkdayCalendar:
                     if attempt < max_retries - 1:
                         time.sleep(retry_delay)
                         continue
-                    return False
+                    return None
                 
                 holiday_data = data.get('holiday', {})
                 
@@ -187,33 +548,52 @@ class WorkdayCalendar:
                         'type': 'holiday' if is_holiday else 'workday'
                     }
                 
-                self.holidays_data[str(year)] = year_holidays
-                return True
+                if require_holidays and not year_holidays:
+                    logger.warning(f"API尚未提供{year}年节假日数据")
+                    return None
+                
+                new_meta = {'source': 'api', 'fetched_at': time.time()}
+                validators = {'etag': response.headers.get('ETag'),
+                              'last_modified': response.headers.get('Last-Modified')}
+                new_meta.update({key: value for key, value in validators.items() if value})
+                
+                if year_holidays == current:
+                    with self.lock:
+                        self._set_meta(year, new_meta)
+                    return FETCH_NOT_MODIFIED
+                
+                self._set_year(year, year_holidays, new_meta)
+                return FETCH_MODIFIED
                 
             except requests.RequestException as e:
+                self.breaker.record_failure()
                 logger.warning(f"API请求失败: {e}，尝试 {attempt + 1}/{max_retries}")
                 if attempt < max_retries - 1:
                     time.sleep(retry_delay)
                     continue
             except Exception as e:
                 logger.error(f"解析API数据失败: {e}")
-                return False
+                return None
         
         # 所有重试都失败
         logger.error(f"API请求失败，已重试{max_retries}次")
-        return False
+        return None
+    
+    def _read_config(self) -> Dict:
+        """读取本地配置，文件版本未变化时直接返回上次读取的内容"""
+        version = file_version(self.config_file) if self.config_file else None
+        if self._config_data is None or version != self._config_version:
+            data = read_json(self.config_file) if version is not None else None
+            self._config_data = data if isinstance(data, dict) else {}
+            self._config_version = version
+        return self._config_data
     
     def _load_from_config(self, year: int) -> bool:
         """从本地配置加载"""
         try:
-            if not os.path.exists(self.config_file):
-                return False
-            
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config_data = json.load(f)
-            
+            config_data = self._read_config()
             if str(year) in config_data:
-                self.holidays_data[str(year)] = config_data[str(year)]
+                self._set_year(year, config_data[str(year)], {'source': 'config'})
                 return True
             
             return False
@@ -225,12 +605,12 @@ class WorkdayCalendar:
     def _load_cache(self) -> bool:
         """加载缓存文件"""
         try:
-            if not os.path.exists(self.cache_file):
+            data = read_json(self.cache_file)
+            if data is None:
                 return False
             
-            with open(self.cache_file, 'r', encoding='utf-8') as f:
-                self.holidays_data = json.load(f)
-            
+            self.meta = data.pop(META_KEY, {})
+            self.holidays_data = data
             logger.info(f"成功加载缓存，包含{len(self.holidays_data)}年的数据")
             return True
             
@@ -239,11 +619,36 @@ class WorkdayCalendar:
             return False
     
     def _save_cache(self) -> bool:
-        """保存到缓存文件"""
+        """
+        保存到缓存文件
+        
+        持有文件锁重新读取缓存文件再合并写入：保留其他进程写入的年份，
+        同一年份保留获取时间较新的一份，多个进程刷新不同年份时不会互相覆盖。
+        """
         try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.holidays_data, f, ensure_ascii=False, indent=2)
+            with self.lock:
+                holidays_data, meta = self.holidays_data, self.meta
+            
+            def merge(data):
+                disk_meta = data.pop(META_KEY, {})
+                for year, year_data in holidays_data.items():
+                    ours = meta.get(year, {}).get('fetched_at') or 0
+                    theirs = disk_meta.get(year, {}).get('fetched_at') or 0
+                    if year not in data or ours >= theirs:
+                        data[year] = year_data
+                        if year in meta:
+                            disk_meta[year] = meta[year]
+                data[META_KEY] = disk_meta
+            
+            merged = update_json(self.cache_file, merge, default={})
+            merged_meta = merged.get(META_KEY, {})
             
+            # 其他进程写入、本进程还没有的年份直接采用
+            with self.lock:
+                missing = [year for year in merged if year != META_KEY and year not in self.holidays_data]
+                if missing:
+                    self.holidays_data = dict(self.holidays_data, **{year: merged[year] for year in missing})
+                    self.meta = dict(self.meta, **{year: merged_meta[year] for year in missing if year in merged_meta})
             logger.info(f"缓存已保存到 {self.cache_file}")
             return True
             
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+延迟批量落盘
+变更只标记为脏数据，由后台线程按固定间隔或累计变更数统一写盘，
+消息处理线程不再等待磁盘 I/O
+"""
+
+import logging
+from threading import Event, Lock, Thread
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindFlusher:
+    """延迟批量落盘调度器"""
+
+    def __init__(self, flush_fn: Callable[[], None], interval: float = 5.0,
+                 max_pending: int = 20, name: str = 'write-behind'):
+        """
+        初始化调度器
+
+        Args:
+            flush_fn: 实际写盘函数（需自行处理并发）
+            interval: 最长落盘间隔（秒）
+            max_pending: 累计多少次变更后立即落盘
+            name: 后台线程名称
+        """
+        self.flush_fn = flush_fn
+        self.interval = interval
+        self.max_pending = max(1, max_pending)
+        self.name = name
+
+        self._pending = 0
+        self._lock = Lock()
+        self._flush_lock = Lock()  # 串行化写盘，强制落盘时等待正在进行的后台写盘
+        self._wakeup = Event()
+        self._stopped = False
+        self._thread = None
+
+    @property
+    def pending(self) -> int:
+        """尚未落盘的变更数"""
+        return self._pending
+
+    def mark_dirty(self):
+        """记录一次变更，必要时唤醒后台线程立即落盘"""
+        with self._lock:
+            self._pending += 1
+            pending = self._pending
+            if self._thread is None and not self._stopped:
+                self._thread = Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+        if pending >= self.max_pending:
+            self._wakeup.set()
+
+    def flush(self) -> bool:
+        """
+        立即落盘（在调用线程中执行）
+
+        同一时间只有一个线程在写盘：后台线程正在写盘时，调用方等待它写完再检查剩余变更，
+        返回时之前标记的变更都已写入或仍记为待写入。待写入计数只在写盘成功后扣减。
+
+        Returns:
+            bool: 是否有变更被写入
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending
+
+            if not pending:
+                return False
+
+            try:
+                self.flush_fn()
+            except Exception as e:
+                logger.error(f"[{self.name}] 落盘失败，将在下次重试: {str(e)}", exc_info=True)
+                return False
+
+            with self._lock:
+                self._pending -= pending
+            return True
+
+    def stop(self, timeout: float = None):
+        """
+        停止后台线程并写入剩余变更（进程退出前调用）
+
+        Args:
+            timeout: 等待后台线程结束的最长时间（秒），None 表示一直等待
+        """
+        with self._lock:
+            self._stopped = True
+            thread = self._thread
+        self._wakeup.set()
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()